@@ -22,24 +22,6 @@ class Array
     args.inject(allocate) { |array, arg| array << arg}
   end
 
-  def inspect
-    result = "["
-    recursion = Thread.current.recursion_guard(:array_inspect, self) do
-      self.each_with_index do |obj, i|
-        if i > 0
-          result << ", "
-        end
-        result << obj.inspect
-      end
-    end
-    if recursion
-      result << "..."
-    end
-    result << "]"
-  end
-
-  alias :to_s :inspect
-
   def at(idx)
     self[idx]
   end
@@ -55,16 +37,6 @@ class Array
     end
   end
 
-  def each(&block)
-    return self.enum_for(:each) unless block
-    i = 0
-    while i < self.length
-      yield self[i]
-      i += 1
-    end
-    return self
-  end
-
   def product(*args, &block)
     args = args.unshift(self)
     if block
@@ -180,30 +152,6 @@ class Array
     Array.new(self).sort_by!(&block)
   end
 
-  def ==(other)
-    if self.equal?(other)
-      return true
-    end
-    if !other.kind_of?(Array)
-      if other.respond_to?(:to_ary)
-        return other == self
-      else
-        return false
-      end
-    end
-    if self.size != other.size
-      return false
-    end
-    Thread.current.recursion_guard(:array_equals, self) do
-      self.each_with_index do |x, i|
-        if x != other[i]
-          return false
-        end
-      end
-    end
-    return true
-  end
-
   def <=>(other)
     return 0 if self.equal?(other)
     other = Array.try_convert(other)
@@ -220,37 +168,6 @@ class Array
     nil
   end
 
-  def eql?(other)
-    if self.equal?(other)
-      return true
-    end
-    if !other.kind_of?(Array)
-      return false
-    end
-    if self.length != other.length
-      return false
-    end
-    Thread.current.recursion_guard(:array_eqlp, self) do
-      self.each_with_index do |x, i|
-        if !x.eql?(other[i])
-          return false
-        end
-      end
-    end
-    return true
-  end
-
-  def hash
-    res = 0x345678
-    Thread.current.recursion_guard(:array_hash, self) do
-      self.each do |x|
-        # We want to keep this within a fixnum range.
-        res = Topaz.intmask((1000003 * res) ^ x.hash)
-      end
-    end
-    return res
-  end
-
   def map!(&block)
     return self.enum_for(:map!) unless block
     raise RuntimeError.new("can't modify frozen #{self.class}") if frozen?
@@ -260,31 +177,6 @@ class Array
 
   alias :collect! :map!
 
-  def uniq!(&block)
-    raise RuntimeError.new("can't modify frozen #{self.class}") if frozen?
-    seen = {}
-    old_length = self.length
-    i = 0
-    shifted = 0
-    while i < old_length do
-      item = self[i]
-      item = yield(item) if block
-      if seen.include? item
-        shifted += 1
-      else
-        seen[item] = nil
-        self[i - shifted] = item if shifted > 0
-      end
-      i += 1
-    end
-    if shifted > 0
-      self.slice!(-shifted, shifted)
-      return self
-    else
-      return nil
-    end
-  end
-
   def uniq(&block)
     arr = self.dup
     arr.uniq!(&block)
@@ -350,21 +242,6 @@ class Array
     Array.new(self).rotate!(n)
   end
 
-  def count(*args, &block)
-    c = 0
-    if args.empty?
-      if block
-        self.each { |e| c += 1 if block.call(e) }
-      else
-        c = self.length
-      end
-    else
-      arg = args[0]
-      self.each { |e| c += 1 if e == arg }
-    end
-    c
-  end
-
   def shuffle!
     raise RuntimeError.new("can't modify frozen #{self.class}") if frozen?
     (self.length - 1).downto(1) do |idx|
@@ -384,28 +261,6 @@ class Array
     self.instance_of?(Array) ? self : Array.new(self)
   end
 
-  def &(other)
-    other = Topaz.convert_type(other, Array, :to_ary)
-    h = {}
-    other.each { |e| h[e] = true }
-    self.select { |e| h.delete(e) }
-  end
-
-  def |(other)
-    other = Topaz.convert_type(other, Array, :to_ary)
-    h = {}
-    self.each { |e| h[e] = true }
-    other.each { |e| h.fetch(e) { |v| h[v] = true } }
-    h.keys
-  end
-
-  def -(other)
-    other = Topaz.convert_type(other, Array, :to_ary)
-    h = {}
-    other.each { |e| h[e] = true }
-    self.reject { |e| h.has_key?(e) }
-  end
-
   def permutation(r = nil, &block)
     return self.enum_for(:permutation, r) unless block
     r = r ? Topaz.convert_type(r, Fixnum, :to_int) : self.size
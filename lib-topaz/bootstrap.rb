@@ -5,15 +5,20 @@ load_bootstrap = proc do |file|
   load(File.join(lib_topaz, file))
 end
 
+# Files that only define new constants are loaded when one is first used.
+autoload_bootstrap = proc do |mod, name, file|
+  mod.autoload(name, File.join(lib_topaz, file))
+end
+
 load_bootstrap.call("topaz.rb")
 load_bootstrap.call("array.rb")
 load_bootstrap.call("class.rb")
 load_bootstrap.call("comparable.rb")
 load_bootstrap.call("dir.rb")
 load_bootstrap.call("enumerable.rb")
-load_bootstrap.call("enumerator.rb")
+autoload_bootstrap.call(Object, :Enumerator, "enumerator.rb")
 load_bootstrap.call("env.rb")
-load_bootstrap.call("errno.rb")
+autoload_bootstrap.call(Object, :Errno, "errno.rb")
 load_bootstrap.call("file.rb")
 load_bootstrap.call("fixnum.rb")
 load_bootstrap.call("hash.rb")
@@ -48,6 +48,14 @@ module Enumerable
   end
   alias reduce inject
 
+  def sum(init = 0, &block)
+    if block
+      inject(init) { |sum, e| sum + block.call(e) }
+    else
+      inject(init, :+)
+    end
+  end
+
   def each_with_index(*args, &block)
     return self.enum_for(:each_with_index, *args) if !block
     i = 0
@@ -149,6 +157,12 @@ module Enumerable
   end
   alias entries to_a
 
+  def lazy
+    Enumerator::Lazy.new(self) do |yielder, *values|
+      yielder.yield(*values)
+    end
+  end
+
   def detect(ifnone = nil, &block)
     return self.enum_for(:detect, ifnone) unless block
     self.each_entry do |o|
@@ -208,22 +222,16 @@ module Enumerable
 
   def max_by(&block)
     return self.enum_for(:max_by) unless block
-    max = maxv = nil
-    self.each_with_index do |e, i|
-      ev = yield(e)
-      max, maxv = e, ev if i == 0 || Topaz.compare(ev, maxv) > 0
-    end
-    max
+    values, keys = Topaz.entries_with_keys(self, &block)
+    return nil if values.empty?
+    values[Topaz.max_index(keys)]
   end
 
   def min_by(&block)
     return self.enum_for(:min_by) unless block
-    min = minv = nil
-    self.each_with_index do |e, i|
-      ev = yield(e)
-      min, minv = e, ev if i == 0 || Topaz.compare(ev, minv) < 0
-    end
-    min
+    values, keys = Topaz.entries_with_keys(self, &block)
+    return nil if values.empty?
+    values[Topaz.min_index(keys)]
   end
 
   def minmax(&block)
@@ -237,13 +245,9 @@ module Enumerable
 
   def minmax_by(&block)
     return self.enum_for(:minmax_by) unless block
-    min = max = minv = maxv = nil
-    self.each_with_index do |e, i|
-      ev = yield(e)
-      max, maxv = e, ev if i == 0 || Topaz.compare(ev, maxv) > 0
-      min, minv = e, ev if i == 0 || Topaz.compare(ev, minv) < 0
-    end
-    [min, max]
+    values, keys = Topaz.entries_with_keys(self, &block)
+    return [nil, nil] if values.empty?
+    [values[Topaz.min_index(keys)], values[Topaz.max_index(keys)]]
   end
 
   def partition(&block)
@@ -45,22 +45,15 @@ class Enumerator
   def rewind
     @object.rewind if @object.respond_to?(:rewind)
     @nextvals = nil
+    @cursor = nil
     @fiber = nil
     @finished = false
     self
   end
 
   def peek
-    if @nextvals.nil?
-      @nextvals = []
-      @finished = false
-      @fiber ||= Fiber.new do
-        self.each do |*values|
-          Fiber.yield(*values)
-        end
-        @finished = true
-      end
-    end
+    start_external_iteration if @nextvals.nil?
+    return @cursor.peek if @cursor
 
     if @nextvals.empty?
       @nextvals << @fiber.resume
@@ -76,6 +69,8 @@ class Enumerator
 
   def next
     raise StopIteration.new("iteration reached an end") if @finished
+    start_external_iteration if @nextvals.nil?
+    return @cursor.next if @cursor
     self.peek
     return @nextvals.shift
   end
@@ -90,6 +85,210 @@ class Enumerator
     return obj
   end
 
+  # Builtin collections are walked with a native cursor, anything else runs
+  # its each in a Fiber that is resumed once per element.
+  def start_external_iteration
+    @nextvals = []
+    @finished = false
+    @cursor = Topaz::EnumeratorCursor.for(@object, @method, @args)
+    unless @cursor
+      @fiber ||= Fiber.new do
+        self.each do |*values|
+          Fiber.yield(*values)
+        end
+        @finished = true
+      end
+    end
+  end
+  private :start_external_iteration
+
+  # Each lazy operation wraps the previous enumerator in another one, whose
+  # block handles a single element and passes what survives to the yielder.
+  # Iterating the outermost Lazy runs the whole chain in one pass over the
+  # source, without building intermediate arrays.
+  class Lazy < Enumerator
+    class StopLazy < Exception
+    end
+
+    def initialize(obj, &block)
+      raise ArgumentError.new("tried to call lazy new without a block") unless block
+      super() do |yielder|
+        obj.each do |*values|
+          block.call(yielder, *values)
+        end
+      end
+    end
+
+    def lazy
+      self
+    end
+
+    def map(&block)
+      raise ArgumentError.new("tried to call lazy map without a block") unless block
+      Lazy.new(self) do |yielder, *values|
+        yielder.yield(block.call(*values))
+      end
+    end
+    alias collect map
+
+    def select(&block)
+      raise ArgumentError.new("tried to call lazy select without a block") unless block
+      Lazy.new(self) do |yielder, *values|
+        yielder.yield(*values) if block.call(*values)
+      end
+    end
+    alias find_all select
+
+    def reject(&block)
+      raise ArgumentError.new("tried to call lazy reject without a block") unless block
+      Lazy.new(self) do |yielder, *values|
+        yielder.yield(*values) unless block.call(*values)
+      end
+    end
+
+    def flat_map(&block)
+      raise ArgumentError.new("tried to call lazy flat_map without a block") unless block
+      Lazy.new(self) do |yielder, *values|
+        result = block.call(*values)
+        if result.respond_to?(:force) && result.respond_to?(:each)
+          result.each { |v| yielder << v }
+        elsif array = Array.try_convert(result)
+          array.each { |v| yielder << v }
+        else
+          yielder << result
+        end
+      end
+    end
+    alias collect_concat flat_map
+
+    def take(n)
+      n = Topaz.convert_type(n, Fixnum, :to_int)
+      raise ArgumentError.new("attempt to take negative size") if n < 0
+      source = self
+      lazy_generator do |yielder|
+        if n > 0
+          taken = 0
+          stop_each(source) do |stop, *values|
+            yielder.yield(*values)
+            taken += 1
+            raise stop if taken == n
+          end
+        end
+      end
+    end
+
+    def take_while(&block)
+      raise ArgumentError.new("tried to call lazy take_while without a block") unless block
+      source = self
+      lazy_generator do |yielder|
+        stop_each(source) do |stop, *values|
+          raise stop unless block.call(*values)
+          yielder.yield(*values)
+        end
+      end
+    end
+
+    def drop(n)
+      n = Topaz.convert_type(n, Fixnum, :to_int)
+      raise ArgumentError.new("attempt to drop negative size") if n < 0
+      source = self
+      lazy_generator do |yielder|
+        dropped = 0
+        source.each do |*values|
+          if dropped < n
+            dropped += 1
+          else
+            yielder.yield(*values)
+          end
+        end
+      end
+    end
+
+    def drop_while(&block)
+      raise ArgumentError.new("tried to call lazy drop_while without a block") unless block
+      source = self
+      lazy_generator do |yielder|
+        dropping = true
+        source.each do |*values|
+          dropping = false if dropping && !block.call(*values)
+          yielder.yield(*values) unless dropping
+        end
+      end
+    end
+
+    def with_index(offset = nil, &block)
+      offset = offset ? Topaz.convert_type(offset, Fixnum, :to_int) : 0
+      source = self
+      lazy_generator do |yielder|
+        i = offset
+        source.each do |*values|
+          v = (values.size == 1) ? values[0] : values
+          if block
+            block.call(v, i)
+            yielder.yield(*values)
+          else
+            yielder.yield(v, i)
+          end
+          i += 1
+        end
+      end
+    end
+
+    def each_with_index(&block)
+      with_index(0, &block)
+    end
+
+    def each_slice(n)
+      n = Topaz.convert_type(n, Fixnum, :to_int)
+      raise ArgumentError.new("invalid slice size") if n <= 0
+      source = self
+      lazy_generator do |yielder|
+        slice = []
+        source.each do |*values|
+          slice << ((values.size == 1) ? values[0] : values)
+          if slice.size == n
+            yielder << slice
+            slice = []
+          end
+        end
+        yielder << slice unless slice.empty?
+      end
+    end
+
+    def first(*args)
+      if args.empty?
+        take(1).to_a[0]
+      else
+        take(*args).to_a
+      end
+    end
+
+    def force
+      to_a
+    end
+
+    def lazy_generator(&block)
+      Lazy.new(Generator.new(&block)) do |yielder, *values|
+        yielder.yield(*values)
+      end
+    end
+    private :lazy_generator
+
+    # Runs source.each, passing the block a fresh StopLazy it can raise to end
+    # the iteration early.
+    def stop_each(source, &block)
+      stop = StopLazy.new
+      begin
+        source.each do |*values|
+          block.call(stop, *values)
+        end
+      rescue StopLazy => e
+        raise unless e.equal?(stop)
+      end
+    end
+    private :stop_each
+  end
+
   class Generator
     def initialize(&block)
       @block = block
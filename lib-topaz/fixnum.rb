@@ -7,16 +7,6 @@ class Fixnum < Integer
     self + 1
   end
 
-  def upto(n, &block)
-    return self.enum_for(:upto, n) if !block
-    i = self
-    while i <= n
-      yield i
-      i += 1
-    end
-    self
-  end
-
   def even?
     self % 2 == 0
   end
@@ -150,24 +150,6 @@ class Hash
     res
   end
 
-  def inspect
-    result = "{"
-    recursion = Thread.current.recursion_guard(:hash_inspect, self) do
-      self.each_with_index do |(key, value), i|
-        if i > 0
-          result << ", "
-        end
-        result << "#{key.inspect}=>#{value.inspect}"
-      end
-    end
-    if recursion
-      result << "..."
-    end
-    result << "}"
-  end
-
-  alias :to_s :inspect
-
   def select!(&block)
     return enum_for(:select!) unless block
     raise RuntimeError.new("can't modify frozen #{self.class}") if frozen?
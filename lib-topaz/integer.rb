@@ -6,6 +6,17 @@ class Integer < Numeric
       yield current
       current -= 1
     end
+    self
+  end
+
+  def upto(limit, &block)
+    return self.enum_for(:upto, limit) unless block
+    current = self
+    while current <= limit
+      yield current
+      current += 1
+    end
+    self
   end
 
   def times(&block)
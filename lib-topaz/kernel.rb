@@ -4,11 +4,6 @@ module Kernel
   end
   private :puts
 
-  def gets(sep = $/, limit = nil)
-    $stdin.gets(sep, limit)
-  end
-  private :gets
-
   def print(*args)
     $stdout.print(*args)
   end
@@ -23,6 +18,16 @@ module Kernel
     self == other ? 0 : nil
   end
 
+  def autoload(name, path)
+    self.class.autoload(name, path)
+  end
+  private :autoload
+
+  def autoload?(name)
+    self.class.autoload?(name)
+  end
+  private :autoload?
+
   def chop
     $_.chop!
   end
@@ -1,11 +1,4 @@
 class Symbol
-  def to_proc
-    Proc.new do |*args|
-      raise ArgumentError.new("no receiver given") if args.empty?
-      args.shift.send(self, *args)
-    end
-  end
-
   def to_sym
     self
   end
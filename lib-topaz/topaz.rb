@@ -1,9 +1,16 @@
 module Topaz
+  # Returns the entries of enum and the result of the block for each of them,
+  # so that every key is computed exactly once.
+  def self.entries_with_keys(enum)
+    values, keys = [], []
+    enum.each_entry do |e|
+      values << e
+      keys << yield(e)
+    end
+    return values, keys
+  end
 end
 
 lib_topaz = File.join(File.dirname(__FILE__), 'topaz')
-load_bootstrap = proc do |file|
-  load(File.join(lib_topaz, file))
-end
-
-load_bootstrap.call("array.rb")
+Topaz.autoload(:Array, File.join(lib_topaz, "array.rb"))
+Topaz.autoload(:Range, File.join(lib_topaz, "range.rb"))
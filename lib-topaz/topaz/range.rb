@@ -0,0 +1,128 @@
+class Topaz::Range
+  def self.each(range, &block)
+    first = range.begin
+    unless first.respond_to?(:succ)
+      raise TypeError.new("can't iterate from #{first.class}")
+    end
+
+    case first
+    when String
+      first.upto(range.end, range.exclude_end?, &block)
+    when Symbol
+      first.to_s.upto(range.end.to_s, range.exclude_end?) do |s|
+        yield s.to_sym
+      end
+    else
+      i = first
+      if range.exclude_end?
+        while (i <=> range.end) < 0 do
+          yield i
+          i = i.succ
+        end
+      else
+        while (i <=> range.end) <= 0 do
+          yield i
+          i = i.succ
+        end
+      end
+    end
+    range
+  end
+
+  def self.step(range, step_size, &block)
+    return range.to_enum(:step, step_size) unless block
+    first = range.begin
+    last = range.end
+
+    if step_size.kind_of? Float or first.kind_of? Float or last.kind_of? Float
+      # if any are floats they all must be
+      begin
+        step_size = Float(from = step_size)
+        first     = Float(from = first)
+        last      = Float(from = last)
+      rescue ArgumentError
+        raise TypeError, "no implicit conversion to float from #{from.class}"
+      end
+    else
+      step_size = Topaz.convert_type(step_size, Integer, :to_int)
+    end
+
+    if step_size <= 0
+      raise ArgumentError, "step can't be negative" if step_size < 0
+      raise ArgumentError, "step can't be 0"
+    end
+
+    if first.kind_of?(Float)
+      err = (first.abs + last.abs + (last - first).abs) / step_size.abs * Float::EPSILON
+      err = 0.5 if err > 0.5
+      if range.exclude_end?
+        n = ((last - first) / step_size - err).floor
+        n += 1 if n * step_size + first < last
+      else
+        n = ((last - first) / step_size + err).floor + 1
+      end
+
+      i = 0
+      while i < n
+        d = i * step_size + first
+        d = last if last < d
+        yield d
+        i += 1
+      end
+    elsif first.kind_of?(Numeric)
+      d = first
+      while range.exclude_end? ? d < last : d <= last
+        yield d
+        d += step_size
+      end
+    else
+      counter = 0
+      range.each do |o|
+        yield o if counter % step_size == 0
+        counter += 1
+      end
+    end
+
+    return range
+  end
+
+  def self.min(range)
+    if (range.end < range.begin) || (range.exclude_end? && (range.end == range.begin))
+      return nil
+    end
+    range.begin
+  end
+
+  def self.max(range)
+    if (range.end < range.begin) || (range.exclude_end? && (range.end == range.begin))
+      return nil
+    end
+    if range.exclude_end?
+      unless range.end.kind_of?(Integer)
+        raise TypeError.new("cannot exclude non Integer end value")
+      end
+      unless range.begin.kind_of?(Integer)
+        raise TypeError.new("cannot exclude end value with non Integer begin value")
+      end
+      range.end - 1
+    else
+      range.end
+    end
+  end
+
+  def self.include?(range, value)
+    beg_compare = range.begin <=> value
+    if !beg_compare
+      return false
+    end
+    if beg_compare <= 0
+      end_compare = value <=> range.end
+      if range.exclude_end?
+        return true if end_compare < 0
+      else
+        return true if end_compare <= 0
+      end
+    end
+    return false
+  end
+end
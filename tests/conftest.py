@@ -10,12 +10,21 @@ def pytest_funcarg__space(request):
     from topaz.main import get_topaz_config_options
     from topaz.objspace import ObjectSpace
 
+    class TestObjectSpace(ObjectSpace):
+        # Each execute stands in for a whole script here, so its buffered
+        # output is written out before the test looks at it.
+        def execute(self, *args, **kwargs):
+            try:
+                return ObjectSpace.execute(self, *args, **kwargs)
+            finally:
+                self.flush_io()
+
     # Building a space is exceptionally expensive, so we create one once, and
     # then just deepcopy it.  Note that deepcopying is still fairly expensive
     # (at the time of writing about 1/3 of total test time), but significantly
     # less so than building a new space.
     def build_space():
-        space = ObjectSpace(get_combined_translation_config(
+        space = TestObjectSpace(get_combined_translation_config(
             overrides=get_topaz_config_options(),
         ))
         space.setup(topaz.__file__)
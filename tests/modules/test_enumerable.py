@@ -171,6 +171,17 @@ class TestEnumberable(BaseTopazTest):
         w_res = space.execute("return (1..10).take_while { |i| i < 11 }")
         assert self.unwrap(space, w_res) == range(1, 11)
 
+    def test_min_max_by(self, space):
+        w_res = space.execute("""
+        calls = 0
+        words = ["bb", "a", "ccc", "dd"]
+        res = [words.min_by { |w| calls += 1; w.size }, words.max_by { |w| calls += 1; w.size }]
+        res << words.minmax_by { |w| calls += 1; -w.size } << calls
+        res << [].min_by { |w| w } << (1..4).max_by { |i| i % 3 } << (1..4).minmax_by { |i| i.to_s }
+        return res
+        """)
+        assert self.unwrap(space, w_res) == ["a", "ccc", ["ccc", "a"], 12, None, 2, [1, 4]]
+
     def test_reject(self, space):
         w_res = space.execute("return [1, 2, 3].reject { |i| i == 3 }")
         assert self.unwrap(space, w_res) == [1, 2]
@@ -180,3 +191,73 @@ class TestEnumberable(BaseTopazTest):
         assert self.unwrap(space, w_res) == range(1, 11)
         w_res = space.execute("return (1..10).reject { |i| i < 11 }")
         assert self.unwrap(space, w_res) == []
+
+    def test_native_collections(self, space):
+        w_res = space.execute("""
+        h = {:a => 1, :b => 2, :c => 3}
+        return [
+          h.map { |k, v| v * 2 },
+          h.find_all { |k, v| v.odd? },
+          h.group_by { |k, v| v.odd? }.to_a,
+          h.each_with_index.to_a,
+          (1...5).each_slice(3).to_a,
+          (1...5).partition(&:even?),
+          (3..1).to_a,
+          [1, [2, 3], 4].flat_map { |x| x },
+          [1, 2, 3].each_with_object([]) { |x, memo| memo << x * x },
+          ["a", "b"].each_with_index.map { |x, i| x * (i + 1) },
+        ]
+        """)
+        assert self.unwrap(space, w_res) == [
+            [2, 4, 6],
+            [["a", 1], ["c", 3]],
+            [[True, [["a", 1], ["c", 3]]], [False, [["b", 2]]]],
+            [[["a", 1], 0], [["b", 2], 1], [["c", 3], 2]],
+            [[1, 2, 3], [4]],
+            [[2, 4], [1, 3]],
+            [],
+            [1, 2, 3, 4],
+            [1, 4, 9],
+            ["a", "bb"],
+        ]
+
+    def test_native_queries(self, space):
+        w_res = space.execute("""
+        a = [3, 1, nil, 2]
+        return [
+          a.count, a.count(1), a.count { |x| x.nil? },
+          a.any?, a.all?, a.none? { |x| x == 4 },
+          a.include?(nil), (1..3).member?(2),
+          a.detect { |x| x == 5 }, a.find(proc { :none }) { |x| x == 5 },
+          a.find_index(2), a.find_index { |x| x.nil? },
+          (1..10).inject(:+), [2, 3].reduce(10) { |acc, x| acc * x },
+          a.take(2), a.drop_while { |x| x }, (1..5).take_while { |x| x < 3 },
+        ]
+        """)
+        assert self.unwrap(space, w_res) == [
+            4, 1, 1,
+            True, False, True,
+            True, True,
+            None, "none",
+            3, 2,
+            55, 60,
+            [3, 1], [None, 2], [1, 2],
+        ]
+
+    def test_native_falls_back_to_each(self, space):
+        w_res = space.execute("""
+        class Countdown < Array
+          def each
+            yield 3
+            yield 2
+            yield 1
+          end
+        end
+        c = Countdown.new
+        return c.map { |x| x * 10 }, c.select(&:odd?), c.inject(:+), c.include?(2)
+        """)
+        assert self.unwrap(space, w_res) == [[30, 20, 10], [3, 1], 6, True]
+
+    def test_native_break(self, space):
+        w_res = space.execute("return (1..10).map { |x| break x * 100 if x == 4; x }")
+        assert space.int_w(w_res) == 400
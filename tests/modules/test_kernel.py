@@ -344,6 +344,53 @@ class TestRequire(BaseTopazTest):
         """ % (f, f, f))
         assert space.int_w(w_res) == 1
 
+    def test_loaded_features_changes(self, space, tmpdir):
+        tmpdir.join("f.rb").write("@a += 1")
+        sub = tmpdir.mkdir("sub")
+        w_res = space.execute("""
+        @a = 0
+        $LOAD_PATH.unshift '%s'
+        res = [require('f'), require('f')]
+        $LOADED_FEATURES.delete_if { |f| f.end_with?("/f.rb") }
+        res << require('f')
+        File.open('%s/g.rb', 'w') { |f| f.write("@a += 10") }
+        $LOAD_PATH.unshift '%s'
+        res << require('g') << require('g') << @a
+        return res
+        """ % (tmpdir, sub, sub))
+        assert self.unwrap(space, w_res) == [True, False, True, True, False, 12]
+
+    def test_load_path_relative_entries(self, space, tmpdir):
+        for name, value in [("a", 1), ("b", 2)]:
+            tmpdir.mkdir(name).mkdir("lib").join("rel.rb").write("@rel = %d" % value)
+        w_res = space.execute("""
+        $LOAD_PATH.unshift 'lib'
+        res = []
+        begin
+          require 'missing_rel'
+        rescue LoadError
+          res << :missing
+        end
+        Dir.chdir('%s') { load 'rel.rb'; res << @rel }
+        Dir.chdir('%s') { load 'rel.rb'; res << @rel }
+        return res
+        """ % (tmpdir.join("a"), tmpdir.join("b")))
+        assert self.unwrap(space, w_res) == ["missing", 1, 2]
+
+    def test_load_path_deleted_file(self, space, tmpdir):
+        first = tmpdir.mkdir("first")
+        first.join("gone.rb").write("@gone = 1")
+        tmpdir.mkdir("second").join("gone.rb").write("@gone = 2")
+        w_res = space.execute("""
+        $LOAD_PATH.unshift '%s', '%s'
+        load 'gone.rb'
+        res = [@gone]
+        File.delete('%s')
+        load 'gone.rb'
+        return res << @gone
+        """ % (first, tmpdir.join("second"), first.join("gone.rb")))
+        assert self.unwrap(space, w_res) == [1, 2]
+
     def test_load(self, space, tmpdir):
         f = tmpdir.join("f.rb")
         f.write("""
@@ -16,6 +16,22 @@ class TestArrayObject(BaseTopazTest):
         w_res = space.execute("return [[1], [2], [3]].to_s")
         assert space.str_w(w_res) == "[[1], [2], [3]]"
 
+    def test_inspect(self, space):
+        w_res = space.execute("""
+        a = [1, 1.5, "a", :b, nil, {1 => [2]}]
+        a << a
+        return a.inspect
+        """)
+        assert space.str_w(w_res) == '[1, 1.5, "a", :b, nil, {1=>[2]}, [...]]'
+        w_res = space.execute("""
+        class Fixnum
+          def inspect; "int"; end
+        end
+        class A; def inspect; "A"; end; end
+        return [1, A.new].inspect
+        """)
+        assert space.str_w(w_res) == "[int, A]"
+
     def test_subscript(self, space):
         w_res = space.execute("return [1][0]")
         assert space.int_w(w_res) == 1
@@ -102,6 +118,34 @@ class TestArrayObject(BaseTopazTest):
         w_res = space.execute("return [1, 1, 2, '3'] - [1, '3']")
         assert self.unwrap(space, w_res) == [2]
 
+    def test_and_or(self, space):
+        w_res = space.execute("return [1, 1, 'a', 2, 'b'] & ['b', 1, 3]")
+        assert self.unwrap(space, w_res) == [1, "b"]
+        w_res = space.execute("return [1, 'a', 1] | ['a', 2.0, 2]")
+        assert self.unwrap(space, w_res) == [1, "a", 2.0, 2]
+        w_res = space.execute("""
+        a = ["x"]
+        b = a | ["y"]
+        b[0] << "z"
+        return a, b[0].frozen?
+        """)
+        assert self.unwrap(space, w_res) == [["xz"], False]
+
+    def test_uniq(self, space):
+        w_res = space.execute("""
+        a = [1, 2, 1, "a", "a", 1.0]
+        return a.uniq!, a
+        """)
+        assert self.unwrap(space, w_res) == [[1, 2, "a", 1.0], [1, 2, "a", 1.0]]
+        w_res = space.execute("return [1, 2].uniq!")
+        assert w_res is space.w_nil
+        w_res = space.execute("""
+        a = [1, 2, 3, 4, 5]
+        b = a.uniq { |x| x % 2 }
+        return a, b
+        """)
+        assert self.unwrap(space, w_res) == [[1, 2, 3, 4, 5], [1, 2]]
+
     def test_lshift(self, space):
         w_res = space.execute("return [] << 1")
         assert self.unwrap(space, w_res) == [1]
@@ -177,6 +221,25 @@ class TestArrayObject(BaseTopazTest):
         w_res = space.execute("return [1, 2].unshift(3, 4)")
         assert self.unwrap(space, w_res) == [3, 4, 1, 2]
 
+    def test_queue(self, space):
+        w_res = space.execute("""
+        a = []
+        res = []
+        100.times do |i|
+          a << i << i
+          res << a.shift
+        end
+        a.unshift(-1, -2)
+        a.unshift(-3)
+        res << a.shift(3) << a.pop << a.length << a[0] << a.last << a[1, 2]
+        a.sort!
+        return res, a.first, a.last, a.size
+        """)
+        res, first, last, size = self.unwrap(space, w_res)
+        assert res[:100] == [i // 2 for i in xrange(100)]
+        assert res[100:] == [[-3, -1, -2], 99, 99, 50, 99, [50, 51]]
+        assert [first, last, size] == [50, 99, 99]
+
     def test_join(self, space):
         w_res = space.execute("return [1, 'a', :b].join")
         assert space.str_w(w_res) == "1ab"
@@ -193,6 +256,14 @@ class TestArrayObject(BaseTopazTest):
         return [1, 2].join(A.new)
         """)
         assert space.str_w(w_res) == "1A2"
+        w_res = space.execute("return [1, [2, [3, []]], 'a'].join(',')")
+        assert space.str_w(w_res) == "1,2,3,,a"
+        with self.raises(space, "ArgumentError", "recursive array join"):
+            space.execute("""
+            a = [1]
+            a << a
+            a.join
+            """)
 
     def test_dup(self, space):
         w_res = space.execute("""
@@ -326,6 +397,18 @@ class TestArrayObject(BaseTopazTest):
         assert w_res is space.w_false
         w_res = space.execute("return [0].eql? [0]")
         assert w_res is space.w_true
+        w_res = space.execute("return [1, ['a', :b]].eql? [1, ['a', :b]]")
+        assert w_res is space.w_true
+
+    def test_recursive_equality(self, space):
+        w_res = space.execute("""
+        a = [1]
+        a << a
+        b = [1]
+        b << b
+        return a == a, a == b, a.hash == a.hash
+        """)
+        assert self.unwrap(space, w_res) == [True, True, True]
 
     def test_clear(self, space):
         w_res = space.execute("""
@@ -342,6 +425,8 @@ class TestArrayObject(BaseTopazTest):
         assert space.int_w(w_res) == 5
         w_res = space.execute("return {[1, 2, 3] => 5}[[1, 2]]")
         assert w_res is space.w_nil
+        w_res = space.execute("return [1, 'a', [:b]].hash == [1, 'a', [:b]].hash")
+        assert w_res is space.w_true
 
     def test_sort(self, space):
         w_res = space.execute("""
@@ -371,6 +456,31 @@ class TestArrayObject(BaseTopazTest):
         with self.raises(space, "ArgumentError", "comparison of Array with Object failed"):
             space.execute("[Object.new, []].sort")
 
+    def test_sort_by(self, space):
+        w_res = space.execute("""
+        calls = 0
+        a = [3, 1, 2, 5, 4]
+        b = a.sort_by { |x| calls += 1; -x }
+        return a, b, calls
+        """)
+        assert self.unwrap(space, w_res) == [[3, 1, 2, 5, 4], [5, 4, 3, 2, 1], 5]
+        w_res = space.execute("""
+        a = ["bb", "a", "ccc"]
+        return a.sort_by { |x| x.size.to_f }, a.sort_by(&:reverse), a.sort_by! { |x| [x.size] }, a
+        """)
+        assert self.unwrap(space, w_res) == [
+            ["a", "bb", "ccc"], ["a", "bb", "ccc"], ["a", "bb", "ccc"], ["a", "bb", "ccc"]
+        ]
+        w_res = space.execute("""
+        class Fixnum
+          def <=>(other); other - self; end
+        end
+        return [1, 3, 2].sort_by { |x| x }
+        """)
+        assert self.unwrap(space, w_res) == [3, 2, 1]
+        with self.raises(space, "ArgumentError"):
+            space.execute("[1, 2].sort_by { |x| x == 1 ? 'a' : 1 }")
+
     def test_multiply(self, space):
         w_res = space.execute("return [ 1, 2, 3 ] * 3")
         assert self.unwrap(space, w_res) == [1, 2, 3, 1, 2, 3, 1, 2, 3]
@@ -533,6 +643,29 @@ class TestArrayPack(BaseTopazTest):
         assert self.unwrap(space, w_res) == "albatross"
         assert space.execute("[].max") is space.w_nil
 
+    def test_min(self, space):
+        w_res = space.execute("""
+        a = %w(albatross dog horse)
+        return a.min, a.min { |a, b| b.length <=> a.length }
+        """)
+        assert self.unwrap(space, w_res) == ["albatross", "albatross"]
+        w_res = space.execute("return [3, 1, 2].min, [2.5, -1.5].min, [2, 1.5].min, [3, 2 ** 70].min")
+        assert self.unwrap(space, w_res) == [1, -1.5, 1.5, 3]
+        assert space.execute("[].min") is space.w_nil
+
+    def test_sort_native(self, space):
+        w_res = space.execute("""
+        return [3, -1, 2].sort, [2.5, -1.0, 0.5].sort, ["b", "c", "a"].sort, [2, 1.5, 3].sort
+        """)
+        assert self.unwrap(space, w_res) == [[-1, 2, 3], [-1.0, 0.5, 2.5], ["a", "b", "c"], [1.5, 2, 3]]
+        w_res = space.execute("""
+        class Fixnum
+          def <=>(other); other - self; end
+        end
+        return [1, 3, 2].sort, [1, 3, 2].max
+        """)
+        assert self.unwrap(space, w_res) == [[3, 2, 1], 1]
+
     def test_singleton_subscript(self, space):
         w_res = space.execute("return Array[6, -1]")
         assert self.unwrap(space, w_res) == [6, -1]
@@ -540,3 +673,14 @@ class TestArrayPack(BaseTopazTest):
     def test_each(self, space):
         w_res = space.execute("return [1, 2].each { }")
         assert self.unwrap(space, w_res) == [1, 2]
+        w_res = space.execute("""
+        a = [1, 2, 3]
+        res = []
+        a.each do |x|
+          res << x
+          a << x * 10 if x < 3
+          a.shift if x == 10
+        end
+        return res, a.each.to_a
+        """)
+        assert self.unwrap(space, w_res) == [[1, 2, 3, 10], [2, 3, 10, 20]]
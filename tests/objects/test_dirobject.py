@@ -113,6 +113,22 @@ class TestDir(BaseTopazTest):
         res = self.unwrap(space, w_res)
         assert res == [["sub1"], ["sub1"]]
 
+    def test_glob_block(self, space, tmpdir):
+        sub = tmpdir.mkdir("sub")
+        sub.join("a.rb").ensure()
+        sub.join("b.py").ensure()
+        tmpdir.join("link").mksymlinkto(sub)
+        w_res = space.execute("""
+        res = []
+        Dir.chdir('%s') do
+          res << Dir.glob(["**/*.rb", "sub/*.rb"]) { |f| res << f }
+        end
+        return res
+        """ % tmpdir)
+        res = self.unwrap(space, w_res)
+        assert res[-1] is None
+        assert sorted(res[:-1]) == ["link/a.rb", "sub/a.rb"]
+
     def test_read(self, space, tmpdir):
         d = tmpdir.mkdir("sub")
         f = d.join("content")
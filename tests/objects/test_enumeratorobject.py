@@ -0,0 +1,96 @@
+from ..base import BaseTopazTest
+
+
+class TestEnumeratorObject(BaseTopazTest):
+    def test_next(self, space):
+        w_res = space.execute("""
+        e = [1, 2, 3].each
+        return e.next, e.peek, e.next, e.next
+        """)
+        assert self.unwrap(space, w_res) == [1, 2, 2, 3]
+        w_res = space.execute("""
+        e = {:a => 1}.each
+        return e.next
+        """)
+        assert self.unwrap(space, w_res) == [["a", 1]]
+        w_res = space.execute("""
+        e = (1..3).each
+        return e.next, e.next, e.next
+        """)
+        assert self.unwrap(space, w_res) == [1, 2, 3]
+        w_res = space.execute("""
+        s = "ab"
+        return s.each_char.next, s.each_byte.next
+        """)
+        assert self.unwrap(space, w_res) == ["a", 97]
+
+    def test_stop_iteration(self, space):
+        w_res = space.execute("""
+        e = [1].each
+        e.next
+        begin
+          e.peek
+        rescue StopIteration
+          res = :stopped
+        end
+        return res, e.rewind.next
+        """)
+        assert self.unwrap(space, w_res) == ["stopped", 1]
+
+    def test_zip_streams(self, space):
+        w_res = space.execute("""
+        a = [1, 3, 5].each
+        b = (2..6).step(2)
+        res = []
+        loop do
+          res << a.next << b.next
+        end
+        return res
+        """)
+        assert self.unwrap(space, w_res) == [1, 2, 3, 4, 5, 6]
+
+    def test_custom_each(self, space):
+        w_res = space.execute("""
+        class Foo < Array
+          def each
+            return to_enum(:each) unless block_given?
+            yield 42
+          end
+        end
+        e = Foo.new([1, 2]).each
+        g = Enumerator.new { |y| y << 1; y << 2 }
+        return e.next, g.next, g.next
+        """)
+        assert self.unwrap(space, w_res) == [42, 1, 2]
+
+    def test_lazy(self, space):
+        w_res = space.execute("""
+        naturals = Enumerator.new do |y|
+          i = 0
+          while true
+            y << i
+            i += 1
+          end
+        end
+        return naturals.lazy.map { |x| x * 2 }.select { |x| x % 3 == 0 }.first(3)
+        """)
+        assert self.unwrap(space, w_res) == [0, 6, 12]
+        w_res = space.execute("""
+        seen = []
+        res = (1..10).lazy.map { |x| seen << x; x }.take_while { |x| x < 4 }.to_a
+        return res, seen
+        """)
+        assert self.unwrap(space, w_res) == [[1, 2, 3], [1, 2, 3, 4]]
+        w_res = space.execute("""
+        return [1, 2, 3, 4, 5].lazy.drop_while { |x| x < 3 }.reject(&:even?).force
+        """)
+        assert self.unwrap(space, w_res) == [3, 5]
+        w_res = space.execute("""
+        return [1, 2, 3].lazy.flat_map { |x| [x, x] }.each_slice(4).to_a
+        """)
+        assert self.unwrap(space, w_res) == [[1, 1, 2, 2], [3, 3]]
+        w_res = space.execute("""
+        lazy = [:a, :b].lazy.with_index(1)
+        return lazy.to_a, lazy.take(1).to_a, lazy.take(1).to_a
+        """)
+        assert self.unwrap(space, w_res) == [[["a", 1], ["b", 2]], [["a", 1]], [["a", 1]]]
@@ -171,6 +171,16 @@ class TestHashObject(BaseTopazTest):
         w_res = space.execute("return {:a => 2}.size")
         assert space.int_w(w_res) == 1
 
+    def test_inspect(self, space):
+        w_res = space.execute("return {}.inspect")
+        assert space.str_w(w_res) == "{}"
+        w_res = space.execute("""
+        h = {:a => 1, "b" => [2.0]}
+        h[:c] = h
+        return h.to_s
+        """)
+        assert space.str_w(w_res) == '{:a=>1, "b"=>[2.0], :c=>{...}}'
+
     def test_emptyp(self, space):
         w_res = space.execute("return {}.empty?")
         assert w_res is space.w_true
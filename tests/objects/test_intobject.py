@@ -172,6 +172,31 @@ class TestFixnumObject(BaseTopazTest):
         return res
         """)
         assert self.unwrap(space, w_res) == [3, 4, 5, 6]
+        w_res = space.execute("""
+        res = []
+        r = 1.upto(3.5) { |x| res << x }
+        return res, r, 3.upto(1).to_a, 1.upto(3).to_a
+        """)
+        assert self.unwrap(space, w_res) == [[1, 2, 3], 1, [], [1, 2, 3]]
+
+    def test_downto(self, space):
+        w_res = space.execute("""
+        res = []
+        r = 6.downto(3) { |x| res << x }
+        return res, r, 3.downto(1.5).to_a, 1.downto(3).to_a
+        """)
+        assert self.unwrap(space, w_res) == [[6, 5, 4, 3], 6, [3, 2], []]
+
+    def test_times_break(self, space):
+        w_res = space.execute("""
+        res = []
+        x = 10.times do |i|
+          break i * 10 if i == 3
+          res << i
+        end
+        return res, x, 2.times.to_a
+        """)
+        assert self.unwrap(space, w_res) == [[0, 1, 2], 30, [0, 1]]
 
     def test_comparator_lt(self, space):
         w_res = space.execute("return 1 <=> 2")
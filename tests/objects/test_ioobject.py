@@ -1,8 +1,10 @@
 import os
+import socket
 
 import pytest
 
 from topaz.objects.ioobject import W_IOObject
+from topaz.objspace import ObjectSpace
 
 from ..base import BaseTopazTest
 
@@ -126,7 +128,26 @@ class TestIO(BaseTopazTest):
         out, err = capfd.readouterr()
         assert out == "This\nis\n100\npercent\n"
 
+        space.execute("""
+        a = [1, [nil, []]]
+        a << a
+        IO.new(1, 'w').puts(a, [])
+        """)
+        out, err = capfd.readouterr()
+        assert out == "1\n\n\n[...]\n\n"
+
         f = tmpdir.join("file.txt")
+        w_res = space.execute("""
+        f = File.new('%s', 'w')
+        f.sync = true
+        res = [f.write("ab", :c, 1)]
+        f.puts(["x", "y\\n"])
+        f.print("z")
+        f.close
+        return res << File.read('%s')
+        """ % (f, f))
+        assert self.unwrap(space, w_res) == [4, "abc1x\ny\nz"]
+
         with self.raises(space, "IOError", "closed stream"):
             space.execute("""
             io = File.new('%s', "w")
@@ -147,6 +168,153 @@ class TestIO(BaseTopazTest):
             io.flush
             """ % f)
 
+    def test_buffered_write(self, space, tmpdir):
+        f = tmpdir.join("file.txt")
+        w_res = space.execute("""
+        f = File.new('%s', 'w')
+        res = [f.sync]
+        f.write("abc")
+        res << File.read('%s')
+        f.flush
+        res << File.read('%s')
+        f.sync = true
+        f.write("d")
+        res << File.read('%s')
+        f.sync = false
+        f.write("e")
+        f.close
+        res << File.read('%s')
+        return res
+        """ % (f, f, f, f, f))
+        assert self.unwrap(space, w_res) == [False, "", "abc", "abcd", "abcde"]
+
+    def test_buffered_read(self, space, tmpdir):
+        f = tmpdir.join("file.txt")
+        f.write("abcdef")
+        w_res = space.execute("""
+        f = File.new('%s', 'r+')
+        res = [f.getc, f.pos]
+        f.write("X")
+        f.rewind
+        res << f.read
+        f.seek(1)
+        res << f.getc << f.read(2) << f.read
+        f.close
+        return res
+        """ % f)
+        assert self.unwrap(space, w_res) == ["a", 1, "aXcdef", "X", "cd", "ef"]
+
+    def test_closed_files_are_not_kept(self, space, tmpdir):
+        f = tmpdir.join("file.txt")
+        space.flush_io()
+        # Without the test space's flush after execute, which would empty it.
+        ObjectSpace.execute(space, """
+        100.times do
+          File.open('%s', 'w') { |f| f.write "x" }
+          f = File.new('%s', 'w')
+          f.write "y"
+          f.flush
+        end
+        """ % (f, f))
+        assert not space.unflushed_ios_w
+        ObjectSpace.execute(space, """
+        $f = File.new('%s', 'w')
+        $f.write "z"
+        """ % f)
+        assert len(space.unflushed_ios_w) == 1
+        space.execute("$f.close")
+        assert not space.unflushed_ios_w
+        assert f.read() == "z"
+
+    def test_unseekable_read_write(self, space):
+        s1, s2 = socket.socketpair()
+        try:
+            s2.sendall("a\nb\n")
+            w_res = space.execute("""
+            io = IO.new(%d, "r+")
+            res = [io.gets]
+            io.write "x"
+            io.flush
+            res << io.gets
+            io.close
+            return res
+            """ % os.dup(s1.fileno()))
+            assert self.unwrap(space, w_res) == ["a\n", "b\n"]
+            assert s2.recv(10) == "x"
+        finally:
+            s1.close()
+            s2.close()
+
+    def test_gets(self, space, tmpdir):
+        f = tmpdir.join("file.txt")
+        f.write("one\ntwo\n\n\n\nthree\nfour")
+        w_res = space.execute("""
+        f = File.new('%s')
+        res = [f.gets, $_, f.gets(2), f.gets(""), f.gets, f.gets(nil)]
+        res << f.gets << $_
+        return res
+        """ % f)
+        assert self.unwrap(space, w_res) == [
+            "one\n", "one\n", "tw", "o\n\n", "three\n", "four", None, None
+        ]
+
+    def test_gets_separator_across_buffers(self, space, tmpdir):
+        f = tmpdir.join("file.txt")
+        f.write("abc--def--gh")
+        w_res = space.execute("""
+        f = File.new('%s')
+        f.buffer_size = 4
+        res = f.readlines("--")
+        f.rewind
+        res << f.readline("--", 2)
+        return res
+        """ % f)
+        assert self.unwrap(space, w_res) == ["abc--", "def--", "gh", "ab"]
+        with self.raises(space, "EOFError", "end of file reached"):
+            space.execute("File.new('%s').tap(&:read).readline" % f)
+
+    def test_copy_stream(self, space, tmpdir):
+        src = tmpdir.join("src.txt")
+        src.write("0123456789" * 1000)
+        dst = tmpdir.join("dst.txt")
+        w_res = space.execute("""
+        n = IO.copy_stream('%s', '%s')
+        return File.open('%s') do |f|
+          f.read(2)
+          r, w = IO.pipe
+          res = [n, IO.copy_stream(f, w, 5), IO.copy_stream(f, w, 3, 9990), f.read(1)]
+          w.close
+          res << r.read
+        end
+        """ % (src, dst, src))
+        assert self.unwrap(space, w_res) == [10000, 5, 3, "7", "23456012"]
+        assert dst.read() == "0123456789" * 1000
+
+    def test_copy_stream_objects(self, space, tmpdir):
+        src = tmpdir.join("src.txt")
+        src.write("hello world")
+        w_res = space.execute("""
+        class Sink
+          attr_reader :data
+          def initialize; @data = ""; end
+          def write(s); @data << s; s.size; end
+        end
+        sink = Sink.new
+        n = IO.copy_stream('%s', sink, 5)
+        res = [n, sink.data]
+        File.open('%s') do |f|
+          f.read(1)
+          sink = Sink.new
+          res << IO.copy_stream(f, sink, 3, 6) << sink.data << f.read(1)
+        end
+        return res
+        """ % (src, src))
+        assert self.unwrap(space, w_res) == [5, "hello", 3, "wor", "e"]
+
+    def test_stderr_sync(self, space):
+        w_res = space.execute("return $stderr.sync, $stdout.sync")
+        assert self.unwrap(space, w_res) == [True, False]
+
     def test_globals(self, space, capfd):
         w_res = space.execute("""
         STDOUT.puts("STDOUT")
@@ -232,6 +400,15 @@ class TestIO(BaseTopazTest):
         """)
         assert self.unwrap(space, w_res) == [True, True, True, False]
 
+    def test_pipe_round_trip(self, space):
+        w_res = space.execute("""
+        r, w = IO.pipe
+        w.write "x"
+        w.puts "yz"
+        return w.sync, r.read(1), r.gets
+        """)
+        assert self.unwrap(space, w_res) == [True, "x", "yz\n"]
+
     def test_singleton_readlines(self, space, tmpdir):
         tmpdir.join("x.txt").write("abc")
         w_res = space.execute("return IO.readlines('%s')" % tmpdir.join("x.txt"))
@@ -306,7 +483,7 @@ class TestIO(BaseTopazTest):
         res << f2.readlines[0]
         return res
         """ % (f, f))
-        assert self.unwrap(space, w_res) == [content, content, ""]
+        assert self.unwrap(space, w_res) == [content + "\n", content + "\n", None]
 
     def test_reopen_path(self, space, tmpdir):
         content = "This is line one"
@@ -321,7 +498,7 @@ class TestIO(BaseTopazTest):
         res << f.readlines[0]
         return res
         """ % (f, f))
-        assert self.unwrap(space, w_res) == [content, content, ""]
+        assert self.unwrap(space, w_res) == [content + "\n", content + "\n", None]
 
     def test_reopen_with_invalid_arg(self, space):
         with self.raises(space, "TypeError", "can't convert Fixnum into String"):
@@ -0,0 +1,40 @@
+from ..base import BaseTopazTest
+
+
+class TestMappedFileObject(BaseTopazTest):
+    def test_read(self, space, tmpdir):
+        f = tmpdir.join("file.txt")
+        f.write("a" * 100 + "needle" + "b" * 100)
+        w_res = space.execute("""
+        m = Topaz::MappedFile.new('%s')
+        return m.size, m[0, 3], m[100..105], m.index("needle"), m.index("x"), m.to_s.length
+        """ % f)
+        assert self.unwrap(space, w_res) == [206, "aaa", "needle", 100, None, 206]
+
+    def test_copy_on_write(self, space, tmpdir):
+        f = tmpdir.join("file.txt")
+        f.write("hello world")
+        w_res = space.execute("""
+        m = Topaz::MappedFile.new('%s')
+        s = m.to_s
+        s[0] = "j"
+        return s, m.to_s
+        """ % f)
+        assert self.unwrap(space, w_res) == ["jello world", "hello world"]
+
+    def test_close(self, space, tmpdir):
+        f = tmpdir.join("file.txt")
+        f.write("")
+        w_res = space.execute("""
+        m = File.open('%s') { |f| f.mmap }
+        res = [m.size, m.to_s]
+        m.close
+        return res, m.closed?
+        """ % f)
+        assert self.unwrap(space, w_res) == [[0, ""], True]
+        with self.raises(space, "IOError", "closed mapping"):
+            space.execute("""
+            m = Topaz::MappedFile.new('%s')
+            m.close
+            m.size
+            """ % f)
@@ -212,6 +212,34 @@ class TestModuleObject(BaseTopazTest):
         with self.raises(space, "NameError", "uninitialized constant Y::Const"):
             space.execute("Y.const_get :Const, false")
 
+    def test_autoload(self, space, tmpdir):
+        f = tmpdir.join("array.rb")
+        f.write("""
+        $loads += 1
+        module M
+          class Array
+            def self.nested?; true; end
+          end
+        end
+        """)
+        w_res = space.execute("""
+        $loads = 0
+        module M; end
+        M.autoload(:Array, '%s')
+        res = [$loads, M.autoload?(:Array), M.const_defined?(:Array, false)]
+        res << M::Array.nested? << M::Array.nested? << $loads << M.autoload?(:Array)
+        return res
+        """ % f)
+        assert self.unwrap(space, w_res) == [0, str(f), True, True, True, 1, None]
+
+        with self.raises(space, "LoadError"):
+            space.execute("""
+            autoload :Missing, '%s'
+            Missing
+            """ % tmpdir.join("missing"))
+        w_res = space.execute("return Object.autoload?(:Missing)")
+        assert space.str_w(w_res) == str(tmpdir.join("missing"))
+
     def test_method_definedp(self, space):
         w_res = space.execute("""
         class X; def foo; end; end
@@ -84,3 +84,41 @@ class TestRangeObject(BaseTopazTest):
         return r.each {}.equal?(r)
         """)
         assert w_res is space.w_true
+
+    def test_int_range_queries(self, space):
+        w_res = space.execute("""
+        r = (3...8)
+        return [
+          r.size, (5..1).size, ("a".."c").size,
+          r.include?(7), r.include?(8), r === 3, r.cover?(2), r.include?(4.5),
+          r.min, r.max, (5...5).min, (5...5).max,
+          r.sum, (1..100).sum(10), (1..3).sum { |x| x * 2 },
+          r.first, r.first(2), (1..2).first(5), r.to_a, (3..1).to_a,
+        ]
+        """)
+        assert self.unwrap(space, w_res) == [
+            5, 0, None,
+            True, False, True, False, True,
+            3, 7, None, None,
+            25, 5060, 12,
+            3, [3, 4], [1, 2], [3, 4, 5, 6, 7], [],
+        ]
+
+    def test_int_range_bounds(self, space):
+        w_res = space.execute("""
+        max = 2 ** 62 - 1 + 2 ** 62
+        res = []
+        ((max - 2)..max).each { |x| res << x - max }
+        return res, ((max - 1)..max).step(5).to_a.size, (-max..max).size > max
+        """)
+        assert self.unwrap(space, w_res) == [[-2, -1, 0], 1, True]
+
+    def test_step(self, space):
+        w_res = space.execute("""
+        res = []
+        (1..10).step(3) { |x| res << x }
+        return res, (1.0..2.0).step(0.5).to_a, ("a".."e").step(2).to_a, (1...10).step(3).to_a
+        """)
+        assert self.unwrap(space, w_res) == [[1, 4, 7, 10], [1.0, 1.5, 2.0], ["a", "c", "e"], [1, 4, 7]]
+        with self.raises(space, "ArgumentError", "step can't be 0"):
+            space.execute("(1..2).step(0) { }")
@@ -90,6 +90,20 @@ class TestStringObject(BaseTopazTest):
         """)
         assert self.unwrap(space, w_res) == ["e", "llo", "ll", "er", "her", "her", "", None]
 
+    def test_subscript_shared(self, space):
+        w_res = space.execute("""
+        a = "abcd" * 100
+        b = a[10..-1]
+        c = b[5, 200]
+        b << "x"
+        c.upcase!
+        return [
+          a.length, b.length, b[-2..-1], c.length, c[0, 3], a[15, 3],
+          a[10..-1].hash == (a[10..-1] + "").hash,
+        ]
+        """)
+        assert self.unwrap(space, w_res) == [400, 391, "dx", 200, "DAB", "dab", True]
+
     def test_comparator_lt(self, space):
         w_res = space.execute("return 'a' <=> 'b'")
         assert space.int_w(w_res) == -1
@@ -128,6 +142,25 @@ class TestStringObject(BaseTopazTest):
         """)
         h1, h2 = self.unwrap(space, w_res)
         assert h1 == h2
+        w_res = space.execute("""
+        a = 'ab'
+        h1 = a.hash
+        a << 'c'
+        return [h1 == 'ab'.hash, a.hash == 'abc'.hash, ''.hash == ('a' << '').slice(1, 0).hash]
+        """)
+        assert self.unwrap(space, w_res) == [True, True, True]
+
+    def test_freeze(self, space):
+        w_res = space.execute("""
+        a = ('a' << 'b').freeze
+        b = 'ab'.dup.freeze
+        h = {'ab' => 1}
+        return [a.frozen?, a == b, a.hash == 'ab'.hash, h[a], h[b]]
+        """)
+        assert self.unwrap(space, w_res) == [True, True, True, 1, 1]
+        a = space.execute("return ('x' << 'y').freeze")
+        b = space.execute("return 'xy'.dup.freeze")
+        assert a.str_w(space) is b.str_w(space)
 
     def test_to_sym(self, space):
         w_res = space.execute("return 'abc'.to_sym")
@@ -503,6 +536,28 @@ class TestStringObject(BaseTopazTest):
         return 'helloo'.gsub("l", Hash.new { |h, k| replacements.pop() })
         """)
         assert space.str_w(w_res) == "he21oo"
+        w_res = space.execute("""
+        return 'foo'.gsub("foo", "bar")
+        """)
+        assert space.str_w(w_res) == "bar"
+        w_res = space.execute("""
+        return 'abab'.gsub("ab", "-")
+        """)
+        assert space.str_w(w_res) == "--"
+        w_res = space.execute("""
+        return 'ab'.gsub("", "-")
+        """)
+        assert space.str_w(w_res) == "-a-b-"
+
+    def test_gsub_reuses_pattern(self, space):
+        w_res = space.execute("""
+        pattern = "ab"
+        res = ["xaby".gsub(pattern, "-")]
+        pattern << "c"
+        res << "xabcy".gsub(pattern, "-") << "xabcy".index(pattern)
+        return res
+        """)
+        assert self.unwrap(space, w_res) == ["x-y", "x-y", 1]
 
     def test_sub(self, space):
         w_res = space.execute("""
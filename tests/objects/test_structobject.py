@@ -0,0 +1,78 @@
+from ..base import BaseTopazTest
+
+
+class TestStructObject(BaseTopazTest):
+    def test_accessors(self, space):
+        w_res = space.execute("""
+        Point = Struct.new(:x, :y)
+        p = Point.new(1)
+        p.y = 5
+        p.x += 1
+        return p.x, p.y, p.size, p.to_a, p.members, p.instance_variables
+        """)
+        assert self.unwrap(space, w_res) == [2, 5, 2, [2, 5], ["x", "y"], []]
+
+    def test_too_many_args(self, space):
+        with self.raises(space, "ArgumentError", "Expected 1, got 2"):
+            space.execute("Struct.new(:a).new(1, 2)")
+
+    def test_accessor_arity(self, space):
+        w_res = space.execute("""
+        S = Struct.new(:a)
+        return S.instance_method(:a).arity, S.instance_method(:a=).arity
+        """)
+        assert self.unwrap(space, w_res) == [0, 1]
+        with self.raises(space, "ArgumentError", "wrong number of arguments (1 for 0)"):
+            space.execute("Struct.new(:a).new(1).a(2)")
+
+    def test_subscript(self, space):
+        w_res = space.execute("""
+        s = Struct.new(:a, :b, :c).new(1, 2, 3)
+        s[:a] = 10
+        s["b"] = 20
+        s[-1] = 30
+        return s[0], s[:b], s["c"], s.values_at(0, 2)
+        """)
+        assert self.unwrap(space, w_res) == [10, 20, 30, [10, 30]]
+        with self.raises(space, "NameError", "no member 'd' in struct"):
+            space.execute("Struct.new(:a).new(1)[:d]")
+        with self.raises(space, "IndexError", "offset 1 too large for struct(size:1)"):
+            space.execute("Struct.new(:a).new(1)[1]")
+
+    def test_equality(self, space):
+        w_res = space.execute("""
+        S = Struct.new(:a, :b)
+        T = Struct.new(:a, :b)
+        return [
+          S.new(1, "x") == S.new(1, "x"), S.new(1, "x") == T.new(1, "x"),
+          S.new(1, 2) == S.new(1, 2.0), S.new(1, 2).eql?(S.new(1, 2.0)),
+          S.new(1, "x").hash == S.new(1, "x").hash, {S.new(1, 2) => 3}[S.new(1, 2)],
+        ]
+        """)
+        assert self.unwrap(space, w_res) == [True, False, True, False, True, 3]
+
+    def test_dup_and_frozen(self, space):
+        w_res = space.execute("""
+        s = Struct.new(:a).new(1)
+        d = s.dup
+        d.a = 2
+        return s.a, d.a, s.inspect
+        """)
+        assert self.unwrap(space, w_res) == [1, 2, "#<struct a=1>"]
+        with self.raises(space, "RuntimeError"):
+            space.execute("Struct.new(:a).new(1).freeze.a = 2")
+
+    def test_subclass(self, space):
+        w_res = space.execute("""
+        class Pair < Struct.new(:left, :right)
+          def initialize(left, right = left)
+            super
+          end
+
+          def sum
+            left + right
+          end
+        end
+        return Pair.new(3).sum, Pair.new(1, 2).to_a
+        """)
+        assert self.unwrap(space, w_res) == [6, [1, 2]]
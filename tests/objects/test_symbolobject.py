@@ -46,6 +46,27 @@ class TestSymbolObject(BaseTopazTest):
     def test_to_proc(self, space):
         w_res = space.execute("return :+.to_proc.call(2, 3)")
         assert space.int_w(w_res) == 5
+        w_res = space.execute("return :to_s.to_proc.equal?(:to_s.to_proc), :to_s.to_proc.lambda?")
+        assert self.unwrap(space, w_res) == [True, True]
+        w_res = space.execute("""
+        return [1, 2, 3].map(&:to_s), [[1, 2], [3, 4]].map(&:first)
+        """)
+        assert self.unwrap(space, w_res) == [["1", "2", "3"], [1, 3]]
+        w_res = space.execute("return :map.to_proc.call([1, 2]) { |x| x * 2 }")
+        assert self.unwrap(space, w_res) == [2, 4]
+        with self.raises(space, "ArgumentError"):
+            space.execute(":to_s.to_proc.call")
+
+    def test_to_proc_redefined(self, space):
+        w_res = space.execute("""
+        class Symbol
+          def to_proc
+            proc { |x| x * 10 }
+          end
+        end
+        return [1, 2].map(&:to_s)
+        """)
+        assert self.unwrap(space, w_res) == [10, 20]
 
     def test_succ(self, space):
         w_res = space.execute('return :abcd.succ')
@@ -1,8 +1,9 @@
+import json
 import os
 import platform
 import subprocess
 
-from topaz.main import _entry_point
+from topaz.main import _entry_point, startup_profile_target
 
 
 class TestMain(object):
@@ -318,3 +319,74 @@ class TestMain(object):
         self.run(space, tmpdir, None, ruby_args=[str(tmpdir.join("t.rb"))], status=1)
         out, err = capfd.readouterr()
         assert err == "No such file or directory -- %s (LoadError)\n" % tmpdir.join("t.rb")
+
+    def test_startup_profile_target(self, monkeypatch):
+        monkeypatch.delenv("TOPAZ_STARTUP_PROFILE", raising=False)
+        assert startup_profile_target(["topaz", "t.rb"]) is None
+        assert startup_profile_target(["topaz", "--startup-profile", "t.rb"]) == "-"
+        assert startup_profile_target(["topaz", "-r", "x", "--startup-profile=p.json"]) == "p.json"
+        assert startup_profile_target(["topaz", "t.rb", "--startup-profile"]) is None
+        monkeypatch.setenv("TOPAZ_STARTUP_PROFILE", "-")
+        assert startup_profile_target(["topaz", "t.rb"]) == "-"
+
+    def test_startup_profile(self, space, tmpdir, capfd):
+        profile = tmpdir.join("profile.json")
+        space.startup_profile.configure(str(profile))
+        self.run(space, tmpdir, "puts 5", ruby_args=["--startup-profile=%s" % profile])
+        out, err = capfd.readouterr()
+        assert out == "5\n"
+        entries = json.loads(profile.read())["entries"]
+        assert [(e["kind"], e["depth"]) for e in entries] == [("parse", 0), ("compile", 0)]
+        assert not space.startup_profile.enabled
+
+    def test_line_loop(self, space, tmpdir, capfd):
+        f = tmpdir.join("input.txt")
+        f.write("a b\n  c d e\n")
+        self.run(space, tmpdir, None, ruby_args=["-ne", "print $_.upcase"], argv=[str(f)])
+        out, err = capfd.readouterr()
+        assert out == "A B\n  C D E\n"
+        self.run(space, tmpdir, None, ruby_args=["-lane", "print $F.size, $F[0]"], argv=[str(f), str(f)])
+        out, err = capfd.readouterr()
+        assert out == "2a\n3c\n2a\n3c\n"
+
+    def test_line_loop_field_separator(self, space, tmpdir, capfd):
+        f = tmpdir.join("input.txt")
+        f.write("a:b::\nc:d\n")
+        self.run(space, tmpdir, None, ruby_args=["-F:", "-lane", "print $F.inspect"], argv=[str(f)])
+        out, err = capfd.readouterr()
+        assert out == '["a", "b"]\n["c", "d"]\n'
+        self.run(space, tmpdir, None, ruby_args=["-F[bd]", "-ane", "puts $F.first"], argv=[str(f)])
+        out, err = capfd.readouterr()
+        assert out == "a:\nc:\n"
+        f.write("  a  b\tc \n")
+        self.run(space, tmpdir, None, ruby_args=["-F ", "-lane", "print $F.inspect"], argv=[str(f)])
+        out, err = capfd.readouterr()
+        assert out == '["a", "b", "c"]\n'
+
+    def test_line_loop_in_place(self, space, tmpdir, capfd):
+        f = tmpdir.join("input.txt")
+        f.write("one\ntwo\n")
+        self.run(space, tmpdir, None, ruby_args=["-pi.bak", "-e", "$_ = $_.upcase"], argv=[str(f)])
+        out, err = capfd.readouterr()
+        assert not out
+        assert f.read() == "ONE\nTWO\n"
+        assert tmpdir.join("input.txt.bak").read() == "one\ntwo\n"
+        assert sorted(p.basename for p in tmpdir.listdir()) == ["input.txt", "input.txt.bak"]
+
+    def test_record_separator(self, space, tmpdir, capfd):
+        f = tmpdir.join("input.txt")
+        f.write("a\nb\n\n\nc\n")
+        self.run(space, tmpdir, None, ruby_args=["-00", "-ne", "puts $_.inspect"], argv=[str(f)])
+        out, err = capfd.readouterr()
+        assert out == '"a\\nb\\n\\n"\n"c\\n"\n'
+        self.run(space, tmpdir, None, ruby_args=["-0777", "-ne", "puts $_.size"], argv=[str(f)])
+        out, err = capfd.readouterr()
+        assert out == "8\n"
+
+    def test_bundled_switches_after_long_option(self, space, tmpdir, capfd):
+        f = tmpdir.join("input.txt")
+        f.write("a b\n")
+        space.startup_profile.configure(str(tmpdir.join("profile.json")))
+        self.run(space, tmpdir, None, ruby_args=["--startup-profile", "-lane", "print $F[1]"], argv=[str(f)])
+        out, err = capfd.readouterr()
+        assert out == "b\n"
@@ -0,0 +1,20 @@
+from topaz.utils.search import (make_searcher, EmptySearcher, CharSearcher,
+    HorspoolSearcher)
+
+
+class TestSearch(object):
+    def test_make_searcher(self):
+        assert isinstance(make_searcher(""), EmptySearcher)
+        assert isinstance(make_searcher("a"), CharSearcher)
+        assert isinstance(make_searcher("ab"), HorspoolSearcher)
+
+    def test_find(self):
+        haystacks = ["", "a", "abcabcab", "aaaaab", "xabababx", "cabbage"]
+        needles = ["", "a", "b", "ab", "bab", "abc", "aab", "bage", "cabbages"]
+        for haystack in haystacks:
+            for needle in needles:
+                searcher = make_searcher(needle)
+                for start in xrange(len(haystack) + 2):
+                    for end in xrange(len(haystack) + 2):
+                        assert searcher.find(haystack, start, end) == haystack.find(needle, start, end)
+                        assert searcher.rfind(haystack, start, end) == haystack.rfind(needle, start, end)
@@ -11,6 +11,7 @@ from topaz.objects.functionobject import W_FunctionObject
 from topaz.objects.moduleobject import W_ModuleObject
 from topaz.objects.objectobject import W_Root
 from topaz.objects.procobject import W_ProcObject
+from topaz.objects.symbolobject import W_SymbolObject
 from topaz.scope import StaticScope
 from topaz.utils.regexp import RegexpError
 
@@ -431,6 +432,8 @@ class Interpreter(object):
             frame.push(w_block)
         elif isinstance(w_block, W_ProcObject):
             frame.push(w_block)
+        elif isinstance(w_block, W_SymbolObject) and space.has_builtin_method(w_block, "to_proc", space.w_symbol):
+            frame.push(w_block.to_proc(space))
         elif space.respond_to(w_block, "to_proc"):
             space.getexecutioncontext().last_instr = pc
             # Proc implements to_proc, too, but MRI doesn't call it
@@ -7,25 +7,28 @@ from rpython.rlib import jit
 from rpython.rlib.objectmodel import specialize
 from rpython.rlib.streamio import open_file_as_stream, fdopen_as_stream
 
-from topaz.error import RubyError, print_traceback
+from topaz.coerce import Coerce
+from topaz.error import RubyError, error_for_oserror, print_traceback
 from topaz.objects.exceptionobject import W_SystemExit
+from topaz.objects.ioobject import W_IOObject
 from topaz.objspace import ObjectSpace
 from topaz.system import IS_WINDOWS, IS_64BIT
+from topaz.utils.ll_file import O_BINARY, fchmod
 
 
 USAGE = "\n".join([
     """Usage: topaz [switches] [--] [programfile] [arguments]""",
-    # """  -0[octal]       specify record separator (\0, if no argument)""",
-    # """  -a              autosplit mode with -n or -p (splits $_ into $F)""",
+    """  -0[octal]       specify record separator (\\0, if no argument)""",
+    """  -a              autosplit mode with -n or -p (splits $_ into $F)""",
     # """  -c              check syntax only""",
     # """  -Cdirectory     cd to directory, before executing your script""",
     """  -d              set debugging flags (set $DEBUG to true)""",
     """  -e 'command'    one line of script. Several -e's allowed. Omit [programfile]""",
     # """  -Eex[:in]       specify the default external and internal character encodings""",
-    # """  -Fpattern       split() pattern for autosplit (-a)""",
-    # """  -i[extension]   edit ARGV files in place (make backup if extension supplied)""",
+    """  -Fpattern       split() pattern for autosplit (-a)""",
+    """  -i[extension]   edit ARGV files in place (make backup if extension supplied)""",
     """  -Idirectory     specify $LOAD_PATH directory (may be used more than once)""",
-    # """  -l              enable line ending processing""",
+    """  -l              enable line ending processing""",
     """  -n              assume 'while gets(); ... end' loop around your script""",
     """  -p              assume loop like -n but print line also like sed""",
     """  -rlibrary       require the library, before executing your script""",
@@ -38,6 +41,8 @@ USAGE = "\n".join([
     # """  -x[directory]   strip off text before #!ruby line and perhaps cd to directory""",
     """  --copyright     print the copyright""",
     """  --version       print the version""",
+    """  --startup-profile[=file]""",
+    """                  report the time spent starting up on stderr, or as JSON to file""",
     ""
 ])
 COPYRIGHT = "topaz - Copyright (c) Alex Gaynor and individual contributors\n"
@@ -62,11 +67,274 @@ def get_topaz_config_options():
 def create_entry_point(config):
     def entry_point(argv):
         space = getspace(config)
-        space.setup(argv[0])
+        space.startup_profile.configure(startup_profile_target(argv))
+        with space.startup_profile.measure("phase", "setup"):
+            space.setup(argv[0])
         return _entry_point(space, argv)
     return entry_point
 
 
+def startup_profile_target(argv):
+    """
+    Where --startup-profile or TOPAZ_STARTUP_PROFILE asks for the startup
+    profile to go: "-" for stderr, a JSON file's path, or None.
+    """
+    idx = 1
+    while idx < len(argv):
+        arg = argv[idx]
+        if arg == "--startup-profile":
+            return "-"
+        elif arg.startswith("--startup-profile="):
+            return arg[len("--startup-profile="):]
+        elif arg == "-e" or arg == "-I" or arg == "-r":
+            idx += 1
+        elif arg == "--" or not arg.startswith("-"):
+            break
+        idx += 1
+    return os.environ.get("TOPAZ_STARTUP_PROFILE")
+
+
+# Switches that take no argument, and so may be bundled with the ones that
+# follow them, as in -lane or -pi.bak.
+BUNDLED_SWITCHES = "adlnpsSvw"
+LINE_LOOP_BUFFER_SIZE = 64 * 1024
+
+
+def _expand_switches(argv):
+    """
+    Splits bundled switches like -lane into -l -a -n -e, up to the program
+    file or a bare --.
+    """
+    res = [argv[0]]
+    idx = 1
+    while idx < len(argv):
+        arg = argv[idx]
+        if arg == "--startup-profile" or arg.startswith("--startup-profile="):
+            res.append(arg)
+            idx += 1
+            continue
+        if arg == "--" or arg == "-" or not arg.startswith("-") or arg.startswith("--"):
+            break
+        while len(arg) > 2 and arg[1] in BUNDLED_SWITCHES:
+            res.append(arg[:2])
+            arg = "-" + arg[2:]
+        res.append(arg)
+        if (arg == "-e" or arg == "-I" or arg == "-r") and idx + 1 < len(argv):
+            idx += 1
+            res.append(argv[idx])
+        idx += 1
+    while idx < len(argv):
+        res.append(argv[idx])
+        idx += 1
+    return res
+
+
+def _parse_record_separator(space, digits):
+    """
+    The $/ that -0 followed by digits (in octal) asks for: NUL if there are
+    none, paragraph mode for -00, nil for 0400 and above, and otherwise the
+    character with that code.
+    """
+    if not digits:
+        return space.newstr_fromstr("\0")
+    code = 0
+    for ch in digits:
+        if not "0" <= ch <= "7":
+            raise CommandLineError("invalid octal record separator -0%s (RuntimeError)\n" % digits)
+        code = code * 8 + (ord(ch) - ord("0"))
+        if code > 0777:
+            code = 0777
+    if code == 0:
+        return space.newstr_fromstr("")
+    elif code >= 0400:
+        return space.w_nil
+    return space.newstr_fromstr(chr(code))
+
+
+def _is_plain_pattern(pattern):
+    for ch in pattern:
+        if ch in ".*+?()[]{}^$|\\":
+            return False
+    return True
+
+
+def chomp_line(line, sep):
+    if sep is None:
+        return line
+    end = len(line)
+    if sep == "\n" or not sep:
+        while end > 0 and line[end - 1] == "\n":
+            end -= 1
+            if end > 0 and line[end - 1] == "\r":
+                end -= 1
+            if sep:
+                break
+    elif line.endswith(sep):
+        end -= len(sep)
+    assert end >= 0
+    return line[:end]
+
+
+def split_fields(line):
+    """
+    Splits line on runs of whitespace, ignoring leading whitespace, like awk
+    and String#split with no pattern.
+    """
+    fields = []
+    start = -1
+    for i in range(len(line)):
+        if line[i] in " \t\n\v\f\r":
+            if start >= 0:
+                fields.append(line[start:i])
+                start = -1
+        elif start < 0:
+            start = i
+    if start >= 0:
+        fields.append(line[start:])
+    return fields
+
+
+class LineLoop(object):
+    """
+    The loop -n and -p put around the program, which runs it once for each
+    line of the files named in ARGV (or of stdin), read through a buffered
+    reader rather than Kernel#gets. -a splits each line into $F, -l chomps
+    it, and -i sends $stdout to a temporary file that replaces each input
+    file once it has been read to the end.
+    """
+
+    def __init__(self):
+        self.print_lines = False
+        self.autosplit = False
+        self.chomp = False
+        self.field_sep = None
+        self.w_field_regexp = None
+        self.in_place_ext = None
+
+    def run(self, space, frame, bc):
+        if self.field_sep is not None and not _is_plain_pattern(self.field_sep):
+            self.w_field_regexp = space.newregexp(self.field_sep, 0)
+        w_argv = space.find_const(space.w_object, "ARGV")
+        if not space.listview(w_argv):
+            w_stdin = space.globals.get(space, "$stdin")
+            if not isinstance(w_stdin, W_IOObject):
+                w_stdin = W_IOObject(space)
+                w_stdin.fd = 0
+            space.globals.set(space, "$FILENAME", space.newstr_fromstr("-"))
+            self.run_lines(space, frame, bc, w_stdin)
+            return
+        while True:
+            w_path = space.send(w_argv, "shift")
+            if w_path is space.w_nil:
+                break
+            path = Coerce.path(space, w_path)
+            space.globals.set(space, "$FILENAME", space.newstr_fromstr(path))
+            w_input = self.open_input(space, path)
+            try:
+                if self.in_place_ext is None:
+                    self.run_lines(space, frame, bc, w_input)
+                else:
+                    self.edit_in_place(space, frame, bc, w_input, path)
+            finally:
+                w_input.method_close(space)
+
+    def open_input(self, space, path):
+        try:
+            fd = os.open(path, os.O_RDONLY | O_BINARY, 0)
+        except OSError as e:
+            raise error_for_oserror(space, e)
+        w_input = W_IOObject(space)
+        w_input.fd = fd
+        w_input.buffer_size = LINE_LOOP_BUFFER_SIZE
+        return w_input
+
+    def edit_in_place(self, space, frame, bc, w_input, path):
+        tmp_path = "%s.topaz-%d" % (path, os.getpid())
+        try:
+            mode = os.fstat(w_input.fd).st_mode & 07777
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | O_BINARY, 0600)
+        except OSError as e:
+            raise error_for_oserror(space, e)
+        if not IS_WINDOWS:
+            try:
+                fchmod(fd, mode)
+            except OSError as e:
+                os.close(fd)
+                LineLoop.discard(tmp_path)
+                raise error_for_oserror(space, e)
+        w_output = W_IOObject(space)
+        w_output.fd = fd
+        w_output.buffer_size = LINE_LOOP_BUFFER_SIZE
+        w_stdout = space.globals.get(space, "$stdout")
+        space.globals.set(space, "$stdout", w_output)
+        space.globals.set(space, "$>", w_output)
+        try:
+            try:
+                self.run_lines(space, frame, bc, w_input)
+            finally:
+                space.globals.set(space, "$stdout", w_stdout)
+                space.globals.set(space, "$>", w_stdout)
+                if w_output.fd >= 0:
+                    w_output.method_close(space)
+        except RubyError:
+            LineLoop.discard(tmp_path)
+            raise
+        try:
+            if self.in_place_ext:
+                backup_path = path + self.in_place_ext
+                try:
+                    os.unlink(backup_path)
+                except OSError:
+                    pass
+                os.link(path, backup_path)
+            os.rename(tmp_path, path)
+        except OSError as e:
+            LineLoop.discard(tmp_path)
+            raise error_for_oserror(space, e)
+
+    @staticmethod
+    def discard(tmp_path):
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+    def run_lines(self, space, frame, bc, w_input):
+        while True:
+            sep, _ = W_IOObject.getline_args(space, None, None)
+            line = w_input.getline(space, sep, -1)
+            if line is None:
+                break
+            if self.chomp:
+                line = chomp_line(line, sep)
+            w_line = space.newstr_fromstr(line)
+            space.globals.set(space, "$_", w_line)
+            if self.autosplit:
+                space.globals.set(space, "$F", self.split(space, w_line, line))
+            with space.getexecutioncontext().visit_frame(frame):
+                space.execute_frame(frame, bc)
+            if self.print_lines:
+                w_last = space.globals.get(space, "$_")
+                args_w = [space.w_nil if w_last is None else w_last]
+                w_stdout = space.globals.get(space, "$stdout")
+                if isinstance(w_stdout, W_IOObject) and space.has_builtin_method(w_stdout, "print", space.w_io):
+                    w_stdout.method_print(space, args_w)
+                else:
+                    space.send(w_stdout, "print", args_w)
+
+    def split(self, space, w_line, line):
+        if self.w_field_regexp is not None:
+            return space.send(w_line, "split", [self.w_field_regexp])
+        # As with String#split, a single space means splitting on whitespace.
+        if self.field_sep and self.field_sep != " ":
+            fields = line.split(self.field_sep)
+            while fields and not fields[-1]:
+                fields.pop()
+        else:
+            fields = split_fields(line)
+        return space.newarray([space.newstr_fromstr(field) for field in fields])
+
+
 class CommandLineError(Exception):
     def __init__(self, message):
         self.message = message
@@ -78,6 +346,7 @@ class ShortCircuitError(Exception):
 
 
 def _parse_argv(space, argv):
+    argv = _expand_switches(argv)
     flag_globals_w = {
         "$-v": space.w_false,
         "$VERBOSE": space.w_false,
@@ -91,6 +360,8 @@ def _parse_argv(space, argv):
     }
     warning_level = None
     do_loop = False
+    line_loop = LineLoop()
+    w_record_sep = None
     path = None
     search_path = False
     globalize_switches = False
@@ -151,7 +422,25 @@ def _parse_argv(space, argv):
             do_loop = True
         elif arg == "-p":
             do_loop = True
+            line_loop.print_lines = True
             flag_globals_w["$-p"] = space.w_true
+        elif arg == "-a":
+            line_loop.autosplit = True
+            flag_globals_w["$-a"] = space.w_true
+        elif arg == "-l":
+            line_loop.chomp = True
+            flag_globals_w["$-l"] = space.w_true
+        elif arg.startswith("-F"):
+            line_loop.field_sep = arg[2:]
+            flag_globals_w["$;"] = space.newstr_fromstr(arg[2:])
+        elif arg.startswith("-i"):
+            line_loop.in_place_ext = arg[2:]
+            flag_globals_w["$-i"] = space.newstr_fromstr(arg[2:])
+        elif arg.startswith("-0"):
+            w_record_sep = _parse_record_separator(space, arg[2:])
+            flag_globals_w["$/"] = w_record_sep
+        elif arg == "--startup-profile" or arg.startswith("--startup-profile="):
+            pass
         elif arg == "--":
             idx += 1
             break
@@ -180,9 +469,13 @@ def _parse_argv(space, argv):
 
         flag_globals_w["$-W"] = space.newint(warning_level_num)
 
+    if line_loop.chomp:
+        # -l also ends what print writes with the record separator.
+        flag_globals_w["$\\"] = space.newstr_fromstr("\n") if w_record_sep is None else w_record_sep
+
     return (
         flag_globals_w,
-        do_loop,
+        line_loop if do_loop else None,
         path,
         search_path,
         globalized_switches,
@@ -214,7 +507,7 @@ def _entry_point(space, argv):
     try:
         (
             flag_globals_w,
-            do_loop,
+            line_loop,
             path,
             search_path,
             globalized_switches,
@@ -237,11 +530,12 @@ def _entry_point(space, argv):
             [space.newstr_fromstr(path_entry)]
         )
     for required_lib in reqs:
-        space.send(
-            space.w_kernel,
-            "require",
-            [space.newstr_fromstr(required_lib)]
-        )
+        with space.startup_profile.measure("require", required_lib):
+            space.send(
+                space.w_kernel,
+                "require",
+                [space.newstr_fromstr(required_lib)]
+            )
 
     space.set_const(space.w_object, "ARGV", space.newarray(argv_w))
     explicitly_verbose = space.is_true(flag_globals_w["$-v"])
@@ -297,20 +591,18 @@ def _entry_point(space, argv):
     explicit_status = False
     jit.set_param(None, "trace_limit", 10000)
     try:
-        if do_loop:
-            print_after = space.is_true(flag_globals_w["$-p"])
+        if line_loop is not None:
             bc = space.compile(source, path)
+            space.startup_profile.report()
             frame = space.create_frame(bc)
-            while True:
-                w_line = space.send(space.w_kernel, "gets")
-                if w_line is space.w_nil:
-                    break
-                with space.getexecutioncontext().visit_frame(frame):
-                    w_res = space.execute_frame(frame, bc)
-                    if print_after:
-                        space.send(space.w_kernel, "print", [w_res])
+            line_loop.run(space, frame, bc)
         else:
-            space.execute(source, filepath=path)
+            bc = space.compile(source, path)
+            # Startup is over once the program is ready to run.
+            space.startup_profile.report()
+            frame = space.create_frame(bc)
+            with space.getexecutioncontext().visit_frame(frame):
+                space.execute_frame(frame, bc)
     except RubyError as e:
         explicit_status = True
         w_exc = e.w_value
@@ -319,7 +611,9 @@ def _entry_point(space, argv):
         else:
             w_exit_error = w_exc
             status = 1
+    space.startup_profile.report()
     exit_handler_status = space.run_exit_handlers()
+    space.flush_io()
     if not explicit_status and exit_handler_status != -1:
         status = exit_handler_status
     if w_exit_error is not None:
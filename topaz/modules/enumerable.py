@@ -1,7 +1,470 @@
 from __future__ import absolute_import
 
 from topaz.module import ModuleDef
+from topaz.utils.ordereddict import OrderedDict
+
+
+class NativeIterator(object):
+    def next(self, space):
+        """
+        Returns the next element, or None once the collection is exhausted.
+        """
+        raise NotImplementedError
+
+
+class ArrayIterator(NativeIterator):
+    def __init__(self, w_array):
+        self.w_array = w_array
+        self.index = 0
+
+    def next(self, space):
+        # Like Array#each, this sees elements appended by the block.
+        items_w = self.w_array.listview(space)
+        if self.index >= len(items_w):
+            return None
+        w_item = items_w[self.index]
+        self.index += 1
+        return w_item
+
+
+class HashIterator(NativeIterator):
+    def __init__(self, keys_w, values_w):
+        self.keys_w = keys_w
+        self.values_w = values_w
+        self.index = 0
+
+    def next(self, space):
+        if self.index >= len(self.keys_w):
+            return None
+        w_pair = space.newarray([self.keys_w[self.index], self.values_w[self.index]])
+        self.index += 1
+        return w_pair
+
+
+class FixnumRangeIterator(NativeIterator):
+    def __init__(self, first, last):
+        self.current = first
+        self.last = last
+        self.exhausted = first > last
+
+    def next(self, space):
+        if self.exhausted:
+            return None
+        i = self.current
+        if i == self.last:
+            self.exhausted = True
+        else:
+            self.current = i + 1
+        return space.newint(i)
+
+
+class StringCharIterator(NativeIterator):
+    def __init__(self, s):
+        self.s = s
+        self.index = 0
+
+    def next(self, space):
+        if self.index >= len(self.s):
+            return None
+        c = self.s[self.index]
+        self.index += 1
+        return space.newstr_fromstr(c)
+
+
+class StringByteIterator(NativeIterator):
+    def __init__(self, s):
+        self.s = s
+        self.index = 0
+
+    def next(self, space):
+        if self.index >= len(self.s):
+            return None
+        c = self.s[self.index]
+        self.index += 1
+        return space.newint(ord(c))
+
+
+def has_stock_method(space, w_obj, w_cls, name):
+    return space.getclass(w_obj).find_method(space, name) is w_cls.find_method(space, name)
+
+
+def has_stock_each(space, w_obj, w_cls):
+    return has_stock_method(space, w_obj, w_cls, "each")
+
+
+def native_iterator(space, w_obj):
+    """
+    Returns a NativeIterator over the elements w_obj.each would yield, or None
+    if w_obj isn't a builtin collection with its stock each.
+    """
+    from topaz.objects.arrayobject import W_ArrayObject
+    from topaz.objects.hashobject import W_HashObject
+    from topaz.objects.rangeobject import W_RangeObject
+
+    if isinstance(w_obj, W_ArrayObject):
+        if has_stock_each(space, w_obj, space.w_array):
+            return ArrayIterator(w_obj)
+    elif isinstance(w_obj, W_HashObject):
+        if has_stock_each(space, w_obj, space.w_hash):
+            return HashIterator(
+                w_obj.strategy.keys(w_obj.dict_storage),
+                w_obj.strategy.values(w_obj.dict_storage)
+            )
+    elif isinstance(w_obj, W_RangeObject):
+        if w_obj.int_range and has_stock_each(space, w_obj, space.getclassfor(W_RangeObject)):
+            return FixnumRangeIterator(w_obj.int_first, w_obj.int_last)
+    return None
 
 
 class Enumerable(object):
     moduledef = ModuleDef("Enumerable")
+
+    # Array, Hash and Range get these instead of the generic versions in
+    # lib-topaz/enumerable.rb: they walk the storage directly and pass each
+    # element straight to the block, rather than going through each_entry.
+    # Receivers with their own each (and calls that need an Enumerator) go
+    # to the Ruby implementation.
+    nativedef = ModuleDef("Enumerable")
+
+    @staticmethod
+    def include_native_methods(classdef, exclude=[]):
+        for name, (method, argspec) in Enumerable.nativedef.methods.iteritems():
+            if name not in exclude:
+                classdef.methods[name] = (method, argspec)
+
+    @staticmethod
+    def send_generic(space, w_obj, name, args_w, block):
+        w_method = space.getmoduleobject(Enumerable.moduledef).find_method(space, name)
+        return w_method.call(space, w_obj, args_w, block)
+
+    @nativedef.method("map")
+    @nativedef.method("collect")
+    def method_map(self, space, block):
+        it = native_iterator(space, self)
+        if it is None or block is None:
+            return Enumerable.send_generic(space, self, "map", [], block)
+        result_w = []
+        w_item = it.next(space)
+        while w_item is not None:
+            result_w.append(space.invoke_block(block, [w_item]))
+            w_item = it.next(space)
+        return space.newarray(result_w)
+
+    @nativedef.method("flat_map")
+    @nativedef.method("collect_concat")
+    def method_flat_map(self, space, block):
+        it = native_iterator(space, self)
+        if it is None or block is None:
+            return Enumerable.send_generic(space, self, "flat_map", [], block)
+        result_w = []
+        w_item = it.next(space)
+        while w_item is not None:
+            w_res = space.invoke_block(block, [w_item])
+            if space.is_kind_of(w_res, space.w_array) or space.respond_to(w_res, "to_ary"):
+                w_ary = space.convert_type(w_res, space.w_array, "to_ary")
+                result_w.extend(space.listview(w_ary))
+            else:
+                result_w.append(w_res)
+            w_item = it.next(space)
+        return space.newarray(result_w)
+
+    @nativedef.method("select")
+    @nativedef.method("find_all")
+    def method_select(self, space, block):
+        it = native_iterator(space, self)
+        if it is None or block is None:
+            return Enumerable.send_generic(space, self, "select", [], block)
+        result_w = []
+        w_item = it.next(space)
+        while w_item is not None:
+            if space.is_true(space.invoke_block(block, [w_item])):
+                result_w.append(w_item)
+            w_item = it.next(space)
+        return space.newarray(result_w)
+
+    @nativedef.method("reject")
+    def method_reject(self, space, block):
+        it = native_iterator(space, self)
+        if it is None or block is None:
+            return Enumerable.send_generic(space, self, "reject", [], block)
+        result_w = []
+        w_item = it.next(space)
+        while w_item is not None:
+            if not space.is_true(space.invoke_block(block, [w_item])):
+                result_w.append(w_item)
+            w_item = it.next(space)
+        return space.newarray(result_w)
+
+    @nativedef.method("partition")
+    def method_partition(self, space, block):
+        it = native_iterator(space, self)
+        if it is None or block is None:
+            return Enumerable.send_generic(space, self, "partition", [], block)
+        left_w = []
+        right_w = []
+        w_item = it.next(space)
+        while w_item is not None:
+            if space.is_true(space.invoke_block(block, [w_item])):
+                left_w.append(w_item)
+            else:
+                right_w.append(w_item)
+            w_item = it.next(space)
+        return space.newarray([space.newarray(left_w), space.newarray(right_w)])
+
+    @nativedef.method("group_by")
+    def method_group_by(self, space, block):
+        it = native_iterator(space, self)
+        if it is None or block is None:
+            return Enumerable.send_generic(space, self, "group_by", [], block)
+        groups = OrderedDict(space.eq_w, space.hash_w)
+        w_item = it.next(space)
+        while w_item is not None:
+            w_key = space.invoke_block(block, [w_item])
+            w_group = groups.get(w_key, None)
+            if w_group is None:
+                w_group = groups[w_key] = space.newarray([])
+            space.listview(w_group).append(w_item)
+            w_item = it.next(space)
+        w_hash = space.newhash()
+        for w_key, w_group in groups.iteritems():
+            space.send(w_hash, "[]=", [w_key, w_group])
+        return w_hash
+
+    @nativedef.method("inject")
+    @nativedef.method("reduce")
+    def method_inject(self, space, args_w, block):
+        it = native_iterator(space, self)
+        w_memo = None
+        op = None
+        if len(args_w) == 1:
+            if space.is_kind_of(args_w[0], space.w_symbol):
+                op = space.symbol_w(args_w[0])
+            else:
+                w_memo = args_w[0]
+        elif len(args_w) == 2:
+            w_memo = args_w[0]
+            op = space.symbol_w(args_w[1])
+        if it is None or len(args_w) > 2 or (op is None and block is None):
+            return Enumerable.send_generic(space, self, "inject", args_w, block)
+        w_item = it.next(space)
+        while w_item is not None:
+            if w_memo is None:
+                w_memo = w_item
+            elif op is not None:
+                w_memo = space.send(w_memo, op, [w_item])
+            else:
+                w_memo = space.invoke_block(block, [w_memo, w_item])
+            w_item = it.next(space)
+        if w_memo is None:
+            return space.w_nil
+        return w_memo
+
+    @nativedef.method("each_with_index")
+    def method_each_with_index(self, space, args_w, block):
+        it = native_iterator(space, self)
+        if it is None or block is None or args_w:
+            return Enumerable.send_generic(space, self, "each_with_index", args_w, block)
+        i = 0
+        w_item = it.next(space)
+        while w_item is not None:
+            space.invoke_block(block, [w_item, space.newint(i)])
+            i += 1
+            w_item = it.next(space)
+        return self
+
+    @nativedef.method("each_with_object")
+    def method_each_with_object(self, space, w_memo, block):
+        it = native_iterator(space, self)
+        if it is None or block is None:
+            return Enumerable.send_generic(space, self, "each_with_object", [w_memo], block)
+        w_item = it.next(space)
+        while w_item is not None:
+            space.invoke_block(block, [w_item, w_memo])
+            w_item = it.next(space)
+        return w_memo
+
+    @nativedef.method("each_slice")
+    def method_each_slice(self, space, w_num, block):
+        it = native_iterator(space, self)
+        if it is None or block is None:
+            return Enumerable.send_generic(space, self, "each_slice", [w_num], block)
+        num = space.int_w(space.convert_type(w_num, space.w_fixnum, "to_int"))
+        if num <= 0:
+            raise space.error(space.w_ArgumentError, "invalid slice size")
+        slice_w = []
+        w_item = it.next(space)
+        while w_item is not None:
+            slice_w.append(w_item)
+            if len(slice_w) == num:
+                space.invoke_block(block, [space.newarray(slice_w)])
+                slice_w = []
+            w_item = it.next(space)
+        if slice_w:
+            space.invoke_block(block, [space.newarray(slice_w)])
+        return space.w_nil
+
+    @nativedef.method("detect")
+    @nativedef.method("find")
+    def method_detect(self, space, w_ifnone=None, block=None):
+        it = native_iterator(space, self)
+        if it is None or block is None:
+            args_w = [] if w_ifnone is None else [w_ifnone]
+            return Enumerable.send_generic(space, self, "detect", args_w, block)
+        w_item = it.next(space)
+        while w_item is not None:
+            if space.is_true(space.invoke_block(block, [w_item])):
+                return w_item
+            w_item = it.next(space)
+        if w_ifnone is None:
+            return space.w_nil
+        elif space.is_kind_of(w_ifnone, space.w_proc):
+            return space.send(w_ifnone, "call")
+        return w_ifnone
+
+    @nativedef.method("find_index")
+    def method_find_index(self, space, w_obj=None, block=None):
+        it = native_iterator(space, self)
+        if it is None or (w_obj is None and block is None):
+            args_w = [] if w_obj is None else [w_obj]
+            return Enumerable.send_generic(space, self, "find_index", args_w, block)
+        i = 0
+        w_item = it.next(space)
+        while w_item is not None:
+            if w_obj is not None:
+                w_res = space.send(w_item, "==", [w_obj])
+            else:
+                w_res = space.invoke_block(block, [w_item])
+            if space.is_true(w_res):
+                return space.newint(i)
+            i += 1
+            w_item = it.next(space)
+        return space.w_nil
+
+    @nativedef.method("include?")
+    @nativedef.method("member?")
+    def method_includep(self, space, w_obj):
+        it = native_iterator(space, self)
+        if it is None:
+            return Enumerable.send_generic(space, self, "include?", [w_obj], None)
+        w_item = it.next(space)
+        while w_item is not None:
+            if space.is_true(space.send(w_item, "==", [w_obj])):
+                return space.w_true
+            w_item = it.next(space)
+        return space.w_false
+
+    @nativedef.method("count")
+    def method_count(self, space, args_w, block):
+        it = native_iterator(space, self)
+        if it is None or len(args_w) > 1:
+            return Enumerable.send_generic(space, self, "count", args_w, block)
+        count = 0
+        w_item = it.next(space)
+        while w_item is not None:
+            if args_w:
+                w_res = space.send(w_item, "==", [args_w[0]])
+            elif block is not None:
+                w_res = space.invoke_block(block, [w_item])
+            else:
+                w_res = space.w_true
+            if space.is_true(w_res):
+                count += 1
+            w_item = it.next(space)
+        return space.newint(count)
+
+    @nativedef.method("all?")
+    def method_allp(self, space, block):
+        it = native_iterator(space, self)
+        if it is None:
+            return Enumerable.send_generic(space, self, "all?", [], block)
+        w_item = it.next(space)
+        while w_item is not None:
+            w_res = w_item if block is None else space.invoke_block(block, [w_item])
+            if not space.is_true(w_res):
+                return space.w_false
+            w_item = it.next(space)
+        return space.w_true
+
+    @nativedef.method("any?")
+    def method_anyp(self, space, block):
+        it = native_iterator(space, self)
+        if it is None:
+            return Enumerable.send_generic(space, self, "any?", [], block)
+        w_item = it.next(space)
+        while w_item is not None:
+            w_res = w_item if block is None else space.invoke_block(block, [w_item])
+            if space.is_true(w_res):
+                return space.w_true
+            w_item = it.next(space)
+        return space.w_false
+
+    @nativedef.method("none?")
+    def method_nonep(self, space, block):
+        it = native_iterator(space, self)
+        if it is None:
+            return Enumerable.send_generic(space, self, "none?", [], block)
+        w_item = it.next(space)
+        while w_item is not None:
+            w_res = w_item if block is None else space.invoke_block(block, [w_item])
+            if space.is_true(w_res):
+                return space.w_false
+            w_item = it.next(space)
+        return space.w_true
+
+    @nativedef.method("take")
+    def method_take(self, space, w_n):
+        it = native_iterator(space, self)
+        if it is None:
+            return Enumerable.send_generic(space, self, "take", [w_n], None)
+        n = space.int_w(space.convert_type(w_n, space.w_fixnum, "to_int"))
+        if n < 0:
+            raise space.error(space.w_ArgumentError, "attempt to take negative size")
+        result_w = []
+        while len(result_w) < n:
+            w_item = it.next(space)
+            if w_item is None:
+                break
+            result_w.append(w_item)
+        return space.newarray(result_w)
+
+    @nativedef.method("take_while")
+    def method_take_while(self, space, block):
+        it = native_iterator(space, self)
+        if it is None or block is None:
+            return Enumerable.send_generic(space, self, "take_while", [], block)
+        result_w = []
+        w_item = it.next(space)
+        while w_item is not None:
+            if not space.is_true(space.invoke_block(block, [w_item])):
+                break
+            result_w.append(w_item)
+            w_item = it.next(space)
+        return space.newarray(result_w)
+
+    @nativedef.method("drop_while")
+    def method_drop_while(self, space, block):
+        it = native_iterator(space, self)
+        if it is None or block is None:
+            return Enumerable.send_generic(space, self, "drop_while", [], block)
+        result_w = []
+        dropping = True
+        w_item = it.next(space)
+        while w_item is not None:
+            if not dropping or not space.is_true(space.invoke_block(block, [w_item])):
+                dropping = False
+                result_w.append(w_item)
+            w_item = it.next(space)
+        return space.newarray(result_w)
+
+    @nativedef.method("to_a")
+    @nativedef.method("entries")
+    def method_to_a(self, space, args_w):
+        it = native_iterator(space, self)
+        if it is None or args_w:
+            return Enumerable.send_generic(space, self, "to_a", args_w, None)
+        result_w = []
+        w_item = it.next(space)
+        while w_item is not None:
+            result_w.append(w_item)
+            w_item = it.next(space)
+        return space.newarray(result_w)
@@ -15,10 +15,139 @@ from topaz.modules.process import Process
 from topaz.objects.bindingobject import W_BindingObject
 from topaz.objects.exceptionobject import W_ExceptionObject
 from topaz.objects.functionobject import W_FunctionObject
+from topaz.objects.ioobject import W_IOObject
 from topaz.objects.moduleobject import W_ModuleObject
 from topaz.objects.procobject import W_ProcObject
 from topaz.objects.randomobject import W_RandomObject
 from topaz.objects.stringobject import W_StringObject
+from topaz.utils.ll_dir import list_entries
+
+
+class LoadCache(object):
+    """
+    What require has learnt from $LOADED_FEATURES and $LOAD_PATH: the set of
+    loaded features, the names in each load path directory, and where
+    features were found. Each part is rebuilt once its array no longer
+    holds the same objects as when it was filled, and what depends on
+    relative load path entries once the working directory changes.
+    """
+
+    def __init__(self, space):
+        self.features_w = []
+        self.features = {}
+        self.load_path_w = []
+        self.load_path = []
+        self.dir_entries = {}
+        self.found = {}
+        self.has_relative = False
+        self.cwd = None
+
+    @staticmethod
+    def same_items(items_w, snapshot_w):
+        if len(items_w) != len(snapshot_w):
+            return False
+        for i in xrange(len(items_w)):
+            if items_w[i] is not snapshot_w[i]:
+                return False
+        return True
+
+    def is_loaded(self, space, path):
+        features_w = space.listview(space.globals.get(space, '$"'))
+        if not LoadCache.same_items(features_w, self.features_w):
+            self.features = {}
+            for w_feature in features_w:
+                if space.is_kind_of(w_feature, space.w_string):
+                    self.features[space.str_w(w_feature)] = None
+            self.features_w = features_w[:]
+        return path in self.features
+
+    def add_loaded(self, space, w_path):
+        # Loading the feature may have changed $" in other ways, in which case
+        # the next is_loaded starts over.
+        features_w = space.listview(space.globals.get(space, '$"'))
+        n = len(self.features_w)
+        if (len(features_w) == n + 1 and features_w[n] is w_path and
+            LoadCache.same_items(features_w[:n], self.features_w)):
+            self.features_w.append(w_path)
+            self.features[space.str_w(w_path)] = None
+
+    def get_load_path(self, space):
+        load_path_w = space.listview(space.globals.get(space, "$LOAD_PATH"))
+        if not LoadCache.same_items(load_path_w, self.load_path_w):
+            self.load_path = [Coerce.path(space, w_base) for w_base in load_path_w]
+            self.load_path_w = load_path_w[:]
+            self.dir_entries = {}
+            self.found = {}
+            self.has_relative = False
+            for base in self.load_path:
+                if not base.startswith("/"):
+                    self.has_relative = True
+            self.cwd = None
+        if self.has_relative:
+            try:
+                cwd = os.getcwd()
+            except OSError:
+                cwd = None
+            if cwd is None or cwd != self.cwd:
+                self.dir_entries = {}
+                self.found = {}
+                self.cwd = cwd
+        return self.load_path
+
+    def listdir(self, dirname):
+        try:
+            return self.dir_entries[dirname]
+        except KeyError:
+            pass
+        entries = {}
+        try:
+            names, _ = list_entries(dirname)
+        except OSError:
+            names = []
+        for name in names:
+            entries[name] = None
+        self.dir_entries[dirname] = entries
+        return entries
+
+    @staticmethod
+    def split_path(full):
+        sep = full.rfind("/")
+        if sep >= 0:
+            return full[:sep], full[sep + 1:]
+        return ".", full
+
+    def search(self, space, path):
+        """
+        Returns the file path names in the first load path directory that has
+        it, or None.
+        """
+        load_path = self.get_load_path(space)
+        full = self.found.get(path, None)
+        if full is not None:
+            if os.path.isfile(full):
+                return full
+            # Deleted since, a later load path entry may have it.
+            del self.found[path]
+            dirname, _ = LoadCache.split_path(full)
+            if dirname in self.dir_entries:
+                del self.dir_entries[dirname]
+        for base in load_path:
+            full = os.path.join(base, path)
+            dirname, name = LoadCache.split_path(full)
+            if name in self.listdir(dirname) and os.path.isfile(full):
+                self.found[path] = full
+                return full
+        # The listings may predate the file, look for it the slow way before
+        # giving up, and forget only a listing that turns out to be stale.
+        for base in load_path:
+            full = os.path.join(base, path)
+            if os.path.isfile(full):
+                dirname, _ = LoadCache.split_path(full)
+                if dirname in self.dir_entries:
+                    del self.dir_entries[dirname]
+                self.found[path] = full
+                return full
+        return None
 
 
 class Kernel(object):
@@ -94,13 +223,9 @@ class Kernel(object):
             path += ".rb"
 
         if not (path.startswith("/") or path.startswith("./") or path.startswith("../")):
-            w_load_path = space.globals.get(space, "$LOAD_PATH")
-            for w_base in space.listview(w_load_path):
-                base = Coerce.path(space, w_base)
-                full = os.path.join(base, path)
-                if os.path.isfile(full):
-                    path = os.path.join(base, path)
-                    break
+            full = space.fromcache(LoadCache).search(space, path)
+            if full is not None:
+                path = full
         return path
 
     @staticmethod
@@ -108,16 +233,17 @@ class Kernel(object):
         if not os.path.exists(path):
             raise space.error(space.w_LoadError, orig_path)
 
-        try:
-            f = open_file_as_stream(path, buffering=0)
+        with space.startup_profile.measure("load", path):
             try:
-                contents = f.readall()
-            finally:
-                f.close()
-        except OSError as e:
-            raise error_for_oserror(space, e)
+                f = open_file_as_stream(path, buffering=0)
+                try:
+                    contents = f.readall()
+                finally:
+                    f.close()
+            except OSError as e:
+                raise error_for_oserror(space, e)
 
-        space.execute(contents, filepath=path)
+            space.execute(contents, filepath=path)
 
     @moduledef.function("require", path="path")
     def function_require(self, space, path):
@@ -125,15 +251,14 @@ class Kernel(object):
         orig_path = path
         path = Kernel.find_feature(space, path)
 
-        w_loaded_features = space.globals.get(space, '$"')
-        w_already_loaded = space.send(
-            w_loaded_features, "include?", [space.newstr_fromstr(path)]
-        )
-        if space.is_true(w_already_loaded):
+        cache = space.fromcache(LoadCache)
+        if cache.is_loaded(space, path):
             return space.w_false
 
         Kernel.load_feature(space, path, orig_path)
-        w_loaded_features.method_lshift(space, space.newstr_fromstr(path))
+        w_path = space.newstr_fromstr(path)
+        space.globals.get(space, '$"').method_lshift(space, w_path)
+        cache.add_loaded(space, w_path)
         return space.w_true
 
     @moduledef.function("load", path="path")
@@ -211,6 +336,18 @@ class Kernel(object):
         frame = space.getexecutioncontext().gettoprubyframe()
         return space.newsymbol(frame.bytecode.name)
 
+    @moduledef.function("gets")
+    def method_gets(self, space, w_sep=None, w_limit=None):
+        w_stdin = space.globals.get(space, "$stdin")
+        if isinstance(w_stdin, W_IOObject) and space.has_builtin_method(w_stdin, "gets", space.w_io):
+            return w_stdin.method_gets(space, w_sep, w_limit)
+        args_w = []
+        if w_sep is not None:
+            args_w.append(w_sep)
+        if w_limit is not None:
+            args_w.append(w_limit)
+        return space.send(w_stdin, "gets", args_w)
+
     @moduledef.function("exec")
     def method_exec(self, space, args_w):
         if len(args_w) > 1 and space.respond_to(args_w[0], "to_hash"):
@@ -247,6 +384,7 @@ class Kernel(object):
                     w_arg, space.w_string, "to_str"
                 )) for w_arg in args_w[1:]
             ]
+            space.flush_io()
             try:
                 os.execv(cmd, args)
             except OSError as e:
@@ -260,6 +398,7 @@ class Kernel(object):
                 argv0 = shell[sepidx:]
             else:
                 argv0 = shell
+            space.flush_io()
             try:
                 os.execv(shell, [argv0, "-c", cmd])
             except OSError as e:
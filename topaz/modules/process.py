@@ -70,6 +70,7 @@ class Process(object):
 
     @moduledef.function("fork")
     def method_fork(self, space, block):
+        space.flush_io()
         pid = fork()
         if pid == 0:
             if block is not None:
@@ -4,7 +4,9 @@ import sys
 from rpython.rlib.rarithmetic import intmask
 
 from topaz.module import ModuleDef
+from topaz.objects.arrayobject import SortKeys
 from topaz.objects.classobject import W_ClassObject
+from topaz.objects.structobject import W_StructObject
 
 
 class Topaz(object):
@@ -38,6 +40,26 @@ class Topaz(object):
     def method_compare(self, space, w_a, w_b, block=None):
         return space.compare(w_a, w_b, block)
 
+    @moduledef.function("min_index", keys_w="array")
+    def method_min_index(self, space, keys_w):
+        if not keys_w:
+            return space.w_nil
+        return space.newint(SortKeys(space, keys_w).min_index())
+
+    @moduledef.function("max_index", keys_w="array")
+    def method_max_index(self, space, keys_w):
+        if not keys_w:
+            return space.w_nil
+        return space.newint(SortKeys(space, keys_w).max_index())
+
+    @moduledef.function("define_struct_members", members_w="array")
+    def method_define_struct_members(self, space, w_cls, members_w):
+        if not isinstance(w_cls, W_ClassObject):
+            raise space.error(space.w_TypeError, "class argument must be a class")
+        members = [space.symbol_w(w_member) for w_member in members_w]
+        W_StructObject.define_members(space, w_cls, members)
+        return w_cls
+
     @moduledef.function("infect", taint="bool", untrust="bool", freeze="bool")
     def method_infect(self, space, w_dest, w_src, taint=True, untrust=True, freeze=False):
         space.infect(w_dest, w_src, taint=taint, untrust=untrust, freeze=freeze)
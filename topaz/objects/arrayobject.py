@@ -2,17 +2,75 @@ import copy
 
 from rpython.rlib import jit
 from rpython.rlib.listsort import make_timsort_class
+from rpython.rlib.rarithmetic import intmask
 from rpython.rlib.rbigint import rbigint
+from rpython.rlib.rstring import StringBuilder
 
 from topaz.coerce import Coerce
 from topaz.module import ClassDef, check_frozen
 from topaz.modules.enumerable import Enumerable
+from topaz.objects.floatobject import W_FloatObject
+from topaz.objects.intobject import W_FixnumObject
 from topaz.objects.objectobject import W_Object
+from topaz.objects.stringobject import W_StringObject
+from topaz.utils.blockdriver import make_block_driver
+from topaz.utils.ordereddict import OrderedDict
 from topaz.utils.packing.pack import RPacker
 
 
+# Arrays that are shifted from are compacted once the free slots before the
+# first element outnumber the elements by this factor (and there are at least
+# SHIFT_COMPACT_MIN of them).
+SHIFT_COMPACT_FACTOR = 2
+SHIFT_COMPACT_MIN = 16
+
+each_driver = make_block_driver("Array#each")
+
+
 BaseRubySorter = make_timsort_class()
-BaseRubySortBy = make_timsort_class()
+BaseRubyKeySorter = make_timsort_class()
+BaseFixnumSorter = make_timsort_class()
+BaseFloatSorter = make_timsort_class()
+
+
+def compare_lt(space, w_a, w_b, block=None):
+    w_cmp_res = space.compare(w_a, w_b, block)
+    if space.is_kind_of(w_cmp_res, space.w_bignum):
+        return space.bigint_w(w_cmp_res).lt(rbigint.fromint(0))
+    else:
+        return space.int_w(w_cmp_res) < 0
+
+
+def compare_gt(space, w_a, w_b, block=None):
+    w_cmp_res = space.compare(w_a, w_b, block)
+    if space.is_kind_of(w_cmp_res, space.w_bignum):
+        return space.bigint_w(w_cmp_res).gt(rbigint.fromint(0))
+    else:
+        return space.int_w(w_cmp_res) > 0
+
+
+def sort_items(space, items_w, block=None):
+    """
+    Sorts items_w in place, with <=> or the block. Lists of only Fixnums,
+    Floats or Strings are compared natively unless <=> has been redefined.
+    """
+    if block is None:
+        kind = SortKeys.find_kind(space, items_w)
+        if kind == SortKeys.KIND_FIXNUM:
+            FixnumSorter(space, items_w).sort()
+            return
+        elif kind == SortKeys.KIND_FLOAT:
+            FloatSorter(space, items_w).sort()
+            return
+        elif kind == SortKeys.KIND_STRING:
+            # Strings are unwrapped once up front, instead of on every
+            # comparison.
+            keys = SortKeys(space, items_w[:])
+            sorted_w = [keys.keys_w[i] for i in keys.sorted_indices()]
+            for i, w_item in enumerate(sorted_w):
+                items_w[i] = w_item
+            return
+    RubySorter(space, items_w, sortblock=block).sort()
 
 
 class RubySorter(BaseRubySorter):
@@ -22,45 +80,181 @@ class RubySorter(BaseRubySorter):
         self.sortblock = sortblock
 
     def lt(self, w_a, w_b):
-        w_cmp_res = self.space.compare(w_a, w_b, self.sortblock)
-        if self.space.is_kind_of(w_cmp_res, self.space.w_bignum):
-            return self.space.bigint_w(w_cmp_res).lt(rbigint.fromint(0))
-        else:
-            return self.space.int_w(w_cmp_res) < 0
+        return compare_lt(self.space, w_a, w_b, self.sortblock)
 
 
-class RubySortBy(BaseRubySortBy):
-    def __init__(self, space, list, listlength=None, sortblock=None):
-        BaseRubySortBy.__init__(self, list, listlength=listlength)
+class FixnumSorter(BaseFixnumSorter):
+    def __init__(self, space, list):
+        BaseFixnumSorter.__init__(self, list)
         self.space = space
-        self.sortblock = sortblock
 
     def lt(self, w_a, w_b):
-        w_cmp_res = self.space.compare(
-            self.space.invoke_block(self.sortblock, [w_a]),
-            self.space.invoke_block(self.sortblock, [w_b])
-        )
-        return self.space.int_w(w_cmp_res) < 0
+        return self.space.int_w(w_a) < self.space.int_w(w_b)
+
+
+class FloatSorter(BaseFloatSorter):
+    def __init__(self, space, list):
+        BaseFloatSorter.__init__(self, list)
+        self.space = space
+
+    def lt(self, w_a, w_b):
+        return self.space.float_w(w_a) < self.space.float_w(w_b)
+
+
+class SortKeys(object):
+    """
+    A list of objects to be compared with <=>. If they are all Fixnums, Floats
+    or Strings whose <=> hasn't been redefined, they are unwrapped up front
+    and compared natively.
+    """
+
+    KIND_OBJECT = 0
+    KIND_FIXNUM = 1
+    KIND_FLOAT = 2
+    KIND_STRING = 3
+
+    def __init__(self, space, keys_w):
+        self.space = space
+        self.keys_w = keys_w
+        self.kind = SortKeys.find_kind(space, keys_w)
+        self.ints = None
+        self.floats = None
+        self.strs = None
+        if self.kind == SortKeys.KIND_FIXNUM:
+            self.ints = [space.int_w(w_key) for w_key in keys_w]
+        elif self.kind == SortKeys.KIND_FLOAT:
+            self.floats = [space.float_w(w_key) for w_key in keys_w]
+        elif self.kind == SortKeys.KIND_STRING:
+            self.strs = [space.str_w(w_key) for w_key in keys_w]
+
+    @staticmethod
+    def find_kind(space, keys_w):
+        if not keys_w:
+            return SortKeys.KIND_OBJECT
+        w_first = keys_w[0]
+        if isinstance(w_first, W_FixnumObject):
+            kind = SortKeys.KIND_FIXNUM
+            w_cls = space.w_fixnum
+        elif isinstance(w_first, W_FloatObject):
+            kind = SortKeys.KIND_FLOAT
+            w_cls = space.w_float
+        elif isinstance(w_first, W_StringObject):
+            kind = SortKeys.KIND_STRING
+            w_cls = space.w_string
+        else:
+            return SortKeys.KIND_OBJECT
+        if not space.has_builtin_method(w_first, "<=>", w_cls):
+            return SortKeys.KIND_OBJECT
+        for w_key in keys_w:
+            if space.getclass(w_key) is not w_cls:
+                return SortKeys.KIND_OBJECT
+        return kind
+
+    def length(self):
+        return len(self.keys_w)
+
+    def lt(self, i, j):
+        if self.kind == SortKeys.KIND_FIXNUM:
+            return self.ints[i] < self.ints[j]
+        elif self.kind == SortKeys.KIND_FLOAT:
+            return self.floats[i] < self.floats[j]
+        elif self.kind == SortKeys.KIND_STRING:
+            return self.strs[i] < self.strs[j]
+        else:
+            return compare_lt(self.space, self.keys_w[i], self.keys_w[j])
+
+    def gt(self, i, j):
+        if self.kind == SortKeys.KIND_OBJECT:
+            return compare_gt(self.space, self.keys_w[i], self.keys_w[j])
+        return self.lt(j, i)
+
+    def sorted_indices(self):
+        indices = range(self.length())
+        RubyKeySorter(indices, self).sort()
+        return indices
+
+    def min_index(self):
+        best = 0
+        for i in xrange(1, self.length()):
+            if self.lt(i, best):
+                best = i
+        return best
+
+    def max_index(self):
+        best = 0
+        for i in xrange(1, self.length()):
+            if self.gt(i, best):
+                best = i
+        return best
+
+
+class RubyKeySorter(BaseRubyKeySorter):
+    """
+    Sorts a list of indices into a SortKeys.
+    """
+
+    def __init__(self, indices, keys):
+        BaseRubyKeySorter.__init__(self, indices)
+        self.keys = keys
+
+    def lt(self, i, j):
+        return self.keys.lt(i, j)
 
 
 class W_ArrayObject(W_Object):
     classdef = ClassDef("Array", W_Object.classdef)
     classdef.include_module(Enumerable)
+    Enumerable.include_native_methods(classdef, exclude=["to_a", "find_index"])
 
     def __init__(self, space, items_w, klass=None):
         W_Object.__init__(self, space, klass)
         self.items_w = items_w
+        # The elements are items_w[start:]. The slots before start are left
+        # free by shift and unshift, so that both are amortized O(1). Methods
+        # that don't know about start call compact() first.
+        self.start = 0
 
     def __deepcopy__(self, memo):
         obj = super(W_ArrayObject, self).__deepcopy__(memo)
         obj.items_w = copy.deepcopy(self.items_w, memo)
+        obj.start = self.start
         return obj
 
     def listview(self, space):
+        self.compact()
         return self.items_w
 
     def length(self):
-        return len(self.items_w)
+        return len(self.items_w) - self.start
+
+    def compact(self):
+        start = self.start
+        if start > 0:
+            del self.items_w[:start]
+            self.start = 0
+
+    def _shifted(self):
+        if self.length() == 0:
+            del self.items_w[:]
+            self.start = 0
+        elif (self.start >= SHIFT_COMPACT_MIN and
+            self.start > SHIFT_COMPACT_FACTOR * self.length()):
+            self.compact()
+
+    def _grow_front(self, n):
+        # Moves the elements back so that at least n free slots are in front
+        # of them, leaving as many extra free slots as there are elements.
+        old_start = self.start
+        new_start = n + self.length()
+        delta = new_start - old_start
+        self.items_w.extend([None] * delta)
+        i = len(self.items_w) - 1
+        while i >= new_start:
+            self.items_w[i] = self.items_w[i - delta]
+            i -= 1
+        for i in xrange(old_start, new_start):
+            self.items_w[i] = None
+        self.start = new_start
 
     @classdef.singleton_method("allocate")
     def singleton_method_allocate(self, space):
@@ -71,9 +265,23 @@ class W_ArrayObject(W_Object):
     @check_frozen()
     def method_replace(self, space, other_w):
         del self.items_w[:]
+        self.start = 0
         self.items_w.extend(other_w)
         return self
 
+    @classdef.method("each")
+    def method_each(self, space, block):
+        if block is None:
+            return space.send(self, "enum_for", [space.newsymbol("each")])
+        # The block may push, pop or shift, so the length and the offset of the
+        # first element are re-read on every iteration.
+        i = 0
+        while i < self.length():
+            each_driver.jit_merge_point(block_bytecode=block.bytecode)
+            space.invoke_block(block, [self.items_w[self.start + i]])
+            i += 1
+        return self
+
     @classdef.method("[]")
     @classdef.method("slice")
     def method_subscript(self, space, w_idx, w_count=None):
@@ -81,11 +289,15 @@ class W_ArrayObject(W_Object):
         if nil:
             return space.w_nil
         elif as_range:
+            assert start >= 0
+            assert end >= 0
+            start += self.start
+            end += self.start
             assert start >= 0
             assert end >= 0
             return W_ArrayObject(space, self.items_w[start:end], space.getnonsingletonclass(self))
         else:
-            return self.items_w[start]
+            return self.items_w[self.start + start]
 
     @classdef.method("[]=")
     @check_frozen()
@@ -95,6 +307,7 @@ class W_ArrayObject(W_Object):
             w_count = w_count_or_obj
         else:
             w_obj = w_count_or_obj
+        self.compact()
         start, end, as_range, _ = space.subscript_access(self.length(), w_idx, w_count=w_count)
 
         if w_count and end < start:
@@ -139,6 +352,7 @@ class W_ArrayObject(W_Object):
     @classdef.method("slice!")
     @check_frozen()
     def method_slice_i(self, space, w_idx, w_count=None):
+        self.compact()
         start, end, as_range, nil = space.subscript_access(self.length(), w_idx, w_count=w_count)
 
         if nil:
@@ -167,7 +381,7 @@ class W_ArrayObject(W_Object):
 
     @classdef.method("+", other="array")
     def method_add(self, space, other):
-        return space.newarray(self.items_w + other)
+        return space.newarray(self.listview(space) + other)
 
     @classdef.method("<<")
     @check_frozen()
@@ -188,7 +402,7 @@ class W_ArrayObject(W_Object):
         n = space.int_w(space.convert_type(w_other, space.w_fixnum, "to_int"))
         if n < 0:
             raise space.error(space.w_ArgumentError, "Count cannot be negative")
-        w_res = W_ArrayObject(space, self.items_w * n, space.getnonsingletonclass(self))
+        w_res = W_ArrayObject(space, self.listview(space) * n, space.getnonsingletonclass(self))
         space.infect(w_res, self, freeze=False)
         return w_res
 
@@ -202,27 +416,39 @@ class W_ArrayObject(W_Object):
     @check_frozen()
     def method_shift(self, space, w_n=None):
         if w_n is None:
-            if self.items_w:
-                return self.items_w.pop(0)
-            else:
+            if self.length() == 0:
                 return space.w_nil
+            w_item = self.items_w[self.start]
+            self.items_w[self.start] = None
+            self.start += 1
+            self._shifted()
+            return w_item
         n = space.int_w(space.convert_type(w_n, space.w_fixnum, "to_int"))
         if n < 0:
             raise space.error(space.w_ArgumentError, "negative array size")
-        items_w = self.items_w[:n]
-        del self.items_w[:n]
+        n = min(n, self.length())
+        start = self.start
+        assert start >= 0
+        items_w = self.items_w[start:start + n]
+        for i in xrange(start, start + n):
+            self.items_w[i] = None
+        self.start += n
+        self._shifted()
         return space.newarray(items_w)
 
     @classdef.method("unshift")
     @check_frozen()
     def method_unshift(self, space, args_w):
-        for w_obj in reversed(args_w):
-            self.items_w.insert(0, w_obj)
+        if len(args_w) > self.start:
+            self._grow_front(len(args_w))
+        self.start -= len(args_w)
+        for i, w_obj in enumerate(args_w):
+            self.items_w[self.start + i] = w_obj
         return self
 
     @classdef.method("join")
     def method_join(self, space, w_sep=None):
-        if not self.items_w:
+        if self.length() == 0:
             return space.newstr_fromstr("")
         if w_sep is None:
             separator = ""
@@ -232,20 +458,60 @@ class W_ArrayObject(W_Object):
             raise space.error(space.w_TypeError,
                 "can't convert %s into String" % space.getclass(w_sep).name
             )
-        return space.newstr_fromstr(separator.join([
-            space.str_w(space.send(w_o, "to_s"))
-            for w_o in self.items_w
-        ]))
+        builder = StringBuilder()
+        self.join_into(space, builder, separator)
+        return space.newstr_fromstr(builder.build())
+
+    def join_into(self, space, builder, separator):
+        with space.getexecutioncontext().recursion_guard("array_join", self) as in_recursion:
+            if in_recursion:
+                raise space.error(space.w_ArgumentError, "recursive array join")
+            # Elements may change the array from their to_s, so don't cache
+            # the length.
+            i = 0
+            while i < self.length():
+                if i > 0:
+                    builder.append(separator)
+                w_item = self.items_w[self.start + i]
+                if isinstance(w_item, W_ArrayObject):
+                    w_item.join_into(space, builder, separator)
+                else:
+                    space.append_to_s(builder, w_item)
+                i += 1
+
+    @classdef.method("inspect")
+    @classdef.method("to_s")
+    def method_inspect(self, space):
+        builder = StringBuilder()
+        self.inspect_into(space, builder)
+        return space.newstr_fromstr(builder.build())
+
+    def inspect_into(self, space, builder):
+        with space.getexecutioncontext().recursion_guard("array_inspect", self) as in_recursion:
+            if in_recursion:
+                builder.append("[...]")
+            else:
+                builder.append("[")
+                i = 0
+                while i < self.length():
+                    if i > 0:
+                        builder.append(", ")
+                    space.append_inspect(builder, self.items_w[self.start + i])
+                    i += 1
+                builder.append("]")
 
     @classdef.method("pop")
     @check_frozen()
     def method_pop(self, space, w_num=None):
         if w_num is None:
-            if self.items_w:
-                return self.items_w.pop()
-            else:
+            if self.length() == 0:
                 return space.w_nil
+            w_item = self.items_w.pop()
+            if self.length() == 0:
+                self._shifted()
+            return w_item
         else:
+            self.compact()
             num = space.int_w(space.convert_type(
                 w_num, space.w_fixnum, "to_int"
             ))
@@ -260,6 +526,7 @@ class W_ArrayObject(W_Object):
     @classdef.method("delete_at", idx="int")
     @check_frozen()
     def method_delete_at(self, space, idx):
+        self.compact()
         if idx < 0:
             idx += self.length()
         if idx < 0 or idx >= self.length():
@@ -276,12 +543,14 @@ class W_ArrayObject(W_Object):
             start = self.length() - count
             if start < 0:
                 start = 0
+            start += self.start
+            assert start >= 0
             return space.newarray(self.items_w[start:])
 
         if self.length() == 0:
             return space.w_nil
         else:
-            return self.items_w[self.length() - 1]
+            return self.items_w[len(self.items_w) - 1]
 
     @classdef.method("pack")
     def method_pack(self, space, w_template):
@@ -299,25 +568,60 @@ class W_ArrayObject(W_Object):
     @check_frozen()
     def method_clear(self, space):
         del self.items_w[:]
+        self.start = 0
         return self
 
     @classdef.method("sort!")
     @check_frozen()
     def method_sort_i(self, space, block):
-        RubySorter(space, self.items_w, sortblock=block).sort()
+        sort_items(space, self.listview(space), block)
         return self
 
+    @classdef.method("min")
+    def method_min(self, space, block):
+        items_w = self.listview(space)
+        if not items_w:
+            return space.w_nil
+        if block is None:
+            keys = SortKeys(space, items_w[:])
+            return keys.keys_w[keys.min_index()]
+        w_min = items_w[0]
+        for w_item in items_w:
+            if compare_lt(space, w_item, w_min, block):
+                w_min = w_item
+        return w_min
+
+    @classdef.method("max")
+    def method_max(self, space, block):
+        items_w = self.listview(space)
+        if not items_w:
+            return space.w_nil
+        if block is None:
+            keys = SortKeys(space, items_w[:])
+            return keys.keys_w[keys.max_index()]
+        w_max = items_w[0]
+        for w_item in items_w:
+            if compare_gt(space, w_item, w_max, block):
+                w_max = w_item
+        return w_max
+
     @classdef.method("sort_by!")
     @check_frozen()
     def method_sort_by_i(self, space, block):
         if block is None:
             return space.send(self, "enum_for", [space.newsymbol("sort_by!")])
-        RubySortBy(space, self.items_w, sortblock=block).sort()
+        items_w = self.listview(space)[:]
+        keys = SortKeys(space, [space.invoke_block(block, [w_item]) for w_item in items_w])
+        sorted_w = [items_w[i] for i in keys.sorted_indices()]
+        del self.items_w[:]
+        self.start = 0
+        self.items_w.extend(sorted_w)
         return self
 
     @classdef.method("reverse!")
     @check_frozen()
     def method_reverse_i(self, space):
+        self.compact()
         self.items_w.reverse()
         return self
 
@@ -334,6 +638,7 @@ class W_ArrayObject(W_Object):
         if n == 0:
             return self
         assert n >= 0
+        self.compact()
         self.items_w.extend(self.items_w[:n])
         del self.items_w[:n]
         return self
@@ -344,6 +649,7 @@ class W_ArrayObject(W_Object):
     def method_insert(self, space, i, args_w):
         if not args_w:
             return self
+        self.compact()
         length = self.length()
         if i > length:
             self._append_nils(space, i - length)
@@ -361,6 +667,117 @@ class W_ArrayObject(W_Object):
             i += 1
         return self
 
+    def _items_equal(self, space, w_a, w_b):
+        if w_a is w_b:
+            return True
+        elif (isinstance(w_a, W_FixnumObject) and isinstance(w_b, W_FixnumObject) and
+            space.has_builtin_method(w_a, "==", space.w_fixnum)):
+            return w_a.intvalue == w_b.intvalue
+        return space.is_true(space.send(w_a, "==", [w_b]))
+
+    @classdef.method("==")
+    def method_eq(self, space, w_other):
+        if self is w_other:
+            return space.w_true
+        if not isinstance(w_other, W_ArrayObject):
+            if space.respond_to(w_other, "to_ary"):
+                return space.send(w_other, "==", [self])
+            return space.w_false
+        if self.length() != w_other.length():
+            return space.w_false
+        with space.getexecutioncontext().recursion_guard("array_equals", self) as in_recursion:
+            if not in_recursion:
+                i = 0
+                while i < self.length() and i < w_other.length():
+                    w_item = self.items_w[self.start + i]
+                    w_other_item = w_other.items_w[w_other.start + i]
+                    if not self._items_equal(space, w_item, w_other_item):
+                        return space.w_false
+                    i += 1
+        return space.w_true
+
+    @classdef.method("eql?")
+    def method_eqlp(self, space, w_other):
+        if self is w_other:
+            return space.w_true
+        if not isinstance(w_other, W_ArrayObject):
+            return space.w_false
+        if self.length() != w_other.length():
+            return space.w_false
+        with space.getexecutioncontext().recursion_guard("array_eqlp", self) as in_recursion:
+            if not in_recursion:
+                i = 0
+                while i < self.length() and i < w_other.length():
+                    w_item = self.items_w[self.start + i]
+                    w_other_item = w_other.items_w[w_other.start + i]
+                    if not space.eq_w(w_other_item, w_item):
+                        return space.w_false
+                    i += 1
+        return space.w_true
+
+    @classdef.method("hash")
+    def method_hash(self, space):
+        res = 0x345678
+        with space.getexecutioncontext().recursion_guard("array_hash", self) as in_recursion:
+            if not in_recursion:
+                i = 0
+                while i < self.length():
+                    h = space.hash_w(self.items_w[self.start + i])
+                    res = intmask((1000003 * res) ^ h)
+                    i += 1
+        return space.newint(res)
+
+    def _new_seen(self, space, items_w):
+        seen = OrderedDict(space.eq_w, space.hash_w)
+        for w_item in items_w:
+            seen[w_item] = w_item
+        return seen
+
+    @classdef.method("uniq!")
+    @check_frozen()
+    def method_uniq_i(self, space, block):
+        seen = OrderedDict(space.eq_w, space.hash_w)
+        uniq_w = []
+        for w_item in self.listview(space)[:]:
+            w_key = w_item
+            if block is not None:
+                w_key = space.invoke_block(block, [w_item])
+            if w_key not in seen:
+                seen[w_key] = w_item
+                uniq_w.append(w_item)
+        if len(uniq_w) == self.length():
+            return space.w_nil
+        del self.items_w[:]
+        self.start = 0
+        self.items_w.extend(uniq_w)
+        return self
+
+    @classdef.method("&", other_w="array")
+    def method_and(self, space, other_w):
+        seen = self._new_seen(space, other_w)
+        res_w = []
+        for w_item in self.listview(space):
+            if w_item in seen:
+                del seen[w_item]
+                res_w.append(w_item)
+        return space.newarray(res_w)
+
+    @classdef.method("|", other_w="array")
+    def method_or(self, space, other_w):
+        seen = OrderedDict(space.eq_w, space.hash_w)
+        res_w = []
+        for items_w in [self.listview(space), other_w]:
+            for w_item in items_w:
+                if w_item not in seen:
+                    seen[w_item] = w_item
+                    res_w.append(w_item)
+        return space.newarray(res_w)
+
+    @classdef.method("-", other_w="array")
+    def method_sub(self, space, other_w):
+        seen = self._new_seen(space, other_w)
+        return space.newarray([w_item for w_item in self.listview(space) if w_item not in seen])
+
     def _append_nils(self, space, num):
         for _ in xrange(num):
             self.items_w.append(space.w_nil)
@@ -9,6 +9,20 @@ from topaz.utils.glob import Glob
 from topaz.utils.ll_dir import opendir, readdir, closedir
 
 
+class BlockGlob(Glob):
+    """
+    Passes each match to the block of Dir.glob as soon as it is found.
+    """
+
+    def __init__(self, cache, space, block):
+        Glob.__init__(self, cache)
+        self.space = space
+        self.block = block
+
+    def found(self, match):
+        self.space.invoke_block(self.block, [self.space.newstr_fromstr(match)])
+
+
 class W_DirObject(W_Object):
     classdef = ClassDef("Dir", W_Object.classdef)
     classdef.include_module(Enumerable)
@@ -88,7 +102,10 @@ class W_DirObject(W_Object):
         else:
             patterns_w = [w_pattern]
 
-        glob = Glob(space.fromcache(RegexpCache))
+        if block is not None:
+            glob = BlockGlob(space.fromcache(RegexpCache), space, block)
+        else:
+            glob = Glob(space.fromcache(RegexpCache))
 
         for w_pat in patterns_w:
             w_pat2 = space.convert_type(w_pat, space.w_string, "to_path", raise_error=False)
@@ -101,9 +118,7 @@ class W_DirObject(W_Object):
             else:
                 glob.glob(pattern.split("\0")[0], flags)
 
-        if block:
-            for match in glob.matches():
-                space.invoke_block(block, [space.newstr_fromstr(match)])
+        if block is not None:
             return space.w_nil
         else:
             return space.newarray([space.newstr_fromstr(s) for s in glob.matches()])
@@ -0,0 +1,67 @@
+from topaz.module import ClassDef
+from topaz.modules.enumerable import (native_iterator, has_stock_method,
+    StringCharIterator, StringByteIterator)
+from topaz.objects.hashobject import W_HashObject
+from topaz.objects.objectobject import W_Object
+from topaz.objects.stringobject import W_StringObject
+
+
+def cursor_iterator(space, w_obj, method, args_w):
+    """
+    Returns a NativeIterator over what w_obj.send(method, *args_w) would yield,
+    or None if that isn't the stock each of a builtin collection.
+    """
+    if args_w:
+        return None
+    if method == "each":
+        return native_iterator(space, w_obj)
+    elif method == "each_pair" and isinstance(w_obj, W_HashObject):
+        if has_stock_method(space, w_obj, space.w_hash, "each_pair"):
+            return native_iterator(space, w_obj)
+    elif isinstance(w_obj, W_StringObject):
+        if method == "each_char" or method == "chars":
+            if has_stock_method(space, w_obj, space.w_string, method):
+                return StringCharIterator(space.str_w(w_obj))
+        elif method == "each_byte" or method == "bytes":
+            if has_stock_method(space, w_obj, space.w_string, method):
+                return StringByteIterator(space.str_w(w_obj))
+    return None
+
+
+class W_EnumeratorCursor(W_Object):
+    """
+    The position of an Enumerator#next over a builtin collection, kept as an
+    index into its storage instead of a suspended Fiber running its each.
+    """
+    classdef = ClassDef("EnumeratorCursor", W_Object.classdef)
+
+    def __init__(self, space, iterator):
+        W_Object.__init__(self, space)
+        self.iterator = iterator
+        self.w_peeked = None
+
+    method_allocate = classdef.undefine_allocator()
+
+    @classdef.singleton_method("for", method="symbol", args_w="array")
+    def singleton_method_for(self, space, w_obj, method, args_w):
+        iterator = cursor_iterator(space, w_obj, method, args_w)
+        if iterator is None:
+            return space.w_nil
+        return W_EnumeratorCursor(space, iterator)
+
+    def fetch(self, space):
+        if self.w_peeked is None:
+            self.w_peeked = self.iterator.next(space)
+            if self.w_peeked is None:
+                raise space.error(space.w_StopIteration, "iteration reached an end")
+        return self.w_peeked
+
+    @classdef.method("peek")
+    def method_peek(self, space):
+        return self.fetch(space)
+
+    @classdef.method("next")
+    def method_next(self, space):
+        w_value = self.fetch(space)
+        self.w_peeked = None
+        return w_value
@@ -6,6 +6,7 @@ from topaz.error import error_for_oserror
 from topaz.module import ClassDef
 from topaz.objects.arrayobject import W_ArrayObject
 from topaz.objects.hashobject import W_HashObject
+from topaz.objects.mappedfileobject import W_MappedFileObject
 from topaz.objects.objectobject import W_Object
 from topaz.objects.ioobject import W_IOObject
 from topaz.objects.timeobject import W_TimeObject
@@ -262,12 +263,21 @@ class W_FileObject(W_IOObject):
     @classdef.method("truncate", length="int")
     def method_truncate(self, space, length):
         self.ensure_not_closed(space)
+        self.flush_or_raise(space)
         try:
             ftruncate(self.fd, length)
         except OSError as e:
             raise error_for_oserror(space, e)
         return space.newint(0)
 
+    @classdef.method("mmap")
+    def method_mmap(self, space):
+        self.ensure_not_closed(space)
+        self.flush_or_raise(space)
+        w_mapped = W_MappedFileObject(space)
+        w_mapped.map_fd(space, self.fd)
+        return w_mapped
+
     @classdef.singleton_method("path", path="path")
     def singleton_method_path(self, space, path):
         w_str = space.newstr_fromstr(path)
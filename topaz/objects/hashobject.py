@@ -1,4 +1,5 @@
 from rpython.rlib.rerased import new_static_erasing_pair
+from rpython.rlib.rstring import StringBuilder
 
 from topaz.module import ClassDef, check_frozen
 from topaz.modules.enumerable import Enumerable
@@ -88,6 +89,7 @@ class IdentityDictStrategy(BaseDictStrategy, TypedDictStrategyMixin):
 class W_HashObject(W_Object):
     classdef = ClassDef("Hash", W_Object.classdef)
     classdef.include_module(Enumerable)
+    Enumerable.include_native_methods(classdef, exclude=["select", "reject", "to_a"])
 
     def __init__(self, space, klass=None):
         W_Object.__init__(self, space, klass)
@@ -265,6 +267,29 @@ class W_HashObject(W_Object):
     def method_to_hash(self, space):
         return self
 
+    @classdef.method("inspect")
+    @classdef.method("to_s")
+    def method_inspect(self, space):
+        builder = StringBuilder()
+        self.inspect_into(space, builder)
+        return space.newstr_fromstr(builder.build())
+
+    def inspect_into(self, space, builder):
+        with space.getexecutioncontext().recursion_guard("hash_inspect", self) as in_recursion:
+            if in_recursion:
+                builder.append("{...}")
+            else:
+                keys_w = self.strategy.keys(self.dict_storage)
+                values_w = self.strategy.values(self.dict_storage)
+                builder.append("{")
+                for i in xrange(len(keys_w)):
+                    if i > 0:
+                        builder.append(", ")
+                    space.append_inspect(builder, keys_w[i])
+                    builder.append("=>")
+                    space.append_inspect(builder, values_w[i])
+                builder.append("}")
+
     @classdef.method("key?")
     @classdef.method("has_key?")
     @classdef.method("member?")
@@ -17,6 +17,12 @@ from topaz.objects.integerobject import W_IntegerObject
 from topaz.objects.numericobject import W_NumericObject
 from topaz.objects.objectobject import W_RootObject
 from topaz.system import IS_WINDOWS
+from topaz.utils.blockdriver import make_block_driver
+
+
+times_driver = make_block_driver("Fixnum#times")
+upto_driver = make_block_driver("Fixnum#upto")
+downto_driver = make_block_driver("Fixnum#downto")
 
 
 class FixnumStorage(object):
@@ -323,6 +329,12 @@ class W_FixnumObject(W_RootObject):
         else:
             return space.send(w_other, "==", [self])
 
+    @classdef.method("eql?")
+    def method_eqlp(self, space, w_other):
+        return space.newbool(
+            isinstance(w_other, W_FixnumObject) and self.intvalue == w_other.intvalue
+        )
+
     @classdef.method("!=")
     def method_ne(self, space, w_other):
         return space.newbool(space.send(self, "==", [w_other]) is space.w_false)
@@ -395,3 +407,49 @@ class W_FixnumObject(W_RootObject):
         if not 0 <= idx < LONG_BIT:
             return space.newint(0)
         return space.newint(int(bool(self.intvalue & (1 << idx))))
+
+    @classdef.method("times")
+    def method_times(self, space, block):
+        if block is None:
+            return space.send(self, "enum_for", [space.newsymbol("times")])
+        n = self.intvalue
+        i = 0
+        while i < n:
+            times_driver.jit_merge_point(block_bytecode=block.bytecode)
+            space.invoke_block(block, [space.newint(i)])
+            i += 1
+        return self
+
+    @classdef.method("upto")
+    def method_upto(self, space, w_limit, block):
+        if block is None:
+            return space.send(self, "enum_for", [space.newsymbol("upto"), w_limit])
+        if not isinstance(w_limit, W_FixnumObject):
+            return space.send_super(space.w_fixnum, self, "upto", [w_limit], block)
+        i = self.intvalue
+        limit = w_limit.intvalue
+        # Stepping past limit could overflow when it's sys.maxint, so stop on
+        # it instead.
+        while i <= limit:
+            upto_driver.jit_merge_point(block_bytecode=block.bytecode)
+            space.invoke_block(block, [space.newint(i)])
+            if i == limit:
+                break
+            i += 1
+        return self
+
+    @classdef.method("downto")
+    def method_downto(self, space, w_limit, block):
+        if block is None:
+            return space.send(self, "enum_for", [space.newsymbol("downto"), w_limit])
+        if not isinstance(w_limit, W_FixnumObject):
+            return space.send_super(space.w_fixnum, self, "downto", [w_limit], block)
+        i = self.intvalue
+        limit = w_limit.intvalue
+        while i >= limit:
+            downto_driver.jit_merge_point(block_bytecode=block.bytecode)
+            space.invoke_block(block, [space.newint(i)])
+            if i == limit:
+                break
+            i -= 1
+        return self
@@ -1,11 +1,20 @@
 import os
+import stat
 
 from topaz.coerce import Coerce
 from topaz.error import error_for_oserror
 from topaz.module import ClassDef
 from topaz.objects.objectobject import W_Object
 from topaz.objects.stringobject import W_StringObject
+from topaz.utils.blockdriver import make_block_driver
 from topaz.utils.filemode import map_filemode
+from topaz.utils.ll_file import O_BINARY, copy_fd, writev
+
+
+each_line_driver = make_block_driver("IO#each_line")
+
+
+DEFAULT_BUFFER_SIZE = 8192
 
 
 class W_IOObject(W_Object):
@@ -14,6 +23,9 @@ class W_IOObject(W_Object):
     def __init__(self, space):
         W_Object.__init__(self, space)
         self.fd = -1
+        self.sync = False
+        self.buffer_size = DEFAULT_BUFFER_SIZE
+        self.init_buffers()
 
     def __del__(self):
         # Do not close standard file streams
@@ -23,8 +35,23 @@ class W_IOObject(W_Object):
     def __deepcopy__(self, memo):
         obj = super(W_IOObject, self).__deepcopy__(memo)
         obj.fd = self.fd
+        obj.sync = self.sync
+        obj.buffer_size = self.buffer_size
+        obj.init_buffers()
         return obj
 
+    def init_buffers(self):
+        # Written data waits in wbuffer until it reaches buffer_size or a
+        # flush, except on a terminal, which is written to at once. Data read
+        # ahead of the caller sits in rbuffer from rbuffer_pos on.
+        self.wbuffer = []
+        self.wbuffer_len = 0
+        self.rbuffer = ""
+        self.rbuffer_pos = 0
+        self.tty = -1
+        self.unseekable = False
+        self.registered = False
+
     def ensure_not_closed(self, space):
         if self.fd < 0:
             raise space.error(space.w_IOError, "closed stream")
@@ -32,6 +59,247 @@ class W_IOObject(W_Object):
     def getfd(self):
         return self.fd
 
+    def is_tty(self):
+        # Decided lazily, since the standard streams are created before the
+        # process they end up running in.
+        if self.tty == -1:
+            self.tty = 1 if os.isatty(self.fd) else 0
+        return self.tty == 1
+
+    def register(self, space):
+        # Until its write buffer is empty again, the space holds on to the IO
+        # so that flush_io can write out what it holds.
+        if not self.registered:
+            self.registered = True
+            space.unflushed_ios_w[self] = None
+
+    def unregister(self, space):
+        if self.registered:
+            self.registered = False
+            del space.unflushed_ios_w[self]
+
+    def flush_buffer(self, space):
+        """
+        Writes out the write buffer, raising OSError on failure.
+        """
+        if self.wbuffer_len > 0:
+            pending = self.wbuffer
+            self.wbuffer = []
+            self.wbuffer_len = 0
+            self.unregister(space)
+            writev(self.fd, pending)
+
+    def flush_or_raise(self, space):
+        try:
+            self.flush_buffer(space)
+        except OSError as e:
+            raise error_for_oserror(space, e)
+
+    def drop_read_buffer(self):
+        """
+        Forgets data read ahead, moving the file position back to where the
+        caller has read up to. A descriptor that can't seek, like a socket or
+        a terminal, reads and writes separate streams, so there the data read
+        ahead is kept.
+        """
+        if self.unseekable:
+            return
+        unread = len(self.rbuffer) - self.rbuffer_pos
+        if unread > 0:
+            try:
+                os.lseek(self.fd, -unread, os.SEEK_CUR)
+            except OSError:
+                self.unseekable = True
+                return
+        self.rbuffer = ""
+        self.rbuffer_pos = 0
+
+    def write_str(self, space, data):
+        self.write_strs(space, [data])
+
+    def write_strs(self, space, strs):
+        """
+        Writes the fragments in strs in order, either into the write buffer or,
+        together with whatever it holds, in a single writev.
+        """
+        self.ensure_not_closed(space)
+        if self.rbuffer:
+            self.drop_read_buffer()
+        length = 0
+        for data in strs:
+            length += len(data)
+        try:
+            if self.sync or length >= self.buffer_size or self.is_tty():
+                pending = self.wbuffer + strs
+                self.wbuffer = []
+                self.wbuffer_len = 0
+                self.unregister(space)
+                writev(self.fd, pending)
+                return
+            self.wbuffer.extend(strs)
+            self.wbuffer_len += length
+            if self.wbuffer_len >= self.buffer_size:
+                self.flush_buffer(space)
+            else:
+                self.register(space)
+        except OSError as e:
+            raise error_for_oserror(space, e)
+
+    def fill_read_buffer(self, space):
+        """
+        Reads the next chunk into the read buffer, returning False at EOF.
+        """
+        if self.wbuffer_len > 0:
+            self.flush_or_raise(space)
+        if self.is_tty():
+            # Like stdio, reading from a terminal first shows any pending
+            # output, such as a prompt.
+            space.flush_io()
+        try:
+            data = os.read(self.fd, self.buffer_size if self.buffer_size > 0 else 1)
+        except OSError as e:
+            raise error_for_oserror(space, e)
+        self.rbuffer = data
+        self.rbuffer_pos = 0
+        return len(data) > 0
+
+    def remaining_size(self):
+        """
+        Returns how many bytes are left between the file position and the end
+        of a regular file, or 0 if that isn't known.
+        """
+        try:
+            st = os.fstat(self.fd)
+            if not stat.S_ISREG(st.st_mode):
+                return 0
+            pos = os.lseek(self.fd, 0, os.SEEK_CUR)
+        except OSError:
+            return 0
+        return max(int(st.st_size - pos), 0)
+
+    def read_from_buffer(self, max_bytes):
+        """
+        Takes up to max_bytes (or everything, if negative) from the read buffer.
+        """
+        start = self.rbuffer_pos
+        end = len(self.rbuffer)
+        if 0 <= max_bytes < end - start:
+            end = start + max_bytes
+        assert start >= 0
+        assert end >= start
+        data = self.rbuffer[start:end]
+        if end == len(self.rbuffer):
+            self.rbuffer = ""
+            self.rbuffer_pos = 0
+        else:
+            self.rbuffer_pos = end
+        return data
+
+    def skip_newlines(self, space):
+        while True:
+            if not self.rbuffer and not self.fill_read_buffer(space):
+                return
+            pos = self.rbuffer_pos
+            while pos < len(self.rbuffer) and self.rbuffer[pos] == "\n":
+                pos += 1
+            if pos < len(self.rbuffer):
+                self.rbuffer_pos = pos
+                return
+            self.rbuffer = ""
+            self.rbuffer_pos = 0
+
+    def getline(self, space, sep, limit):
+        """
+        Reads up to and including the next sep (everything, if sep is None),
+        but at most limit bytes unless limit is negative. An empty sep reads a
+        paragraph. Returns None at EOF.
+        """
+        self.ensure_not_closed(space)
+        if limit == 0:
+            return ""
+        if self.wbuffer_len > 0:
+            self.flush_or_raise(space)
+        paragraph = sep is not None and len(sep) == 0
+        if paragraph:
+            sep = "\n\n"
+            self.skip_newlines(space)
+        parts = []
+        length = 0
+        # The last len(sep) - 1 bytes read so far, where a separator that
+        # carries on into the next chunk starts.
+        tail = ""
+        while True:
+            if not self.rbuffer and not self.fill_read_buffer(space):
+                break
+            buf = self.rbuffer
+            start = self.rbuffer_pos
+            end = len(buf)
+            if limit > 0 and end - start > limit - length:
+                end = start + (limit - length)
+            found = False
+            stop = end
+            if sep is not None:
+                if tail:
+                    # The separator may have started in an earlier chunk.
+                    head_end = min(end, start + len(sep) - 1)
+                    idx = (tail + buf[start:head_end]).find(sep)
+                    if idx >= 0:
+                        stop = start + idx + len(sep) - len(tail)
+                        found = True
+                if not found:
+                    idx = buf.find(sep, start, end)
+                    if idx >= 0:
+                        stop = idx + len(sep)
+                        found = True
+            assert start >= 0
+            assert stop >= start
+            part = buf[start:stop]
+            parts.append(part)
+            length += stop - start
+            if sep is not None and len(sep) > 1 and not found:
+                keep = len(sep) - 1
+                if len(part) < keep:
+                    part = tail + part
+                tail_start = max(len(part) - keep, 0)
+                tail = part[tail_start:]
+            if stop == len(buf):
+                self.rbuffer = ""
+                self.rbuffer_pos = 0
+            else:
+                self.rbuffer_pos = stop
+            if found:
+                break
+            if limit > 0 and length >= limit:
+                break
+        if length == 0:
+            return None
+        if paragraph:
+            self.skip_newlines(space)
+        return "".join(parts)
+
+    @staticmethod
+    def getline_args(space, w_sep, w_limit, limit_error=None):
+        """
+        Interprets the optional (sep, limit) arguments of gets and friends,
+        where a lone Integer is the limit and sep defaults to $/.
+        """
+        if w_sep is not None and w_limit is None and space.is_kind_of(w_sep, space.w_integer):
+            w_limit = w_sep
+            w_sep = None
+        if w_sep is None:
+            w_sep = space.globals.get(space, "$/")
+        if w_sep is None or w_sep is space.w_nil:
+            sep = None
+        else:
+            sep = space.str_w(space.convert_type(w_sep, space.w_string, "to_str"))
+        if w_limit is None or w_limit is space.w_nil:
+            limit = -1
+        else:
+            limit = space.int_w(space.convert_type(w_limit, space.w_fixnum, "to_int"))
+            if limit == 0 and limit_error is not None:
+                raise space.error(space.w_ArgumentError, "invalid limit: 0 for %s" % limit_error)
+        return sep, limit
+
     @classdef.setup_class
     def setup_class(cls, space, w_cls):
         w_stdin = space.send(w_cls, "new", [space.newint(0)])
@@ -45,6 +313,8 @@ class W_IOObject(W_Object):
         space.set_const(space.w_object, "STDOUT", w_stdout)
 
         w_stderr = space.send(w_cls, "new", [space.newint(2)])
+        assert isinstance(w_stderr, W_IOObject)
+        w_stderr.sync = True
         space.globals.set(space, "$stderr", w_stderr)
         space.set_const(space.w_object, "STDERR", w_stderr)
 
@@ -72,6 +342,121 @@ class W_IOObject(W_Object):
         else:
             return space.newint(fd)
 
+    @staticmethod
+    def copy_stream_fd(space, w_obj, flags):
+        """
+        Returns the descriptor IO.copy_stream uses for w_obj, and whether it
+        was opened for the copy, or -1 if w_obj is neither an IO nor a path.
+        """
+        if isinstance(w_obj, W_IOObject):
+            w_obj.ensure_not_closed(space)
+            w_obj.flush_or_raise(space)
+            return w_obj.fd, False
+        if space.is_kind_of(w_obj, space.w_string) or space.respond_to(w_obj, "to_path"):
+            path = Coerce.path(space, w_obj)
+            try:
+                return os.open(path, flags, 0666), True
+            except OSError as e:
+                raise error_for_oserror(space, e)
+        return -1, False
+
+    @staticmethod
+    def copy_stream_write(space, w_dst, dst_fd, data):
+        if dst_fd < 0:
+            space.send(w_dst, "write", [space.newstr_fromstr(data)])
+            return len(data)
+        written = 0
+        try:
+            while written < len(data):
+                written += os.write(dst_fd, data[written:])
+        except OSError as e:
+            raise error_for_oserror(space, e)
+        return written
+
+    @staticmethod
+    def copy_stream_chunks(space, w_src, src_fd, w_dst, dst_fd, length, offset):
+        """
+        The IO.copy_stream loop for when one end is a Ruby object responding
+        to read or write, rather than something with a descriptor. Like
+        copy_fd, an offset in src_fd leaves its position alone.
+        """
+        if src_fd < 0 or offset < 0:
+            return W_IOObject.copy_stream_read_write(space, w_src, src_fd, w_dst, dst_fd, length)
+        try:
+            pos = os.lseek(src_fd, 0, os.SEEK_CUR)
+            os.lseek(src_fd, offset, os.SEEK_SET)
+        except OSError as e:
+            raise error_for_oserror(space, e)
+        try:
+            return W_IOObject.copy_stream_read_write(space, w_src, src_fd, w_dst, dst_fd, length)
+        finally:
+            try:
+                os.lseek(src_fd, pos, os.SEEK_SET)
+            except OSError:
+                pass
+
+    @staticmethod
+    def copy_stream_read_write(space, w_src, src_fd, w_dst, dst_fd, length):
+        copied = 0
+        while length < 0 or copied < length:
+            max_read = DEFAULT_BUFFER_SIZE
+            if length >= 0 and length - copied < max_read:
+                max_read = length - copied
+            if src_fd >= 0:
+                try:
+                    data = os.read(src_fd, max_read)
+                except OSError as e:
+                    raise error_for_oserror(space, e)
+            else:
+                w_data = space.send(w_src, "read", [space.newint(max_read)])
+                data = "" if w_data is space.w_nil else space.str_w(w_data)
+            if not data:
+                break
+            copied += W_IOObject.copy_stream_write(space, w_dst, dst_fd, data)
+        return copied
+
+    @classdef.singleton_method("copy_stream")
+    def singleton_method_copy_stream(self, space, w_src, w_dst, w_length=None, w_offset=None):
+        length = -1
+        if w_length is not None and w_length is not space.w_nil:
+            length = Coerce.int(space, w_length)
+        offset = -1
+        if w_offset is not None and w_offset is not space.w_nil:
+            offset = Coerce.int(space, w_offset)
+        src_fd, close_src = W_IOObject.copy_stream_fd(space, w_src, os.O_RDONLY | O_BINARY)
+        if src_fd < 0 and offset >= 0:
+            raise space.error(space.w_ArgumentError, "cannot specify src_offset for non-IO")
+        try:
+            dst_fd, close_dst = W_IOObject.copy_stream_fd(
+                space, w_dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | O_BINARY
+            )
+            try:
+                copied = 0
+                if isinstance(w_src, W_IOObject) and w_src.rbuffer and offset < 0:
+                    # Whatever was read ahead comes first.
+                    data = w_src.read_from_buffer(length)
+                    copied += W_IOObject.copy_stream_write(space, w_dst, dst_fd, data)
+                    if length >= 0:
+                        length -= copied
+                if isinstance(w_dst, W_IOObject) and w_dst.rbuffer:
+                    w_dst.drop_read_buffer()
+                if length != 0 and src_fd >= 0 and dst_fd >= 0:
+                    try:
+                        copied += copy_fd(src_fd, dst_fd, length, offset)
+                    except OSError as e:
+                        raise error_for_oserror(space, e)
+                elif length != 0:
+                    copied += W_IOObject.copy_stream_chunks(
+                        space, w_src, src_fd, w_dst, dst_fd, length, offset
+                    )
+            finally:
+                if close_dst:
+                    os.close(dst_fd)
+        finally:
+            if close_src:
+                os.close(src_fd)
+        return space.newint(copied)
+
     @classdef.method("initialize")
     def method_initialize(self, space, w_fd_or_io, w_mode_str_or_int=None, w_opts=None):
         if isinstance(w_fd_or_io, W_IOObject):
@@ -88,7 +473,9 @@ class W_IOObject(W_Object):
             raise space.error(space.w_NotImplementedError, "options hash for IO.new")
         if mode is None:
             mode = "r"
+        self.unregister(space)
         self.fd = fd
+        self.init_buffers()
         return self
 
     @classdef.method("read")
@@ -102,13 +489,22 @@ class W_IOObject(W_Object):
                 )
         else:
             length = -1
+        self.flush_or_raise(space)
         read_bytes = 0
         read_chunks = []
+        if self.rbuffer:
+            buffered = self.read_from_buffer(length)
+            read_bytes += len(buffered)
+            read_chunks.append(buffered)
+        if length < 0:
+            # Reading everything from a regular file, ask for all of it at
+            # once so that it ends up in a single string.
+            max_read = max(self.remaining_size(), DEFAULT_BUFFER_SIZE)
+        else:
+            max_read = DEFAULT_BUFFER_SIZE
         while length < 0 or read_bytes < length:
             if length > 0:
                 max_read = int(length - read_bytes)
-            else:
-                max_read = 8192
             try:
                 current_read = os.read(self.fd, max_read)
             except OSError as e:
@@ -116,11 +512,11 @@ class W_IOObject(W_Object):
             if len(current_read) == 0:
                 break
             read_bytes += len(current_read)
-            read_chunks += current_read
+            read_chunks.append(current_read)
         # Return nil on EOF if length is given
         if read_bytes == 0:
             return space.w_nil
-        w_read_str = space.newstr_fromchars(read_chunks)
+        w_read_str = space.newstr_fromstr("".join(read_chunks))
         if w_str is not None:
             w_str.clear(space)
             w_str.extend(space, w_read_str)
@@ -129,24 +525,61 @@ class W_IOObject(W_Object):
             return w_read_str
 
     @classdef.method("write")
-    def method_write(self, space, w_str):
+    def method_write(self, space, args_w):
+        strs = [space.str_w(space.send(w_arg, "to_s")) for w_arg in args_w]
+        self.write_strs(space, strs)
+        length = 0
+        for data in strs:
+            length += len(data)
+        return space.newint(length)
+
+    @classdef.method("flush")
+    def method_flush(self, space):
         self.ensure_not_closed(space)
-        string = space.str_w(space.send(w_str, "to_s"))
+        self.flush_or_raise(space)
+        return self
+
+    @classdef.method("fsync")
+    def method_fsync(self, space):
+        self.ensure_not_closed(space)
+        self.flush_or_raise(space)
         try:
-            bytes_written = os.write(self.fd, string)
+            os.fsync(self.fd)
         except OSError as e:
             raise error_for_oserror(space, e)
-        return space.newint(bytes_written)
+        return space.newint(0)
 
-    @classdef.method("flush")
-    def method_flush(self, space):
-        # We have no internal buffers to flush!
+    @classdef.method("sync")
+    def method_sync(self, space):
         self.ensure_not_closed(space)
-        return self
+        return space.newbool(self.sync)
+
+    @classdef.method("sync=")
+    def method_set_sync(self, space, w_sync):
+        self.ensure_not_closed(space)
+        self.sync = space.is_true(w_sync)
+        if self.sync:
+            self.flush_or_raise(space)
+        return w_sync
+
+    @classdef.method("buffer_size")
+    def method_buffer_size(self, space):
+        return space.newint(self.buffer_size)
+
+    @classdef.method("buffer_size=", size="int")
+    def method_set_buffer_size(self, space, size):
+        if size < 0:
+            raise space.error(space.w_ArgumentError, "negative buffer size")
+        self.ensure_not_closed(space)
+        self.flush_or_raise(space)
+        self.buffer_size = size
+        return space.newint(size)
 
     @classdef.method("seek", amount="int", whence="int")
     def method_seek(self, space, amount, whence=os.SEEK_SET):
         self.ensure_not_closed(space)
+        self.flush_or_raise(space)
+        self.drop_read_buffer()
         os.lseek(self.fd, amount, whence)
         return space.newint(0)
 
@@ -154,13 +587,18 @@ class W_IOObject(W_Object):
     @classdef.method("tell")
     def method_pos(self, space):
         self.ensure_not_closed(space)
+        self.flush_or_raise(space)
+        unread = len(self.rbuffer) - self.rbuffer_pos
         # TODO: this currently truncates large values, switch this to use a
         # Bignum in those cases
-        return space.newint(int(os.lseek(self.fd, 0, os.SEEK_CUR)))
+        return space.newint(int(os.lseek(self.fd, 0, os.SEEK_CUR)) - unread)
 
     @classdef.method("rewind")
     def method_rewind(self, space):
         self.ensure_not_closed(space)
+        self.flush_or_raise(space)
+        self.rbuffer = ""
+        self.rbuffer_pos = 0
         os.lseek(self.fd, 0, os.SEEK_SET)
         return space.newint(0)
 
@@ -181,29 +619,112 @@ class W_IOObject(W_Object):
             end = space.str_w(space.send(w_end, "to_s"))
         else:
             end = ""
-        strings = [space.str_w(space.send(w_arg, "to_s")) for w_arg in args_w]
-        os.write(self.fd, sep.join(strings))
-        os.write(self.fd, end)
+        strs = []
+        for i, w_arg in enumerate(args_w):
+            if i > 0 and sep:
+                strs.append(sep)
+            strs.append(space.str_w(space.send(w_arg, "to_s")))
+        if end:
+            strs.append(end)
+        self.write_strs(space, strs)
+        return space.w_nil
+
+    def puts_fragments(self, space, w_obj, strs):
+        w_ary = space.w_nil
+        if not isinstance(w_obj, W_StringObject):
+            w_ary = space.convert_type(w_obj, space.w_array, "to_ary", raise_error=False)
+        if w_ary is space.w_nil:
+            if isinstance(w_obj, W_StringObject):
+                data = space.str_w(w_obj)
+            else:
+                data = space.str_w(space.send(w_obj, "to_s"))
+            strs.append(data)
+            if not data.endswith("\n"):
+                strs.append("\n")
+            return
+        with space.getexecutioncontext().recursion_guard("io_puts", w_ary) as in_recursion:
+            if in_recursion:
+                strs.append("[...]\n")
+            else:
+                items_w = space.listview(w_ary)
+                if not items_w:
+                    strs.append("\n")
+                for w_item in items_w:
+                    self.puts_fragments(space, w_item, strs)
+
+    @classdef.method("puts")
+    def method_puts(self, space, args_w):
+        self.ensure_not_closed(space)
+        strs = []
+        if not args_w:
+            strs.append("\n")
+        for w_arg in args_w:
+            self.puts_fragments(space, w_arg, strs)
+        self.write_strs(space, strs)
         return space.w_nil
 
     @classdef.method("getc")
     def method_getc(self, space):
         self.ensure_not_closed(space)
-        try:
-            c = os.read(self.fd, 1)
-        except OSError as e:
-            raise error_for_oserror(space, e)
-        if not c:
+        if not self.rbuffer and not self.fill_read_buffer(space):
             return space.w_nil
-        return space.newstr_fromstr(c)
+        return space.newstr_fromstr(self.read_from_buffer(1))
+
+    @classdef.method("gets")
+    def method_gets(self, space, w_sep=None, w_limit=None):
+        sep, limit = W_IOObject.getline_args(space, w_sep, w_limit)
+        line = self.getline(space, sep, limit)
+        w_line = space.w_nil if line is None else space.newstr_fromstr(line)
+        space.globals.set(space, "$_", w_line)
+        return w_line
+
+    @classdef.method("readline")
+    def method_readline(self, space, w_sep=None, w_limit=None):
+        w_line = self.method_gets(space, w_sep, w_limit)
+        if w_line is space.w_nil:
+            raise space.error(space.w_EOFError, "end of file reached")
+        return w_line
+
+    @classdef.method("each_line")
+    @classdef.method("each")
+    @classdef.method("lines")
+    def method_each_line(self, space, args_w, block):
+        if block is None:
+            return space.send(self, "enum_for", [space.newsymbol("each_line")] + args_w)
+        if len(args_w) > 2:
+            raise space.error(space.w_ArgumentError,
+                "wrong number of arguments (%d for 0..2)" % len(args_w)
+            )
+        w_sep = args_w[0] if len(args_w) > 0 else None
+        w_limit = args_w[1] if len(args_w) > 1 else None
+        sep, limit = W_IOObject.getline_args(space, w_sep, w_limit, "each_line")
+        while True:
+            each_line_driver.jit_merge_point(block_bytecode=block.bytecode)
+            line = self.getline(space, sep, limit)
+            if line is None:
+                break
+            space.invoke_block(block, [space.newstr_fromstr(line)])
+        return self
+
+    @classdef.method("readlines")
+    def method_readlines(self, space, w_sep=None, w_limit=None):
+        sep, limit = W_IOObject.getline_args(space, w_sep, w_limit, "readlines")
+        lines_w = []
+        while True:
+            line = self.getline(space, sep, limit)
+            if line is None:
+                break
+            lines_w.append(space.newstr_fromstr(line))
+        return space.newarray(lines_w)
 
     @classdef.singleton_method("pipe")
     def method_pipe(self, space, block=None):
         r, w = os.pipe()
-        pipes_w = [
-            space.send(self, "new", [space.newint(r)]),
-            space.send(self, "new", [space.newint(w)])
-        ]
+        w_write = space.send(self, "new", [space.newint(w)])
+        # Like MRI, what is written to a pipe goes straight to the reader.
+        if isinstance(w_write, W_IOObject):
+            w_write.sync = True
+        pipes_w = [space.send(self, "new", [space.newint(r)]), w_write]
         if block is not None:
             try:
                 return space.invoke_block(block, pipes_w)
@@ -224,8 +745,12 @@ class W_IOObject(W_Object):
             w_io = space.send(space.getclassfor(W_FileObject), "new", args)
         assert isinstance(w_io, W_IOObject)
         w_io.ensure_not_closed(space)
+        self.flush_or_raise(space)
+        w_io.flush_or_raise(space)
         os.close(self.fd)
         os.dup2(w_io.getfd(), self.fd)
+        self.unregister(space)
+        self.init_buffers()
         return self
 
     @classdef.method("to_io")
@@ -241,8 +766,17 @@ class W_IOObject(W_Object):
     @classdef.method("close")
     def method_close(self, space):
         self.ensure_not_closed(space)
-        os.close(self.fd)
-        self.fd = -1
+        try:
+            try:
+                self.flush_buffer(space)
+            finally:
+                fd = self.fd
+                self.fd = -1
+                self.unregister(space)
+                self.init_buffers()
+                os.close(fd)
+        except OSError as e:
+            raise error_for_oserror(space, e)
         return self
 
     @classdef.method("closed?")
@@ -252,6 +786,7 @@ class W_IOObject(W_Object):
     @classdef.method("stat")
     def method_stat(self, space):
         from topaz.objects.fileobject import W_FileStatObject
+        self.flush_or_raise(space)
         try:
             stat_val = os.fstat(self.fd)
         except OSError as e:
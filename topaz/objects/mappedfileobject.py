@@ -0,0 +1,138 @@
+import os
+
+from rpython.rlib import rmmap
+from rpython.rlib.rmmap import RValueError, RTypeError
+
+from topaz.coerce import Coerce
+from topaz.error import error_for_oserror
+from topaz.module import ClassDef
+from topaz.objects.objectobject import W_Object
+from topaz.objects.stringobject import W_StringObject
+
+
+class MappedRegion(object):
+    """
+    A read-only mapping of a whole file. It is unmapped once neither the
+    MappedFile nor any string made from it refers to it any more.
+    """
+
+    def __init__(self, mmap, size):
+        self.mmap = mmap
+        self.size = size
+
+    def __del__(self):
+        self.mmap.close()
+
+    def getitem(self, idx):
+        return self.mmap.getitem(idx)
+
+    def getslice(self, start, length):
+        return self.mmap.getslice(start, length)
+
+    def find(self, sub, start):
+        return self.mmap.find(sub, start, self.size)
+
+
+class W_MappedFileObject(W_Object):
+    classdef = ClassDef("MappedFile", W_Object.classdef)
+
+    def __init__(self, space):
+        W_Object.__init__(self, space)
+        self.region = None
+        self.size = 0
+        self.closed = False
+
+    def map_fd(self, space, fd):
+        try:
+            size = os.fstat(fd).st_size
+        except OSError as e:
+            raise error_for_oserror(space, e)
+        self.size = int(size)
+        self.closed = False
+        # Empty files can't be mapped, they simply have no region.
+        if self.size > 0:
+            try:
+                mmap = rmmap.mmap(fd, self.size, flags=rmmap.MAP_SHARED, prot=rmmap.PROT_READ)
+            except OSError as e:
+                raise error_for_oserror(space, e)
+            except (RValueError, RTypeError):
+                raise space.error(space.w_IOError, "cannot map file")
+            self.region = MappedRegion(mmap, self.size)
+
+    def ensure_not_closed(self, space):
+        if self.closed:
+            raise space.error(space.w_IOError, "closed mapping")
+
+    def newstr(self, space, start, end):
+        if start == end:
+            return space.newstr_fromstr("")
+        return W_StringObject.newstr_frommapped(space, self.region, start, end)
+
+    @classdef.singleton_method("allocate")
+    def method_allocate(self, space):
+        return W_MappedFileObject(space)
+
+    @classdef.method("initialize")
+    def method_initialize(self, space, w_path):
+        path = Coerce.path(space, w_path)
+        try:
+            fd = os.open(path, os.O_RDONLY, 0)
+        except OSError as e:
+            raise error_for_oserror(space, e)
+        try:
+            self.map_fd(space, fd)
+        finally:
+            os.close(fd)
+        return self
+
+    @classdef.method("size")
+    @classdef.method("length")
+    def method_size(self, space):
+        self.ensure_not_closed(space)
+        return space.newint(self.size)
+
+    @classdef.method("to_s")
+    @classdef.method("to_str")
+    def method_to_s(self, space):
+        self.ensure_not_closed(space)
+        return self.newstr(space, 0, self.size)
+
+    @classdef.method("[]")
+    def method_subscript(self, space, w_idx, w_count=None):
+        self.ensure_not_closed(space)
+        start, end, as_range, nil = space.subscript_access(self.size, w_idx, w_count=w_count)
+        if nil:
+            return space.w_nil
+        elif as_range:
+            assert start >= 0
+            assert end >= start
+            return self.newstr(space, start, end)
+        else:
+            return space.newstr_fromstr(self.region.getitem(start))
+
+    @classdef.method("index", sub="str", offset="int")
+    def method_index(self, space, sub, offset=0):
+        self.ensure_not_closed(space)
+        if offset < 0:
+            offset += self.size
+        if offset < 0 or offset > self.size:
+            return space.w_nil
+        if not sub:
+            return space.newint(offset)
+        if self.region is None:
+            return space.w_nil
+        idx = self.region.find(sub, offset)
+        return space.w_nil if idx < 0 else space.newint(idx)
+
+    @classdef.method("close")
+    def method_close(self, space):
+        self.ensure_not_closed(space)
+        # Strings taken from the mapping keep it alive, so only this object
+        # lets go of it.
+        self.region = None
+        self.closed = True
+        return space.w_nil
+
+    @classdef.method("closed?")
+    def method_closedp(self, space):
+        return space.newbool(self.closed)
@@ -5,13 +5,31 @@ from rpython.rlib.objectmodel import specialize
 
 from topaz.celldict import CellDict, VersionTag
 from topaz.coerce import Coerce
+from topaz.error import RubyError
 from topaz.module import ClassDef, check_frozen
 from topaz.objects.functionobject import W_FunctionObject
-from topaz.objects.objectobject import W_RootObject
+from topaz.objects.objectobject import W_Root, W_RootObject
 from topaz.objects.procobject import W_ProcObject
 from topaz.scope import StaticScope
 
 
+class AutoloadConstant(W_Root):
+    """
+    Holds the place of a constant registered with Module#autoload, until the
+    first lookup requires its file.
+    """
+    _attrs_ = ["path"]
+    _immutable_fields_ = ["path"]
+
+    def __init__(self, path):
+        self.path = path
+
+    def __deepcopy__(self, memo):
+        obj = super(AutoloadConstant, self).__deepcopy__(memo)
+        obj.path = self.path
+        return obj
+
+
 class AttributeReader(W_FunctionObject):
     _immutable_fields_ = ["varname"]
 
@@ -243,6 +261,23 @@ class W_ModuleObject(W_RootObject):
         return self.local_constants(space)
 
     def find_local_const(self, space, name):
+        w_res = self._find_const_pure(name, self.version)
+        if isinstance(w_res, AutoloadConstant):
+            w_res = self.autoload_const(space, name, w_res)
+        return w_res
+
+    def autoload_const(self, space, name, w_autoload):
+        # The constant is gone while its file loads, so that the file can
+        # define it and lookups from it don't load it again.
+        del self.constants_w[name]
+        self.mutated()
+        try:
+            space.send(space.w_kernel, "require", [space.newstr_fromstr(w_autoload.path)])
+        except RubyError:
+            if name not in self.constants_w:
+                self.constants_w[name] = w_autoload
+                self.mutated()
+            raise
         return self._find_const_pure(name, self.version)
 
     @jit.elidable
@@ -612,7 +647,7 @@ class W_ModuleObject(W_RootObject):
         if inherit:
             return space.newbool(self.find_const(space, const) is not None)
         else:
-            return space.newbool(self.find_local_const(space, const) is not None)
+            return space.newbool(self._find_const_pure(const, self.version) is not None)
 
     @classdef.method("const_get", const="symbol", inherit="bool")
     def method_const_get(self, space, const, inherit=True):
@@ -633,7 +668,7 @@ class W_ModuleObject(W_RootObject):
     @classdef.method("remove_const", name="str")
     def method_remove_const(self, space, name):
         space._check_const_name(name)
-        w_res = self.find_local_const(space, name)
+        w_res = self._find_const_pure(name, self.version)
         if w_res is None:
             self_name = space.obj_to_s(self)
             raise space.error(space.w_NameError,
@@ -641,8 +676,27 @@ class W_ModuleObject(W_RootObject):
             )
         del self.constants_w[name]
         self.mutated()
+        if isinstance(w_res, AutoloadConstant):
+            return space.w_nil
         return w_res
 
+    @classdef.method("autoload", name="symbol", path="path")
+    def method_autoload(self, space, name, path):
+        space._check_const_name(name)
+        if not path:
+            raise space.error(space.w_ArgumentError, "empty file name")
+        if self._find_const_pure(name, self.version) is None:
+            self.constants_w[name] = AutoloadConstant(path)
+            self.mutated()
+        return space.w_nil
+
+    @classdef.method("autoload?", name="symbol")
+    def method_autoloadp(self, space, name):
+        w_res = self._find_const_pure(name, self.version)
+        if isinstance(w_res, AutoloadConstant):
+            return space.newstr_fromstr(w_res.path)
+        return space.w_nil
+
     @classdef.method("class_variable_defined?", name="symbol")
     def method_class_variable_definedp(self, space, name):
         return space.newbool(self.find_class_var(space, name) is not None)
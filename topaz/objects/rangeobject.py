@@ -1,17 +1,62 @@
+from rpython.rlib.rarithmetic import ovfcheck
+from rpython.rlib.rbigint import rbigint
+
 from topaz.module import ClassDef
 from topaz.modules.enumerable import Enumerable
+from topaz.objects.intobject import W_FixnumObject
 from topaz.objects.objectobject import W_Object
+from topaz.utils.blockdriver import make_block_driver
+
+
+each_driver = make_block_driver("Range#each")
+step_driver = make_block_driver("Range#step")
+map_driver = make_block_driver("Range#map")
 
 
 class W_RangeObject(W_Object):
     classdef = ClassDef("Range", W_Object.classdef)
     classdef.include_module(Enumerable)
+    Enumerable.include_native_methods(classdef)
 
     def __init__(self, space, w_start, w_end, exclusive):
         W_Object.__init__(self, space)
         self.w_start = w_start
         self.w_end = w_end
         self.exclusive = exclusive
+        self._init_int_range()
+
+    def _init_int_range(self):
+        # Ranges between two Fixnums keep their bounds unboxed, as the
+        # inclusive [int_first, int_last]. Empty ranges are normalized to
+        # [0, -1], which avoids overflowing on an exclusive end of -maxint-1.
+        w_start = self.w_start
+        w_end = self.w_end
+        self.int_range = isinstance(w_start, W_FixnumObject) and isinstance(w_end, W_FixnumObject)
+        self.int_first = 0
+        self.int_last = -1
+        if self.int_range:
+            assert isinstance(w_start, W_FixnumObject)
+            assert isinstance(w_end, W_FixnumObject)
+            first = w_start.intvalue
+            last = w_end.intvalue
+            if self.exclusive:
+                if last <= first:
+                    return
+                last -= 1
+            if first <= last:
+                self.int_first = first
+                self.int_last = last
+
+    def int_size(self):
+        """
+        Returns the number of elements in an integer range, as an rbigint since
+        it may not fit in a Fixnum.
+        """
+        return rbigint.fromint(self.int_last).sub(rbigint.fromint(self.int_first)).add(rbigint.fromint(1))
+
+    def call_generic(self, space, name, args_w, block=None):
+        w_topaz_range = space.find_const(space.w_topaz, "Range")
+        return space.send(w_topaz_range, name, [self] + args_w, block)
 
     @classdef.singleton_method("allocate")
     def method_allocate(self, space):
@@ -27,6 +72,7 @@ class W_RangeObject(W_Object):
         self.w_start = w_start
         self.w_end = w_end
         self.exclusive = excl
+        self._init_int_range()
 
     @classdef.method("begin")
     def method_begin(self, space):
@@ -39,3 +85,142 @@ class W_RangeObject(W_Object):
     @classdef.method("exclude_end?")
     def method_exclude_end(self, space):
         return space.newbool(self.exclusive)
+
+    @classdef.method("each")
+    def method_each(self, space, block):
+        if block is None:
+            return space.send(self, "enum_for", [space.newsymbol("each")])
+        if not self.int_range:
+            return self.call_generic(space, "each", [], block)
+        i = self.int_first
+        last = self.int_last
+        while i <= last:
+            each_driver.jit_merge_point(block_bytecode=block.bytecode)
+            space.invoke_block(block, [space.newint(i)])
+            if i == last:
+                break
+            i += 1
+        return self
+
+    @classdef.method("step")
+    def method_step(self, space, w_step=None, block=None):
+        if w_step is None:
+            w_step = space.newint(1)
+        if block is None or not self.int_range or not isinstance(w_step, W_FixnumObject):
+            return self.call_generic(space, "step", [w_step], block)
+        step = w_step.intvalue
+        if step < 0:
+            raise space.error(space.w_ArgumentError, "step can't be negative")
+        elif step == 0:
+            raise space.error(space.w_ArgumentError, "step can't be 0")
+        i = self.int_first
+        last = self.int_last
+        while i <= last:
+            step_driver.jit_merge_point(block_bytecode=block.bytecode)
+            space.invoke_block(block, [space.newint(i)])
+            try:
+                i = ovfcheck(i + step)
+            except OverflowError:
+                break
+        return self
+
+    @classdef.method("map")
+    @classdef.method("collect")
+    def method_map(self, space, block):
+        if block is None or not self.int_range:
+            return Enumerable.send_generic(space, self, "map", [], block)
+        result_w = []
+        i = self.int_first
+        last = self.int_last
+        while i <= last:
+            map_driver.jit_merge_point(block_bytecode=block.bytecode)
+            result_w.append(space.invoke_block(block, [space.newint(i)]))
+            if i == last:
+                break
+            i += 1
+        return space.newarray(result_w)
+
+    @classdef.method("to_a")
+    @classdef.method("entries")
+    def method_to_a(self, space):
+        if not self.int_range:
+            return Enumerable.send_generic(space, self, "to_a", [], None)
+        items_w = []
+        i = self.int_first
+        while i <= self.int_last:
+            items_w.append(space.newint(i))
+            if i == self.int_last:
+                break
+            i += 1
+        return space.newarray(items_w)
+
+    @classdef.method("size")
+    def method_size(self, space):
+        if not self.int_range:
+            return space.w_nil
+        try:
+            return space.newint(ovfcheck(self.int_last - self.int_first + 1))
+        except OverflowError:
+            return space.newbigint_fromrbigint(self.int_size())
+
+    @classdef.method("sum")
+    def method_sum(self, space, w_init=None, block=None):
+        if w_init is None:
+            w_init = space.newint(0)
+        if block is not None or not self.int_range or not isinstance(w_init, W_FixnumObject):
+            return Enumerable.send_generic(space, self, "sum", [w_init], block)
+        first = rbigint.fromint(self.int_first)
+        last = rbigint.fromint(self.int_last)
+        total = self.int_size().mul(first.add(last)).floordiv(rbigint.fromint(2))
+        total = total.add(rbigint.fromint(w_init.intvalue))
+        try:
+            return space.newint(total.toint())
+        except OverflowError:
+            return space.newbigint_fromrbigint(total)
+
+    @classdef.method("first")
+    def method_first(self, space, w_n=None):
+        if w_n is None:
+            return self.w_start
+        if not self.int_range:
+            return space.send(self, "take", [w_n])
+        n = space.int_w(space.convert_type(w_n, space.w_fixnum, "to_int"))
+        if n < 0:
+            raise space.error(space.w_ArgumentError, "attempt to take negative size")
+        items_w = []
+        i = self.int_first
+        while i <= self.int_last and len(items_w) < n:
+            items_w.append(space.newint(i))
+            if i == self.int_last:
+                break
+            i += 1
+        return space.newarray(items_w)
+
+    @classdef.method("min")
+    def method_min(self, space, block):
+        if block is not None:
+            return Enumerable.send_generic(space, self, "min", [], block)
+        if not self.int_range:
+            return self.call_generic(space, "min", [])
+        if self.int_first > self.int_last:
+            return space.w_nil
+        return space.newint(self.int_first)
+
+    @classdef.method("max")
+    def method_max(self, space, block):
+        if block is not None or (self.exclusive and not space.is_kind_of(self.w_end, space.w_numeric)):
+            return Enumerable.send_generic(space, self, "max", [], block)
+        if not self.int_range:
+            return self.call_generic(space, "max", [])
+        if self.int_first > self.int_last:
+            return space.w_nil
+        return space.newint(self.int_last)
+
+    @classdef.method("include?")
+    @classdef.method("member?")
+    @classdef.method("cover?")
+    @classdef.method("===")
+    def method_includep(self, space, w_value):
+        if not self.int_range or not isinstance(w_value, W_FixnumObject):
+            return self.call_generic(space, "include?", [w_value])
+        return space.newbool(self.int_first <= w_value.intvalue <= self.int_last)
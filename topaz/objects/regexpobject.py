@@ -315,7 +315,7 @@ class W_MatchDataObject(W_Object):
         else:
             return space.w_nil
         if 0 <= start <= end:
-            return space.newstr_fromstr(self.ctx._string[start:end])
+            return space.newstr_fromslice(self.ctx._string, start, end)
         else:
             return space.w_nil
 
@@ -360,13 +360,12 @@ class W_MatchDataObject(W_Object):
 
     @classdef.method("pre_match")
     def method_pre_match(self, space):
-        stop = self.ctx.match_start
-        assert stop > 0
-        return space.newstr_fromstr(self.ctx._string[:stop])
+        return space.newstr_fromslice(self.ctx._string, 0, self.ctx.match_start)
 
     @classdef.method("post_match")
     def method_post_match(self, space):
-        return space.newstr_fromstr(self.ctx._string[self.ctx.match_end:])
+        string = self.ctx._string
+        return space.newstr_fromslice(string, self.ctx.match_end, len(string))
 
     @classdef.method("values_at")
     def method_values_at(self, space, args_w):
@@ -4,17 +4,18 @@ import math
 
 from rpython.rlib import jit
 from rpython.rlib.objectmodel import newlist_hint, compute_hash
-from rpython.rlib.rarithmetic import intmask, ovfcheck
+from rpython.rlib.rarithmetic import ovfcheck
 from rpython.rlib.rbigint import rbigint
 from rpython.rlib.rerased import new_static_erasing_pair
+from rpython.rlib.rweakref import RWeakValueDictionary
 from rpython.rlib.rsre import rsre_core
-from rpython.rlib.rstring import split
 
 from topaz.coerce import Coerce
 from topaz.module import ClassDef, check_frozen
 from topaz.modules.comparable import Comparable
 from topaz.objects.objectobject import W_Object
 from topaz.utils.formatting import StringFormatter
+from topaz.utils.search import SearcherCache
 
 
 RADIX_MAP = {
@@ -31,6 +32,14 @@ RADIX_MAP = {
     "b": 2,
 }
 
+# Slices shorter than this are always copied, copying them is cheaper than
+# keeping track of the parent.
+SLICE_MIN_LENGTH = 64
+# A slice only shares its parent's storage if it covers at least
+# 1 / SLICE_MAX_WASTE of it, so small slices of huge strings don't keep the
+# whole parent alive.
+SLICE_MAX_WASTE = 4
+
 
 def create_trans_table(source, replacement, inv=False):
     src = expand_trans_str(source, len(source), inv)
@@ -96,7 +105,7 @@ class ConstantStringStrategy(StringStrategy):
         return self.unerase(storage)[idx]
 
     def getslice(self, space, storage, start, end):
-        return space.newstr_fromstr(self.unerase(storage)[start:end])
+        return space.newstr_fromslice(self.unerase(storage), start, end)
 
     def hash(self, storage):
         return compute_hash(self.unerase(storage))
@@ -107,6 +116,7 @@ class ConstantStringStrategy(StringStrategy):
     def to_mutable(self, space, s):
         s.strategy = strategy = space.fromcache(MutableStringStrategy)
         s.str_storage = strategy.erase(self.liststr_w(s.str_storage))
+        s.hash_cache = 0
 
     def extend_into(self, src_storage, dst_storage):
         dst_storage += self.unerase(src_storage)
@@ -115,6 +125,143 @@ class ConstantStringStrategy(StringStrategy):
         return space.newstr_fromstr(self.unerase(storage) * times)
 
 
+class StringSlice(object):
+    def __init__(self, string, start, end):
+        self.string = string
+        self.start = start
+        self.end = end
+
+    def length(self):
+        return self.end - self.start
+
+    def getstr(self):
+        if self.start != 0 or self.end != len(self.string):
+            start = self.start
+            end = self.end
+            assert start >= 0
+            assert end >= 0
+            # Once someone needs the flat string, keep it and drop the
+            # reference to the parent.
+            self.string = self.string[start:end]
+            self.start = 0
+            self.end = len(self.string)
+        return self.string
+
+
+class SliceStringStrategy(StringStrategy):
+    erase, unerase = new_static_erasing_pair("slice")
+
+    def str_w(self, storage):
+        return self.unerase(storage).getstr()
+
+    def liststr_w(self, storage):
+        strvalue = self.str_w(storage)
+        return [c for c in strvalue]
+
+    def length(self, storage):
+        return self.unerase(storage).length()
+
+    def getitem(self, storage, idx):
+        view = self.unerase(storage)
+        return view.string[view.start + idx]
+
+    def getslice(self, space, storage, start, end):
+        view = self.unerase(storage)
+        return space.newstr_fromslice(view.string, view.start + start, view.start + end)
+
+    def hash(self, storage):
+        return compute_hash(self.str_w(storage))
+
+    def copy(self, storage):
+        return storage
+
+    def to_mutable(self, space, s):
+        s.strategy = strategy = space.fromcache(MutableStringStrategy)
+        s.str_storage = strategy.erase(self.liststr_w(s.str_storage))
+        s.hash_cache = 0
+
+    def extend_into(self, src_storage, dst_storage):
+        view = self.unerase(src_storage)
+        for i in xrange(view.start, view.end):
+            dst_storage.append(view.string[i])
+
+    def mul(self, space, storage, times):
+        return space.newstr_fromstr(self.str_w(storage) * times)
+
+
+class MappedSlice(object):
+    """
+    A range of a memory-mapped file (see topaz.objects.mappedfileobject),
+    read straight from the mapping until someone needs the flat string.
+    """
+
+    def __init__(self, region, start, end):
+        self.region = region
+        self.start = start
+        self.end = end
+        self.string = None
+
+    def length(self):
+        return self.end - self.start
+
+    def getitem(self, idx):
+        if self.string is not None:
+            return self.string[idx]
+        return self.region.getitem(self.start + idx)
+
+    def getstr(self):
+        if self.string is None:
+            self.string = self.region.getslice(self.start, self.end - self.start)
+            # The copy doesn't need the mapping to stay alive any more.
+            self.region = None
+        return self.string
+
+
+class MappedStringStrategy(StringStrategy):
+    erase, unerase = new_static_erasing_pair("mapped")
+
+    def str_w(self, storage):
+        return self.unerase(storage).getstr()
+
+    def liststr_w(self, storage):
+        strvalue = self.str_w(storage)
+        return [c for c in strvalue]
+
+    def length(self, storage):
+        return self.unerase(storage).length()
+
+    def getitem(self, storage, idx):
+        return self.unerase(storage).getitem(idx)
+
+    def getslice(self, space, storage, start, end):
+        view = self.unerase(storage)
+        if view.string is not None:
+            return space.newstr_fromslice(view.string, start, end)
+        elif end - start < SLICE_MIN_LENGTH:
+            return space.newstr_fromstr(view.region.getslice(view.start + start, end - start))
+        return W_StringObject.newstr_frommapped(space, view.region, view.start + start, view.start + end)
+
+    def hash(self, storage):
+        return compute_hash(self.str_w(storage))
+
+    def copy(self, storage):
+        return storage
+
+    def to_mutable(self, space, s):
+        # Copy on write, the mapping itself is read-only.
+        s.strategy = strategy = space.fromcache(MutableStringStrategy)
+        s.str_storage = strategy.erase(self.liststr_w(s.str_storage))
+        s.hash_cache = 0
+
+    def extend_into(self, src_storage, dst_storage):
+        view = self.unerase(src_storage)
+        for i in xrange(view.length()):
+            dst_storage.append(view.getitem(i))
+
+    def mul(self, space, storage, times):
+        return space.newstr_fromstr(self.str_w(storage) * times)
+
+
 class MutableStringStrategy(StringStrategy):
     erase, unerase = new_static_erasing_pair("mutable")
 
@@ -137,23 +284,14 @@ class MutableStringStrategy(StringStrategy):
         del self.unerase(storage)[start:end]
 
     def hash(self, storage):
-        storage = self.unerase(storage)
-        length = len(storage)
-        if length == 0:
-            return -1
-        x = ord(storage[0]) << 7
-        i = 0
-        while i < length:
-            x = intmask((1000003 * x) ^ ord(storage[i]))
-            i += 1
-        x ^= length
-        return intmask(x)
+        return compute_hash(self.str_w(storage))
 
     def copy(self, storage):
         return self.erase(self.unerase(storage)[:])
 
     def to_mutable(self, space, s):
-        pass
+        # Every in-place modification goes through here.
+        s.hash_cache = 0
 
     def extend_into(self, src_storage, dst_storage):
         dst_storage += self.unerase(src_storage)
@@ -359,6 +497,32 @@ class MutableStringStrategy(StringStrategy):
             return False
 
 
+class StringInternTable(object):
+    """
+    Maps the contents of frozen strings to one frozen string with those
+    contents, so equal frozen strings (e.g. Hash keys) share their storage
+    and hash.
+    """
+
+    def __init__(self, space):
+        self.strings_w = RWeakValueDictionary(str, W_StringObject)
+
+    def __deepcopy__(self, memo):
+        memo[id(self)] = result = object.__new__(self.__class__)
+        result.strings_w = RWeakValueDictionary(str, W_StringObject)
+        return result
+
+    def intern(self, space, w_str):
+        strvalue = w_str.str_w(space)
+        w_canonical = self.strings_w.get(strvalue)
+        if w_canonical is None:
+            self.strings_w.set(strvalue, w_str)
+            w_canonical = w_str
+        w_str.strategy = strategy = space.fromcache(ConstantStringStrategy)
+        w_str.str_storage = strategy.erase(w_canonical.str_w(space))
+        w_str.hash_cache = w_canonical.hash(space)
+
+
 class W_StringObject(W_Object):
     classdef = ClassDef("String", W_Object.classdef)
     classdef.include_module(Comparable)
@@ -367,11 +531,15 @@ class W_StringObject(W_Object):
         W_Object.__init__(self, space, klass)
         self.str_storage = storage
         self.strategy = strategy
+        self.hash_cache = 0
+        self.searcher = None
 
     def __deepcopy__(self, memo):
         obj = super(W_StringObject, self).__deepcopy__(memo)
         obj.str_storage = copy.deepcopy(self.str_storage, memo)
         obj.strategy = copy.deepcopy(self.strategy, memo)
+        obj.hash_cache = self.hash_cache
+        obj.searcher = None
         return obj
 
     @staticmethod
@@ -380,6 +548,33 @@ class W_StringObject(W_Object):
         storage = strategy.erase(strvalue)
         return W_StringObject(space, storage, strategy)
 
+    @staticmethod
+    def newstr_fromslice(space, strvalue, start, end):
+        """
+        Returns the substring strvalue[start:end], sharing strvalue instead of
+        copying if the slice is big enough for that to pay off.
+        """
+        assert start >= 0
+        assert end >= start
+        length = end - start
+        if length == len(strvalue):
+            return W_StringObject.newstr_fromstr(space, strvalue)
+        elif length < SLICE_MIN_LENGTH or length * SLICE_MAX_WASTE < len(strvalue):
+            return W_StringObject.newstr_fromstr(space, strvalue[start:end])
+        strategy = space.fromcache(SliceStringStrategy)
+        storage = strategy.erase(StringSlice(strvalue, start, end))
+        return W_StringObject(space, storage, strategy)
+
+    @staticmethod
+    def newstr_frommapped(space, region, start, end):
+        """
+        Returns a string of the bytes [start, end) of a MappedRegion, read from
+        the mapping rather than copied up front.
+        """
+        strategy = space.fromcache(MappedStringStrategy)
+        storage = strategy.erase(MappedSlice(region, start, end))
+        return W_StringObject(space, storage, strategy)
+
     @staticmethod
     @jit.look_inside_iff(lambda space, strs_w: jit.isconstant(len(strs_w)))
     def newstr_fromstrs(space, strs_w):
@@ -412,6 +607,14 @@ class W_StringObject(W_Object):
     def length(self):
         return self.strategy.length(self.str_storage)
 
+    def hash(self, space):
+        # 0 means "not computed yet"; a string whose hash really is 0 just
+        # isn't cached.
+        h = self.hash_cache
+        if h == 0:
+            h = self.hash_cache = self.strategy.hash(self.str_storage)
+        return h
+
     def copy(self, space):
         return W_StringObject(space, self.strategy.copy(self.str_storage), self.strategy)
 
@@ -419,6 +622,7 @@ class W_StringObject(W_Object):
         strategy = space.fromcache(MutableStringStrategy)
         self.str_storage = strategy.erase(chars)
         self.strategy = strategy
+        self.hash_cache = 0
 
     def extend(self, space, w_other):
         self.strategy.to_mutable(space, self)
@@ -475,6 +679,7 @@ class W_StringObject(W_Object):
             assert isinstance(w_s, W_StringObject)
             self.strategy = w_s.strategy
             self.str_storage = w_s.strategy.copy(w_s.str_storage)
+            self.hash_cache = 0
         return self
 
     @classdef.method("initialize_copy")
@@ -482,6 +687,14 @@ class W_StringObject(W_Object):
         assert isinstance(w_other, W_StringObject)
         self.strategy = w_other.strategy
         self.str_storage = w_other.strategy.copy(w_other.str_storage)
+        self.hash_cache = 0
+        return self
+
+    @classdef.method("freeze")
+    def method_freeze(self, space):
+        if not space.is_true(self.get_flag(space, "frozen?")):
+            space.fromcache(StringInternTable).intern(space, self)
+            self.set_flag(space, "frozen?")
         return self
 
     @classdef.method("to_str")
@@ -542,7 +755,7 @@ class W_StringObject(W_Object):
 
     @classdef.method("hash")
     def method_hash(self, space):
-        return space.newint(self.strategy.hash(self.str_storage))
+        return space.newint(self.hash(space))
 
     @classdef.method("[]")
     @classdef.method("slice")
@@ -577,6 +790,12 @@ class W_StringObject(W_Object):
             self.strategy.delslice(space, self.str_storage, start, start + 1)
             return w_string
 
+    @classdef.method("eql?")
+    def method_eqlp(self, space, w_other):
+        return space.newbool(
+            isinstance(w_other, W_StringObject) and self.str_w(space) == w_other.str_w(space)
+        )
+
     @classdef.method("<=>")
     def method_comparator(self, space, w_other):
         if isinstance(w_other, W_StringObject):
@@ -644,12 +863,24 @@ class W_StringObject(W_Object):
         except rsre_core.Error, e:
             raise space.error(space.w_RuntimeError, e.msg)
 
+    def get_searcher(self, space):
+        """
+        Returns a searcher for this string used as a pattern. It is kept on the
+        string until its contents change.
+        """
+        needle = space.str_w(self)
+        searcher = self.searcher
+        if searcher is None or searcher.needle != needle:
+            searcher = self.searcher = space.fromcache(SearcherCache).get(needle)
+        return searcher
+
     @classdef.method("index", offset="int")
     def method_index(self, space, w_sub, offset=0):
         if offset < 0 or offset >= self.length():
             return space.w_nil
         elif space.is_kind_of(w_sub, space.w_string):
-            return space.newint(space.str_w(self).find(space.str_w(w_sub), offset))
+            string = space.str_w(self)
+            return space.newint(w_sub.get_searcher(space).find(string, offset, len(string)))
         elif space.is_kind_of(w_sub, space.w_regexp):
             ctx = w_sub.make_ctx(space.str_w(self), offset=offset)
             if self.search_context(space, ctx):
@@ -673,7 +904,8 @@ class W_StringObject(W_Object):
 
         idx = -1
         if space.is_kind_of(w_sub, space.w_string):
-            idx = space.str_w(self).rfind(space.str_w(w_sub), 0, end + 1)
+            string = space.str_w(self)
+            idx = w_sub.get_searcher(space).rfind(string, 0, end + 1)
         elif space.is_kind_of(w_sub, space.w_regexp):
             ctx = w_sub.make_ctx(space.str_w(self))
             idx = -1
@@ -714,15 +946,13 @@ class W_StringObject(W_Object):
                     while j < len(s) and not s[j].isspace():
                         j += 1
                     limit -= 1
-                res_w.append(space.newstr_fromstr(s[i:j]))
+                res_w.append(space.newstr_fromslice(s, i, j))
                 i = j + 1
             return space.newarray(res_w)
         elif space.is_kind_of(w_sep, space.w_string):
             sep = space.str_w(w_sep)
             if sep:
-                return space.newarray([
-                    space.newstr_fromstr(s) for s in split(space.str_w(self), sep, limit - 1)
-                ])
+                return space.newarray(self.split_string(space, w_sep.get_searcher(space), limit - 1))
             else:
                 if limit:
                     raise space.error(space.w_NotImplementedError, "String#split with empty string and limit")
@@ -747,20 +977,20 @@ class W_StringObject(W_Object):
                     results_w.append(space.newstr_fromstr(string[last]))
                     last = ctx.match_end + 1
                 else:
-                    results_w.append(space.newstr_fromstr(string[last:ctx.match_start]))
+                    results_w.append(space.newstr_fromslice(string, last, ctx.match_start))
                     for num in xrange(1, w_match.size(), 1):
                         begin, end = w_match.get_span(num)
                         begin += last
                         end += last
                         assert begin >= 0
                         assert end >= 0
-                        results_w.append(space.newstr_fromstr(string[begin:end]))
+                        results_w.append(space.newstr_fromslice(string, begin, end))
                     last = ctx.match_end
                 n += 1
                 ctx.reset(last)
 
             if len(string) > last:
-                results_w.append(space.newstr_fromstr(string[last:]))
+                results_w.append(space.newstr_fromslice(string, last, len(string)))
             if limit < 0 or len(results_w) < limit:
                 results_w.append(space.newstr_fromstr(""))
             return space.newarray(results_w)
@@ -773,6 +1003,20 @@ class W_StringObject(W_Object):
                 )
             )
 
+    def split_string(self, space, searcher, maxsplit):
+        s = space.str_w(self)
+        res_w = []
+        start = 0
+        while maxsplit != 0:
+            idx = searcher.find(s, start, len(s))
+            if idx < 0:
+                break
+            res_w.append(space.newstr_fromslice(s, start, idx))
+            start = idx + len(searcher.needle)
+            maxsplit -= 1
+        res_w.append(space.newstr_fromslice(s, start, len(s)))
+        return res_w
+
     @classdef.method("swapcase!")
     @check_frozen()
     def method_swapcase_i(self, space):
@@ -997,14 +1241,17 @@ class W_StringObject(W_Object):
 
     @classdef.method("include?", substr="str")
     def method_includep(self, space, substr):
-        return space.newbool(substr in space.str_w(self))
+        string = space.str_w(self)
+        searcher = space.fromcache(SearcherCache).get(substr)
+        return space.newbool(searcher.find(string, 0, len(string)) >= 0)
 
     def scan_string(self, space, w_pattern):
         string = space.str_w(self)
-        pattern = space.str_w(w_pattern)
-        idx = string.find(pattern, 0)
+        searcher = w_pattern.get_searcher(space)
+        pattern = searcher.needle
+        idx = searcher.find(string, 0, len(string))
         while idx >= 0:
-            w_match = space.newstr_fromstr(string[idx:idx + len(pattern)])
+            w_match = space.newstr_fromslice(string, idx, idx + len(pattern))
             space.infect(w_match, self)
             space.infect(w_match, w_pattern)
             yield w_match
@@ -1012,7 +1259,7 @@ class W_StringObject(W_Object):
                 idx += 1
             else:
                 idx += len(pattern)
-            idx = string.find(pattern, idx)
+            idx = searcher.find(string, idx, len(string))
 
     def scan_regexp(self, space, w_pattern):
         last = -1
@@ -1027,13 +1274,13 @@ class W_StringObject(W_Object):
                     begin, end = w_matchdata.get_span(num)
                     assert begin >= 0
                     assert end >= 0
-                    w_str = space.newstr_fromstr(string[begin:end])
+                    w_str = space.newstr_fromslice(string, begin, end)
                     space.infect(w_str, self)
                     space.infect(w_str, w_pattern)
                     matches_w.append(w_str)
                 w_match = space.newarray(matches_w)
             else:
-                w_match = space.newstr_fromstr(string[ctx.match_start:ctx.match_end])
+                w_match = space.newstr_fromslice(string, ctx.match_start, ctx.match_end)
                 space.infect(w_match, self)
                 space.infect(w_match, w_pattern)
 
@@ -1169,23 +1416,29 @@ class W_StringObject(W_Object):
         result = []
         pos = 0
         string = space.str_w(self)
-        pattern = space.str_w(w_pattern)
-        while pos + len(pattern) < len(string):
-            idx = string.find(pattern, pos)
-            if idx >= 0:
-                result += string[pos:idx]
-                if replacement is not None:
-                    result += replacement
-                elif block:
-                    result += self.gsub_yield_block(space, block, w_pattern)
-                elif w_hash:
-                    result += self.gsub_lookup_hash(space, w_hash, w_pattern)
-                pos = idx + len(pattern)
-            else:
+        searcher = w_pattern.get_searcher(space)
+        pattern = searcher.needle
+        while pos <= len(string):
+            idx = searcher.find(string, pos, len(string))
+            if idx < 0:
                 break
+            result += string[pos:idx]
+            if replacement is not None:
+                result += replacement
+            elif block:
+                result += self.gsub_yield_block(space, block, w_pattern)
+            elif w_hash:
+                result += self.gsub_lookup_hash(space, w_hash, w_pattern)
+            if not pattern:
+                if idx < len(string):
+                    result.append(string[idx])
+                pos = idx + 1
+            else:
+                pos = idx + len(pattern)
             if first_only:
                 break
-        result += string[pos:]
+        if pos < len(string):
+            result += string[pos:]
         return space.newstr_fromchars(result)
 
     def gsub_yield_block(self, space, block, w_matchstr):
@@ -0,0 +1,226 @@
+import copy
+
+from rpython.rlib.rarithmetic import intmask
+
+from topaz.module import ClassDef, check_frozen
+from topaz.modules.enumerable import Enumerable
+from topaz.objects.classobject import W_ClassObject
+from topaz.objects.functionobject import W_FunctionObject
+from topaz.objects.objectobject import W_Object
+
+
+class StructAllocator(W_FunctionObject):
+    _immutable_fields_ = ["size"]
+
+    def __init__(self, size):
+        W_FunctionObject.__init__(self, "allocate")
+        self.size = size
+
+    def __deepcopy__(self, memo):
+        obj = super(W_FunctionObject, self).__deepcopy__(memo)
+        obj.size = self.size
+        return obj
+
+    def call(self, space, w_cls, args_w, block):
+        assert isinstance(w_cls, W_ClassObject)
+        return W_StructObject(space, w_cls, self.size)
+
+
+class StructMemberReader(W_FunctionObject):
+    _immutable_fields_ = ["index"]
+
+    def __init__(self, name, index):
+        W_FunctionObject.__init__(self, name)
+        self.index = index
+
+    def __deepcopy__(self, memo):
+        obj = super(W_FunctionObject, self).__deepcopy__(memo)
+        obj.index = self.index
+        return obj
+
+    def call(self, space, w_obj, args_w, block):
+        if args_w:
+            raise space.error(space.w_ArgumentError,
+                "wrong number of arguments (%d for 0)" % len(args_w)
+            )
+        assert isinstance(w_obj, W_StructObject)
+        return w_obj.values_w[self.index]
+
+
+class StructMemberWriter(W_FunctionObject):
+    _immutable_fields_ = ["index"]
+
+    def __init__(self, name, index):
+        W_FunctionObject.__init__(self, name)
+        self.index = index
+
+    def __deepcopy__(self, memo):
+        obj = super(W_FunctionObject, self).__deepcopy__(memo)
+        obj.index = self.index
+        return obj
+
+    def call(self, space, w_obj, args_w, block):
+        if len(args_w) != 1:
+            raise space.error(space.w_ArgumentError,
+                "wrong number of arguments (%d for 1)" % len(args_w)
+            )
+        [w_value] = args_w
+        assert isinstance(w_obj, W_StructObject)
+        w_obj.check_frozen(space)
+        w_obj.values_w[self.index] = w_value
+        return w_value
+
+    def arity(self, space):
+        return space.newint(1)
+
+
+class W_StructObject(W_Object):
+    classdef = ClassDef("Struct", W_Object.classdef)
+    classdef.include_module(Enumerable)
+
+    def __init__(self, space, klass, size):
+        W_Object.__init__(self, space, klass)
+        self.values_w = [space.w_nil] * size
+
+    def __deepcopy__(self, memo):
+        obj = super(W_StructObject, self).__deepcopy__(memo)
+        obj.values_w = copy.deepcopy(self.values_w, memo)
+        return obj
+
+    @staticmethod
+    def define_members(space, w_cls, members):
+        """
+        Gives w_cls, a new subclass of Struct, a fixed layout with one slot
+        per member, and accessors that read and write those slots directly.
+        """
+        for i, name in enumerate(members):
+            w_cls.define_method(space, name, StructMemberReader(name, i))
+            w_cls.define_method(space, name + "=", StructMemberWriter(name + "=", i))
+        w_cls.attach_method(space, "allocate", StructAllocator(len(members)))
+
+    def check_frozen(self, space):
+        if space.is_true(self.get_flag(space, "frozen?")):
+            klass = space.getclass(self)
+            raise space.error(space.w_RuntimeError, "can't modify frozen %s" % klass.name)
+
+    def members_w(self, space):
+        w_cls = space.getnonsingletonclass(self)
+        return space.listview(space.find_const(w_cls, "STRUCT_ATTRS"))
+
+    def member_index(self, space, w_idx):
+        size = len(self.values_w)
+        if space.is_kind_of(w_idx, space.w_symbol) or space.is_kind_of(w_idx, space.w_string):
+            name = space.symbol_w(space.send(w_idx, "to_sym"))
+            members_w = self.members_w(space)
+            for i in xrange(len(members_w)):
+                if space.symbol_w(members_w[i]) == name:
+                    return i
+            raise space.error(space.w_NameError, "no member '%s' in struct" % name)
+        idx = space.int_w(space.convert_type(w_idx, space.w_fixnum, "to_int"))
+        if idx >= size:
+            raise space.error(space.w_IndexError,
+                "offset %d too large for struct(size:%d)" % (idx, size)
+            )
+        elif idx < -size:
+            raise space.error(space.w_IndexError,
+                "offset %d too small for struct(size:%d)" % (idx + size, size)
+            )
+        if idx < 0:
+            idx += size
+        return idx
+
+    @classdef.singleton_method("allocate")
+    def singleton_method_allocate(self, space):
+        return W_StructObject(space, self, 0)
+
+    @classdef.method("initialize")
+    def method_initialize(self, space, args_w):
+        if len(args_w) > len(self.values_w):
+            raise space.error(space.w_ArgumentError,
+                "Expected %d, got %d" % (len(self.values_w), len(args_w))
+            )
+        for i in xrange(len(args_w)):
+            self.values_w[i] = args_w[i]
+
+    @classdef.method("initialize_copy")
+    def method_initialize_copy(self, space, w_other):
+        if self is w_other:
+            return self
+        if (not isinstance(w_other, W_StructObject) or
+            space.getnonsingletonclass(self) is not space.getnonsingletonclass(w_other)):
+            raise space.error(space.w_TypeError, "initialize_copy should take same class object")
+        self.values_w = w_other.values_w[:]
+        return self
+
+    @classdef.method("[]")
+    def method_subscript(self, space, w_idx):
+        return self.values_w[self.member_index(space, w_idx)]
+
+    @classdef.method("[]=")
+    @check_frozen()
+    def method_subscript_assign(self, space, w_idx, w_value):
+        self.values_w[self.member_index(space, w_idx)] = w_value
+        return w_value
+
+    @classdef.method("length")
+    @classdef.method("size")
+    def method_length(self, space):
+        return space.newint(len(self.values_w))
+
+    @classdef.method("to_a")
+    @classdef.method("values")
+    def method_to_a(self, space):
+        return space.newarray(self.values_w[:])
+
+    @classdef.method("values_at")
+    def method_values_at(self, space, args_w):
+        return space.send(space.newarray(self.values_w[:]), "values_at", args_w)
+
+    @classdef.method("each")
+    def method_each(self, space, block):
+        if block is None:
+            return space.send(self, "enum_for", [space.newsymbol("each")])
+        for w_value in self.values_w[:]:
+            space.invoke_block(block, [w_value])
+        return self
+
+    @classdef.method("==")
+    def method_eq(self, space, w_other):
+        if self is w_other:
+            return space.w_true
+        if (not isinstance(w_other, W_StructObject) or
+            space.getnonsingletonclass(self) is not space.getnonsingletonclass(w_other)):
+            return space.w_false
+        with space.getexecutioncontext().recursion_guard("struct_eq", self) as in_recursion:
+            if not in_recursion:
+                for i in xrange(len(self.values_w)):
+                    w_value = self.values_w[i]
+                    w_other_value = w_other.values_w[i]
+                    if w_value is w_other_value:
+                        continue
+                    if not space.is_true(space.send(w_value, "==", [w_other_value])):
+                        return space.w_false
+        return space.w_true
+
+    @classdef.method("eql?")
+    def method_eqlp(self, space, w_other):
+        if self is w_other:
+            return space.w_true
+        if (not isinstance(w_other, W_StructObject) or
+            space.getnonsingletonclass(self) is not space.getnonsingletonclass(w_other)):
+            return space.w_false
+        with space.getexecutioncontext().recursion_guard("struct_eqlp", self) as in_recursion:
+            if not in_recursion:
+                for i in xrange(len(self.values_w)):
+                    if not space.eq_w(w_other.values_w[i], self.values_w[i]):
+                        return space.w_false
+        return space.w_true
+
+    @classdef.method("hash")
+    def method_hash(self, space):
+        res = len(self.values_w)
+        with space.getexecutioncontext().recursion_guard("struct_hash", self) as in_recursion:
+            if not in_recursion:
+                for w_value in self.values_w:
+                    res = intmask((1000003 * res) ^ space.hash_w(w_value))
+        return space.newint(res)
@@ -1,6 +1,9 @@
+from topaz import ast, consts
+from topaz.astcompiler import BlockSymbolTable, CompilerContext, SymbolTable
 from topaz.module import ClassDef
 from topaz.modules.comparable import Comparable
 from topaz.objects.objectobject import W_Object
+from topaz.objects.procobject import W_ProcObject
 
 
 class W_SymbolObject(W_Object):
@@ -11,10 +14,12 @@ class W_SymbolObject(W_Object):
     def __init__(self, space, symbol):
         W_Object.__init__(self, space)
         self.symbol = symbol
+        self.w_proc = None
 
     def __deepcopy__(self, memo):
         obj = super(W_SymbolObject, self).__deepcopy__(memo)
         obj.symbol = self.symbol
+        obj.w_proc = None
         return obj
 
     def symbol_w(self, space):
@@ -23,6 +28,36 @@ class W_SymbolObject(W_Object):
     def str_w(self, space):
         return self.symbol
 
+    def to_proc(self, space):
+        """
+        Returns this symbol's proc, compiled once and cached. Its body is
+        `recv.sym(*args, &blk)`, a plain SEND of the symbol's name, so it runs
+        like a literal block instead of going through a dynamic `send`.
+        """
+        if self.w_proc is None:
+            symtable = BlockSymbolTable(SymbolTable())
+            symtable.declare_argument("recv")
+            symtable.declare_argument("args", symtable.SPLAT_ARG)
+            symtable.declare_argument("blk", symtable.BLOCK_ARG)
+            ctx = CompilerContext(space, "block in to_proc", symtable, "<internal:symbol>")
+            body = ast.Send(
+                ast.Variable("recv", 1),
+                self.symbol,
+                [ast.Splat(ast.Variable("args", 1))],
+                ast.BlockArgument(ast.Variable("blk", 1)),
+                1
+            )
+            body.compile(ctx)
+            ctx.emit(consts.RETURN)
+            bc = ctx.create_bytecode(["recv"], [], "args", "blk")
+            # Symbol procs are lambdas, so that a single Array argument is the
+            # receiver rather than being splatted across the parameters.
+            self.w_proc = W_ProcObject(
+                space, bc, self, None, [], None, None, None, None,
+                is_lambda=True
+            )
+        return self.w_proc
+
     @classdef.singleton_method("all_symbols")
     def singleton_method_all_symbols(self, space):
         return space.newarray(space.symbol_cache.values())
@@ -32,6 +67,10 @@ class W_SymbolObject(W_Object):
     def method_singleton_class(self, space):
         raise space.error(space.w_TypeError, "can't define singleton")
 
+    @classdef.method("to_proc")
+    def method_to_proc(self, space):
+        return self.to_proc(space)
+
     @classdef.method("to_s")
     def method_to_s(self, space):
         return space.newstr_fromstr(self.symbol)
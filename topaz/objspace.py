@@ -3,11 +3,12 @@ from __future__ import absolute_import
 import gc
 import os
 import sys
+import time
 import weakref
 
 from rpython.rlib import jit, rpath, types
 from rpython.rlib.cache import Cache
-from rpython.rlib.objectmodel import specialize, compute_unique_id
+from rpython.rlib.objectmodel import specialize, compute_unique_id, compute_identity_hash
 from rpython.rlib.signature import signature
 from rpython.rlib.rarithmetic import intmask
 from rpython.rlib.rbigint import rbigint
@@ -16,6 +17,7 @@ from rpython.rtyper.lltypesystem import llmemory, rffi
 from rply.errors import ParsingError
 
 from topaz import system
+from topaz.coerce import Coerce
 from topaz.astcompiler import CompilerContext, SymbolTable
 from topaz.celldict import GlobalsDict
 from topaz.closure import ClosureCell
@@ -49,14 +51,16 @@ from topaz.objects.exceptionobject import (W_ExceptionObject, W_NoMethodError,
     W_NotImplementedError, W_RangeError, W_LocalJumpError, W_IOError,
     W_RegexpError, W_ThreadError, W_FiberError, W_EOFError, W_FloatDomainError,
     W_SystemStackError)
+from topaz.objects.enumeratorobject import W_EnumeratorCursor
 from topaz.objects.fiberobject import W_FiberObject
 from topaz.objects.fileobject import W_FileObject
 from topaz.objects.floatobject import W_FloatObject
-from topaz.objects.functionobject import W_UserFunction
+from topaz.objects.functionobject import W_BuiltinFunction, W_UserFunction
 from topaz.objects.hashobject import W_HashObject, W_HashIterator
 from topaz.objects.integerobject import W_IntegerObject
 from topaz.objects.intobject import W_FixnumObject
 from topaz.objects.ioobject import W_IOObject
+from topaz.objects.mappedfileobject import W_MappedFileObject
 from topaz.objects.methodobject import W_MethodObject, W_UnboundMethodObject
 from topaz.objects.moduleobject import W_ModuleObject
 from topaz.objects.nilobject import W_NilObject
@@ -67,11 +71,13 @@ from topaz.objects.randomobject import W_RandomObject
 from topaz.objects.rangeobject import W_RangeObject
 from topaz.objects.regexpobject import W_RegexpObject, W_MatchDataObject
 from topaz.objects.stringobject import W_StringObject
+from topaz.objects.structobject import W_StructObject
 from topaz.objects.symbolobject import W_SymbolObject
 from topaz.objects.threadobject import W_ThreadObject
 from topaz.objects.timeobject import W_TimeObject
 from topaz.parser import Parser
 from topaz.utils.ll_file import isdir
+from topaz.utils.startupprofile import StartupProfile
 
 
 class SpaceCache(Cache):
@@ -85,7 +91,9 @@ class SpaceCache(Cache):
 
 class ObjectSpace(object):
     def __init__(self, config):
+        init_start = time.time()
         self.config = config
+        self.startup_profile = StartupProfile()
 
         self.cache = SpaceCache(self)
         self.symbol_cache = {}
@@ -93,6 +101,7 @@ class ObjectSpace(object):
         self.globals = GlobalsDict()
         self.bootstrap = True
         self.exit_handlers_w = []
+        self.unflushed_ios_w = {}
 
         self.w_true = W_TrueObject(self)
         self.w_false = W_FalseObject(self)
@@ -187,6 +196,7 @@ class ObjectSpace(object):
             self.getclassfor(W_UnboundMethodObject),
             self.getclassfor(W_FiberObject),
             self.getclassfor(W_MatchDataObject),
+            self.getclassfor(W_StructObject),
 
             self.getclassfor(W_ExceptionObject),
             self.getclassfor(W_ThreadError),
@@ -206,6 +216,7 @@ class ObjectSpace(object):
 
         for w_cls in [
             self.getclassfor(W_EnvObject), self.getclassfor(W_HashIterator),
+            self.getclassfor(W_EnumeratorCursor), self.getclassfor(W_MappedFileObject),
         ]:
             self.set_const(
                 self.w_topaz,
@@ -234,6 +245,7 @@ class ObjectSpace(object):
 
         self.w_load_path = self.newarray([])
         self.base_lib_path = os.path.abspath(os.path.join(os.path.join(os.path.dirname(__file__), os.path.pardir), "lib-ruby"))
+        self.startup_profile.init_wall = time.time() - init_start
 
     def _freeze_(self):
         self._executioncontexts.clear()
@@ -269,7 +281,8 @@ class ObjectSpace(object):
                 kernel_path = os.path.join(path, "lib-topaz")
                 break
         self.send(self.w_load_path, "unshift", [self.newstr_fromstr(lib_path)])
-        self.load_kernel(kernel_path)
+        with self.startup_profile.measure("phase", "load_kernel"):
+            self.load_kernel(kernel_path)
 
     def load_kernel(self, kernel_path):
         self.send(
@@ -303,18 +316,21 @@ class ObjectSpace(object):
     def compile(self, source, filepath, initial_lineno=1, symtable=None):
         if symtable is None:
             symtable = SymbolTable()
-        astnode = self.parse(source, initial_lineno=initial_lineno, symtable=symtable)
-        ctx = CompilerContext(self, "<main>", symtable, filepath)
-        with ctx.set_lineno(initial_lineno):
-            astnode.compile(ctx)
-        return ctx.create_bytecode([], [], None, None)
+        with self.startup_profile.measure("parse", filepath):
+            astnode = self.parse(source, initial_lineno=initial_lineno, symtable=symtable)
+        with self.startup_profile.measure("compile", filepath):
+            ctx = CompilerContext(self, "<main>", symtable, filepath)
+            with ctx.set_lineno(initial_lineno):
+                astnode.compile(ctx)
+            return ctx.create_bytecode([], [], None, None)
 
     def execute(self, source, w_self=None, lexical_scope=None, filepath="-e",
                 initial_lineno=1):
         bc = self.compile(source, filepath, initial_lineno=initial_lineno)
         frame = self.create_frame(bc, w_self=w_self, lexical_scope=lexical_scope)
-        with self.getexecutioncontext().visit_frame(frame):
-            return self.execute_frame(frame, bc)
+        with self.startup_profile.measure("execute", filepath):
+            with self.getexecutioncontext().visit_frame(frame):
+                return self.execute_frame(frame, bc)
 
     @jit.loop_invariant
     def getexecutioncontext(self):
@@ -389,6 +405,9 @@ class ObjectSpace(object):
         assert strvalue is not None
         return W_StringObject.newstr_fromstr(self, strvalue)
 
+    def newstr_fromslice(self, strvalue, start, end):
+        return W_StringObject.newstr_fromslice(self, strvalue, start, end)
+
     def newstr_fromstrs(self, strs_w):
         return W_StringObject.newstr_fromstrs(self, strs_w)
 
@@ -676,14 +695,41 @@ class ObjectSpace(object):
         return RubyError(w_exc)
 
     def hash_w(self, w_obj):
+        if isinstance(w_obj, W_FixnumObject) and self.has_builtin_method(w_obj, "hash", self.w_fixnum):
+            return w_obj.intvalue
+        elif isinstance(w_obj, W_StringObject) and self.has_builtin_method(w_obj, "hash", self.w_string):
+            return w_obj.hash(self)
+        elif isinstance(w_obj, W_SymbolObject) and self.has_builtin_method(w_obj, "hash", self.w_kernel):
+            return compute_identity_hash(w_obj)
         return self.int_w(self.send(w_obj, "hash"))
 
     def eq_w(self, w_obj1, w_obj2):
+        if isinstance(w_obj2, W_FixnumObject) and self.has_builtin_method(w_obj2, "eql?", self.w_fixnum):
+            return isinstance(w_obj1, W_FixnumObject) and w_obj1.intvalue == w_obj2.intvalue
+        elif isinstance(w_obj2, W_StringObject) and self.has_builtin_method(w_obj2, "eql?", self.w_string):
+            return isinstance(w_obj1, W_StringObject) and w_obj1.str_w(self) == w_obj2.str_w(self)
+        elif isinstance(w_obj2, W_SymbolObject) and self.has_builtin_method(w_obj2, "eql?", self.w_kernel):
+            return w_obj1 is w_obj2
         return self.is_true(self.send(w_obj2, "eql?", [w_obj1]))
 
     def register_exit_handler(self, w_proc):
         self.exit_handlers_w.append(w_proc)
 
+    def flush_io(self):
+        """
+        Writes out whatever IO objects still hold in their write buffers. This
+        happens at exit and before fork and exec, where it would otherwise be
+        lost or written twice.
+        """
+        while self.unflushed_ios_w:
+            w_io, _ = self.unflushed_ios_w.popitem()
+            w_io.registered = False
+            if w_io.fd >= 0:
+                try:
+                    w_io.flush_buffer(self)
+                except OSError:
+                    pass
+
     def run_exit_handlers(self):
         status = -1
         while self.exit_handlers_w:
@@ -808,6 +854,50 @@ class ObjectSpace(object):
     def obj_to_s(self, w_obj):
         return self.str_w(self.send(w_obj, "to_s"))
 
+    def has_builtin_method(self, w_obj, name, w_owner):
+        """
+        Returns True if sending name to w_obj would call the builtin method
+        defined on w_owner, i.e. it hasn't been redefined.
+        """
+        w_method = self.getclass(w_obj).find_method(self, name)
+        return isinstance(w_method, W_BuiltinFunction) and w_method.w_class is w_owner
+
+    def append_inspect(self, builder, w_obj):
+        """
+        Appends w_obj.inspect to builder, without a send for builtin types.
+        """
+        if isinstance(w_obj, W_FixnumObject) and self.has_builtin_method(w_obj, "inspect", self.w_fixnum):
+            builder.append(str(w_obj.intvalue))
+        elif isinstance(w_obj, W_StringObject) and self.has_builtin_method(w_obj, "inspect", self.w_string):
+            builder.append('"')
+            builder.append(w_obj.str_w(self))
+            builder.append('"')
+        elif isinstance(w_obj, W_SymbolObject) and self.has_builtin_method(w_obj, "inspect", self.w_symbol):
+            builder.append(self.str_w(w_obj.method_inspect(self)))
+        elif isinstance(w_obj, W_FloatObject) and self.has_builtin_method(w_obj, "inspect", self.w_float):
+            builder.append(self.str_w(w_obj.method_to_s(self)))
+        elif isinstance(w_obj, W_ArrayObject) and self.has_builtin_method(w_obj, "inspect", self.w_array):
+            w_obj.inspect_into(self, builder)
+        elif isinstance(w_obj, W_HashObject) and self.has_builtin_method(w_obj, "inspect", self.w_hash):
+            w_obj.inspect_into(self, builder)
+        else:
+            builder.append(Coerce.str(self, self.send(w_obj, "inspect")))
+
+    def append_to_s(self, builder, w_obj):
+        """
+        Appends w_obj.to_s to builder, without a send for builtin types.
+        """
+        if isinstance(w_obj, W_StringObject) and self.has_builtin_method(w_obj, "to_s", self.w_string):
+            builder.append(w_obj.str_w(self))
+        elif isinstance(w_obj, W_FixnumObject) and self.has_builtin_method(w_obj, "to_s", self.w_fixnum):
+            builder.append(str(w_obj.intvalue))
+        elif isinstance(w_obj, W_SymbolObject) and self.has_builtin_method(w_obj, "to_s", self.w_symbol):
+            builder.append(w_obj.symbol)
+        elif isinstance(w_obj, W_FloatObject) and self.has_builtin_method(w_obj, "to_s", self.w_float):
+            builder.append(self.str_w(w_obj.method_to_s(self)))
+        else:
+            builder.append(Coerce.str(self, self.send(w_obj, "to_s")))
+
     def compare(self, w_a, w_b, block=None):
         if block is None:
             w_cmp_res = self.send(w_a, "<=>", [w_b])
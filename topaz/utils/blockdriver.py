@@ -0,0 +1,19 @@
+from rpython.rlib import jit
+
+
+def make_block_driver(name):
+    """
+    Returns a JitDriver for a builtin method that loops over invoke_block.
+    The block's bytecode is the green, so the JIT produces a separate loop
+    for every distinct block body rather than one per iterator.
+    """
+    def get_printable_location(block_bytecode):
+        return "%s [%s]" % (name, block_bytecode.name)
+
+    return jit.JitDriver(
+        name=name,
+        greens=["block_bytecode"],
+        reds="auto",
+        get_printable_location=get_printable_location,
+        check_untranslated=False
+    )
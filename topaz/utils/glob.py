@@ -5,8 +5,8 @@ from rpython.rlib.rstring import StringBuilder
 
 from topaz.objects.fileobject import FNM_NOESCAPE, FNM_DOTMATCH
 from topaz.utils import regexp
+from topaz.utils.ll_dir import list_entries, DT_DIR, DT_LNK, DT_UNKNOWN
 from topaz.utils.ll_file import isdir
-from topaz.utils.ordereddict import OrderedDict
 
 
 def regexp_match(cache, re, string):
@@ -35,18 +35,44 @@ def combine_segments(old_segments, suffix, new_segments=[""]):
     return segments
 
 
+def list_dirs(path):
+    """
+    Returns the entries of the directory at path (or the current directory)
+    and which of them are directories, only statting those that readdir
+    couldn't tell about.
+    """
+    names, types = list_entries(path if path else ".")
+    dirs = [False] * len(names)
+    for i in xrange(len(names)):
+        d_type = types[i]
+        if d_type == DT_DIR:
+            dirs[i] = True
+        elif d_type == DT_UNKNOWN or d_type == DT_LNK:
+            dirs[i] = isdir(path + "/" + names[i] if path else names[i])
+    return names, dirs
+
+
 class Glob(object):
     def __init__(self, cache, matches=None):
         self.cache = cache
-        self._matches = OrderedDict()
+        self._seen = {}
+        self._matches = []
         for match in (matches or []):
             self.append_match(match)
 
     def matches(self):
-        return self._matches.keys()
+        return self._matches
 
     def append_match(self, match):
-        self._matches[match] = None
+        if match not in self._seen:
+            self._seen[match] = None
+            self.found(match)
+
+    def found(self, match):
+        """
+        Called with each new match, in the order they are found.
+        """
+        self._matches.append(match)
 
     def is_constant(self, part, flags):
         special_chars = "?*["
@@ -209,12 +235,12 @@ class RecursiveDirectories(Node):
         while stack:
             path = stack.pop()
             try:
-                entries = os.listdir(path)
+                entries, dirs = list_dirs(path)
             except OSError:
                 continue
-            for ent in entries:
-                full = self.path_join(path, ent)
-                if isdir(full) and (self.allow_dots() or ent[0] != "."):
+            for i, ent in enumerate(entries):
+                if dirs[i] and (self.allow_dots() or ent[0] != "."):
+                    full = self.path_join(path, ent)
                     stack.append(full)
                     self.next.call(glob, full)
 
@@ -222,8 +248,9 @@ class RecursiveDirectories(Node):
 class StartRecursiveDirectories(RecursiveDirectories):
     def call(self, glob, start):
         stack = []
-        for ent in os.listdir("."):
-            if isdir(ent) and (self.allow_dots() or ent[0] != "."):
+        entries, dirs = list_dirs(None)
+        for i, ent in enumerate(entries):
+            if dirs[i] and (self.allow_dots() or ent[0] != "."):
                 stack.append(ent)
                 self.next.call(glob, ent)
         self.call_with_stack(glob, None, stack)
@@ -233,7 +260,44 @@ class Match(Node):
     def __init__(self, nxt, flags, glob_pattern):
         Node.__init__(self, nxt, flags)
         self.match_dotfiles = self.allow_dots() or glob_pattern[0] == "."
-        self.regexp = self.translate(glob_pattern, flags)
+        # Patterns like "*.rb", "lib*" or "test_*.py" are checked with
+        # startswith/endswith, anything else goes through a regexp.
+        self.prefix = None
+        self.suffix = None
+        self.regexp = None
+        star = self.single_star(glob_pattern, flags)
+        if star >= 0:
+            end = star
+            while end < len(glob_pattern) and glob_pattern[end] == "*":
+                end += 1
+            self.prefix = os.path.normcase(glob_pattern[:star])
+            self.suffix = os.path.normcase(glob_pattern[end:])
+        else:
+            self.regexp = self.translate(glob_pattern, flags)
+
+    def single_star(self, pattern, flags):
+        """
+        Returns where the only run of *s in pattern starts, or -1 if pattern
+        has other wildcards (or none at all).
+        """
+        special_chars = "?["
+        if not (flags & FNM_NOESCAPE):
+            special_chars += "\\"
+        star = -1
+        i = 0
+        while i < len(pattern):
+            ch = pattern[i]
+            if ch in special_chars:
+                return -1
+            elif ch == "*":
+                if star >= 0:
+                    return -1
+                star = i
+                while i < len(pattern) and pattern[i] == "*":
+                    i += 1
+                continue
+            i += 1
+        return star
 
     def translate(self, pattern, flags):
         pattern = os.path.normcase(pattern)
@@ -308,33 +372,39 @@ class Match(Node):
         string = os.path.normcase(string)
         if string.startswith(".") and not self.match_dotfiles:
             return False
+        if self.regexp is None:
+            prefix = self.prefix
+            suffix = self.suffix
+            assert prefix is not None and suffix is not None
+            return (len(string) >= len(prefix) + len(suffix) and
+                string.startswith(prefix) and string.endswith(suffix))
         ctx = regexp_match(cache, self.regexp, string)
         return rsre_core.search_context(ctx)
 
 
 class DirectoryMatch(Match):
     def call(self, glob, path):
-        if path and not os.path.exists(path):
+        try:
+            entries, dirs = list_dirs(path)
+        except OSError:
             return
 
-        for ent in [".", ".."] + os.listdir(path if path else "."):
+        for ent in [".", ".."]:
             if self.ismatch(glob.cache, ent):
-                full = self.path_join(path, ent)
-                if isdir(full):
-                    self.next.call(glob, full)
+                self.next.call(glob, self.path_join(path, ent))
+        for i, ent in enumerate(entries):
+            if dirs[i] and self.ismatch(glob.cache, ent):
+                self.next.call(glob, self.path_join(path, ent))
 
 
 class EntryMatch(Match):
     def call(self, glob, path):
-        if path and not os.path.exists(path + "/."):
-            return
-
         try:
-            entries = [".", ".."] + os.listdir(path if path else ".")
+            entries, _ = list_entries(path if path else ".")
         except OSError:
             return
 
-        for ent in entries:
+        for ent in [".", ".."] + entries:
             if self.ismatch(glob.cache, ent):
                 glob.append_match(self.path_join(path, ent))
 
@@ -1,3 +1,5 @@
+import os
+
 from rpython.rlib import rposix
 from rpython.rtyper.lltypesystem import rffi, lltype
 from rpython.rtyper.tool import rffi_platform as platform
@@ -7,9 +9,17 @@ from topaz.system import IS_WINDOWS
 
 
 if IS_WINDOWS:
+    DT_UNKNOWN = 0
+    DT_DIR = 4
+    DT_LNK = 10
+
     def opendir(_):
         raise NotImplementedError("directory operations on windows")
     readdir = closedir = opendir
+
+    def list_entries(path):
+        names = os.listdir(path)
+        return names, [DT_UNKNOWN] * len(names)
 else:
     eci = ExternalCompilationInfo(
         includes=["sys/types.h", "dirent.h"]
@@ -18,9 +28,16 @@ else:
     class CConfig:
         _compilation_info_ = eci
         DIRENT = platform.Struct("struct dirent", [
-            ("d_name", lltype.FixedSizeArray(rffi.CHAR, 1))
+            ("d_name", lltype.FixedSizeArray(rffi.CHAR, 1)),
+            ("d_type", rffi.UCHAR),
         ])
+        DT_UNKNOWN = platform.ConstantInteger("DT_UNKNOWN")
+        DT_DIR = platform.ConstantInteger("DT_DIR")
+        DT_LNK = platform.ConstantInteger("DT_LNK")
     config = platform.configure(CConfig)
+    DT_UNKNOWN = config["DT_UNKNOWN"]
+    DT_DIR = config["DT_DIR"]
+    DT_LNK = config["DT_LNK"]
     DIRP = rffi.COpaquePtr("DIR")
     DIRENT = config["DIRENT"]
     DIRENTP = lltype.Ptr(DIRENT)
@@ -62,3 +79,29 @@ else:
                 raise OSError(rposix.get_errno(), "error in readdir")
         namep = rffi.cast(rffi.CCHARP, direntp.c_d_name)
         return rffi.charp2str(namep)
+
+    def list_entries(path):
+        """
+        Returns the names in the directory at path, except "." and "..", and
+        their d_type, which is DT_UNKNOWN where the filesystem doesn't say.
+        """
+        dirp = opendir(path)
+        names = []
+        types = []
+        try:
+            while True:
+                rposix.set_errno(0)
+                direntp = os_readdir(dirp)
+                if not direntp:
+                    if rposix.get_errno() != 0:
+                        raise OSError(rposix.get_errno(), "error in readdir")
+                    break
+                namep = rffi.cast(rffi.CCHARP, direntp.c_d_name)
+                name = rffi.charp2str(namep)
+                if name == "." or name == "..":
+                    continue
+                names.append(name)
+                types.append(rffi.getintfield(direntp, "c_d_type"))
+        finally:
+            closedir(dirp)
+        return names, types
@@ -1,6 +1,9 @@
+import errno
 import os
+import sys
 
-from rpython.rtyper.lltypesystem import rffi
+from rpython.rlib import rposix
+from rpython.rtyper.lltypesystem import rffi, lltype
 from rpython.rtyper.tool import rffi_platform as platform
 from rpython.translator.tool.cbuild import ExternalCompilationInfo
 
@@ -36,3 +39,187 @@ else:
     ftruncate = os.ftruncate
     isdir = os.path.isdir
     fchmod = os.fchmod
+
+
+COPY_BUFFER_SIZE = 64 * 1024
+
+if IS_WINDOWS:
+    copy_eci = ExternalCompilationInfo(includes=["io.h"])
+else:
+    copy_eci = ExternalCompilationInfo(includes=["unistd.h"])
+
+c_read = rffi.llexternal("read",
+    [rffi.INT, rffi.CCHARP, rffi.SIZE_T], rffi.SSIZE_T,
+    compilation_info=copy_eci,
+)
+c_write = rffi.llexternal("write",
+    [rffi.INT, rffi.CCHARP, rffi.SIZE_T], rffi.SSIZE_T,
+    compilation_info=copy_eci,
+)
+
+HAS_SENDFILE = sys.platform.startswith("linux")
+
+if HAS_SENDFILE:
+    sendfile_eci = ExternalCompilationInfo(includes=["sys/sendfile.h"])
+
+    c_sendfile = rffi.llexternal("sendfile",
+        [rffi.INT, rffi.INT, rffi.LONGP, rffi.SIZE_T], rffi.SSIZE_T,
+        compilation_info=sendfile_eci,
+    )
+
+
+def _chunk_size(length, copied):
+    if length < 0 or length - copied > COPY_BUFFER_SIZE:
+        return COPY_BUFFER_SIZE
+    return length - copied
+
+
+def _sendfile(src_fd, dst_fd, length, offset):
+    """
+    Copies with sendfile(2), returning the number of bytes copied, or -1 if
+    the kernel can't do it for these descriptors before anything was sent.
+    """
+    copied = 0
+    with lltype.scoped_alloc(rffi.LONGP.TO, 1) as offsetp:
+        offsetp[0] = rffi.cast(rffi.LONG, offset)
+        while length < 0 or copied < length:
+            res = rffi.cast(lltype.Signed, c_sendfile(
+                rffi.cast(rffi.INT, dst_fd), rffi.cast(rffi.INT, src_fd),
+                offsetp if offset >= 0 else lltype.nullptr(rffi.LONGP.TO),
+                rffi.cast(rffi.SIZE_T, _chunk_size(length, copied))
+            ))
+            if res < 0:
+                err = rposix.get_errno()
+                if err == errno.EINTR:
+                    continue
+                if copied == 0 and (err == errno.EINVAL or err == errno.ENOSYS):
+                    return -1
+                raise OSError(err, "error in sendfile")
+            if res == 0:
+                break
+            copied += res
+    return copied
+
+
+def _copy_buffered(src_fd, dst_fd, length):
+    copied = 0
+    with lltype.scoped_alloc(rffi.CCHARP.TO, COPY_BUFFER_SIZE) as buf:
+        while length < 0 or copied < length:
+            res = rffi.cast(lltype.Signed, c_read(
+                rffi.cast(rffi.INT, src_fd), buf,
+                rffi.cast(rffi.SIZE_T, _chunk_size(length, copied))
+            ))
+            if res < 0:
+                err = rposix.get_errno()
+                if err == errno.EINTR:
+                    continue
+                raise OSError(err, "error in read")
+            if res == 0:
+                break
+            written = 0
+            while written < res:
+                n = rffi.cast(lltype.Signed, c_write(
+                    rffi.cast(rffi.INT, dst_fd), rffi.ptradd(buf, written),
+                    rffi.cast(rffi.SIZE_T, res - written)
+                ))
+                if n < 0:
+                    err = rposix.get_errno()
+                    if err == errno.EINTR:
+                        continue
+                    raise OSError(err, "error in write")
+                written += n
+            copied += res
+    return copied
+
+
+def copy_fd(src_fd, dst_fd, length, offset):
+    """
+    Copies length bytes (or up to EOF, if negative) from src_fd to dst_fd,
+    starting at offset in src_fd, or at its current position if offset is
+    negative. An explicit offset leaves src_fd's position alone. Returns the
+    number of bytes copied, raises OSError.
+
+    The data goes from one file to the other in the kernel where sendfile(2)
+    allows it, otherwise through a single buffer outside the GC heap.
+    """
+    if HAS_SENDFILE:
+        copied = _sendfile(src_fd, dst_fd, length, offset)
+        if copied >= 0:
+            return copied
+    if offset < 0:
+        return _copy_buffered(src_fd, dst_fd, length)
+    pos = os.lseek(src_fd, 0, os.SEEK_CUR)
+    os.lseek(src_fd, offset, os.SEEK_SET)
+    try:
+        return _copy_buffered(src_fd, dst_fd, length)
+    finally:
+        os.lseek(src_fd, pos, os.SEEK_SET)
+
+
+# The most fragments passed to a single writev(2), POSIX only promises 16
+# but every system we run on allows at least 1024.
+WRITEV_MAX = 1024
+
+if IS_WINDOWS:
+    def writev(fd, strs):
+        data = "".join(strs)
+        while data:
+            written = os.write(fd, data)
+            data = data[written:]
+else:
+    writev_eci = ExternalCompilationInfo(includes=["sys/uio.h"])
+
+    class WritevConfig:
+        _compilation_info_ = writev_eci
+        IOVEC = platform.Struct("struct iovec", [
+            ("iov_base", rffi.CCHARP),
+            ("iov_len", rffi.SIZE_T),
+        ])
+    IOVEC = platform.configure(WritevConfig)["IOVEC"]
+
+    c_writev = rffi.llexternal("writev",
+        [rffi.INT, lltype.Ptr(lltype.Array(IOVEC, hints={"nolength": True})), rffi.INT],
+        rffi.SSIZE_T,
+        compilation_info=writev_eci,
+    )
+
+    def _writev_some(fd, strs, start, stop):
+        count = stop - start
+        iov = lltype.malloc(lltype.Array(IOVEC, hints={"nolength": True}), count, flavor="raw")
+        bufs = [rffi.get_nonmovingbuffer(strs[start + i]) for i in range(count)]
+        try:
+            for i in range(count):
+                iov[i].c_iov_base = bufs[i]
+                iov[i].c_iov_len = rffi.cast(rffi.SIZE_T, len(strs[start + i]))
+            while True:
+                res = rffi.cast(lltype.Signed, c_writev(rffi.cast(rffi.INT, fd), iov, rffi.cast(rffi.INT, count)))
+                if res >= 0:
+                    return res
+                err = rposix.get_errno()
+                if err != errno.EINTR:
+                    raise OSError(err, "error in writev")
+        finally:
+            for i in range(count):
+                rffi.free_nonmovingbuffer(strs[start + i], bufs[i])
+            lltype.free(iov, flavor="raw")
+
+    def writev(fd, strs):
+        """
+        Writes all of strs to fd, one writev(2) per WRITEV_MAX fragments
+        unless the kernel takes less than everything. Raises OSError.
+        """
+        start = 0
+        while start < len(strs):
+            stop = min(start + WRITEV_MAX, len(strs))
+            written = _writev_some(fd, strs, start, stop)
+            while start < stop and written >= len(strs[start]):
+                written -= len(strs[start])
+                start += 1
+            if start < stop and written > 0:
+                # Partially written fragment, finish it off by itself.
+                rest = strs[start]
+                rest = rest[written:]
+                while rest:
+                    n = os.write(fd, rest)
+                    rest = rest[n:]
+                start += 1
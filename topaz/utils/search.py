@@ -0,0 +1,136 @@
+"""
+Substring search for the String methods. The algorithm is chosen by the length
+of the needle; searchers are immutable, so they can be built once per pattern
+and reused for any number of haystacks.
+"""
+
+# Patterns used with String#index, gsub, split, etc. tend to repeat, but
+# literals create a new String object on every evaluation, so searchers are
+# also cached per needle, up to this many entries.
+SEARCHER_CACHE_SIZE = 256
+
+
+class BaseSearcher(object):
+    _immutable_fields_ = ["needle"]
+
+    def __init__(self, needle):
+        self.needle = needle
+
+    def find(self, haystack, start, end):
+        """
+        Returns the lowest index i in [start, end - len(needle)] for which
+        haystack[i:i + len(needle)] == needle, or -1.
+        """
+        raise NotImplementedError
+
+    def rfind(self, haystack, start, end):
+        """
+        Like find(), but returns the highest such index.
+        """
+        raise NotImplementedError
+
+
+class EmptySearcher(BaseSearcher):
+    def find(self, haystack, start, end):
+        end = min(end, len(haystack))
+        if start > end:
+            return -1
+        return start
+
+    def rfind(self, haystack, start, end):
+        end = min(end, len(haystack))
+        if start > end:
+            return -1
+        return end
+
+
+class CharSearcher(BaseSearcher):
+    _immutable_fields_ = ["char"]
+
+    def __init__(self, needle):
+        BaseSearcher.__init__(self, needle)
+        self.char = needle[0]
+
+    def find(self, haystack, start, end):
+        return haystack.find(self.char, start, min(end, len(haystack)))
+
+    def rfind(self, haystack, start, end):
+        return haystack.rfind(self.char, start, min(end, len(haystack)))
+
+
+class HorspoolSearcher(BaseSearcher):
+    _immutable_fields_ = ["skip[*]", "rskip[*]"]
+
+    def __init__(self, needle):
+        BaseSearcher.__init__(self, needle)
+        m = len(needle)
+        # skip[c] is how far the window may move right when its last
+        # character is c, rskip[c] how far it may move left when its first
+        # character is c.
+        skip = [m] * 256
+        for i in xrange(m - 1):
+            skip[ord(needle[i])] = m - 1 - i
+        rskip = [m] * 256
+        for i in xrange(m - 1, 0, -1):
+            rskip[ord(needle[i])] = i
+        self.skip = skip
+        self.rskip = rskip
+
+    def find(self, haystack, start, end):
+        needle = self.needle
+        m = len(needle)
+        last = m - 1
+        lastchar = needle[last]
+        end = min(end, len(haystack))
+        i = max(start, 0)
+        while i + m <= end:
+            c = haystack[i + last]
+            if c == lastchar:
+                j = last - 1
+                while j >= 0 and haystack[i + j] == needle[j]:
+                    j -= 1
+                if j < 0:
+                    return i
+            i += self.skip[ord(c)]
+        return -1
+
+    def rfind(self, haystack, start, end):
+        needle = self.needle
+        m = len(needle)
+        firstchar = needle[0]
+        start = max(start, 0)
+        i = min(end, len(haystack)) - m
+        while i >= start:
+            c = haystack[i]
+            if c == firstchar:
+                j = 1
+                while j < m and haystack[i + j] == needle[j]:
+                    j += 1
+                if j == m:
+                    return i
+            i -= self.rskip[ord(c)]
+        return -1
+
+
+def make_searcher(needle):
+    if not needle:
+        return EmptySearcher(needle)
+    elif len(needle) == 1:
+        return CharSearcher(needle)
+    else:
+        return HorspoolSearcher(needle)
+
+
+class SearcherCache(object):
+    def __init__(self, space):
+        self._contents = {}
+
+    def get(self, needle):
+        try:
+            return self._contents[needle]
+        except KeyError:
+            pass
+        if len(self._contents) >= SEARCHER_CACHE_SIZE:
+            self._contents.clear()
+        searcher = self._contents[needle] = make_searcher(needle)
+        return searcher
@@ -0,0 +1,154 @@
+import os
+import time
+
+from rpython.rlib.objectmodel import we_are_translated
+from rpython.rlib.rstring import StringBuilder
+
+try:
+    from rpython.rlib.rgc import get_stats, TOTAL_MEMORY
+except ImportError:
+    get_stats = None
+    TOTAL_MEMORY = 0
+
+
+def gc_memory():
+    """
+    Returns the memory the GC manages, or -1 where that isn't available
+    (untranslated, or with a GC that doesn't say).
+    """
+    if get_stats is None or not we_are_translated():
+        return -1
+    return get_stats(TOTAL_MEMORY)
+
+
+def json_escape(s):
+    res = StringBuilder(len(s) + 2)
+    res.append('"')
+    for ch in s:
+        if ch == '"' or ch == "\\":
+            res.append("\\")
+            res.append(ch)
+        elif ord(ch) < 0x20:
+            res.append("\\u00")
+            res.append("0123456789abcdef"[ord(ch) >> 4])
+            res.append("0123456789abcdef"[ord(ch) & 0xf])
+        else:
+            res.append(ch)
+    res.append('"')
+    return res.build()
+
+
+def pad(s, width, right=False):
+    if len(s) >= width:
+        return s
+    if right:
+        return " " * (width - len(s)) + s
+    return s + " " * (width - len(s))
+
+
+def format_ms(seconds):
+    us = int(seconds * 1000000)
+    frac = str(us % 1000)
+    return "%d.%s" % (us // 1000, "0" * (3 - len(frac)) + frac)
+
+
+class ProfileEntry(object):
+    def __init__(self, kind, name, depth, start, memory):
+        self.kind = kind
+        self.name = name
+        self.depth = depth
+        self.start = start
+        self.start_memory = memory
+        self.wall = 0.0
+        self.memory = -1
+
+
+class StartupProfile(object):
+    """
+    Wall time and GC memory growth of each phase of starting up (setup, the
+    kernel, every file loaded, -r requires, and parsing, compiling and
+    running each piece of code), nested as they happen. Only records
+    anything once configure() has been given somewhere to report to.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.target = None
+        self.entries = []
+        self.stack = []
+        self.init_wall = 0.0
+
+    def configure(self, target):
+        """
+        target is None to stay off, "-" for a summary on stderr, or the path
+        of a JSON file to write.
+        """
+        if target:
+            self.enabled = True
+            self.target = target
+            self.entries = []
+            self.stack = []
+
+    def measure(self, kind, name):
+        if self.enabled:
+            entry = ProfileEntry(kind, name, len(self.stack), time.time(), gc_memory())
+            self.entries.append(entry)
+            self.stack.append(entry)
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if self.enabled and self.stack:
+            entry = self.stack.pop()
+            entry.wall = time.time() - entry.start
+            memory = gc_memory()
+            if memory >= 0 and entry.start_memory >= 0:
+                entry.memory = memory - entry.start_memory
+
+    def summary(self):
+        lines = [pad("startup profile", 72) + pad("wall ms", 12, right=True) + pad("gc KiB", 12, right=True)]
+        if we_are_translated():
+            lines.append("  init ObjectSpace.__init__ (ran at translation time)")
+        else:
+            lines.append(pad("  init ObjectSpace.__init__", 72) + pad(format_ms(self.init_wall), 12, right=True))
+        for entry in self.entries:
+            label = "  %s%s %s" % ("  " * entry.depth, entry.kind, entry.name)
+            memory = "-" if entry.memory < 0 else str(entry.memory // 1024)
+            lines.append(pad(label, 72) + pad(format_ms(entry.wall), 12, right=True) + pad(memory, 12, right=True))
+        return "\n".join(lines) + "\n"
+
+    def to_json(self):
+        items = []
+        for entry in self.entries:
+            items.append('{"kind": %s, "name": %s, "depth": %d, "wall_us": %d, "gc_memory": %d}' % (
+                json_escape(entry.kind), json_escape(entry.name), entry.depth,
+                int(entry.wall * 1000000), entry.memory
+            ))
+        init_wall_us = -1 if we_are_translated() else int(self.init_wall * 1000000)
+        return '{"init_wall_us": %d, "entries": [\n  %s\n]}\n' % (init_wall_us, ",\n  ".join(items))
+
+    def report(self):
+        """
+        Writes out what was recorded, once, and stops recording.
+        """
+        if not self.enabled:
+            return
+        self.enabled = False
+        try:
+            if self.target == "-" or self.target == "1":
+                data = self.summary()
+                fd = 2
+            else:
+                data = self.to_json()
+                fd = os.open(self.target, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0644)
+            try:
+                while data:
+                    written = os.write(fd, data)
+                    data = data[written:]
+            finally:
+                if fd != 2:
+                    os.close(fd)
+        except OSError:
+            os.write(2, "topaz: could not write startup profile to %s\n" % self.target)